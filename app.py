@@ -5,13 +5,13 @@ from flask import Flask, render_template, request, jsonify, redirect, url_for, s
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from functools import wraps
+import atexit
 import json
 from datetime import datetime, timedelta
 
 from config import Config
 from database import DatabaseManager
 from detector import RogueDeviceDetector
-from switch_connector import SwitchConnector
 
 
 # Initialize Flask app
@@ -24,6 +24,7 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 Config.load_from_file()
 db = DatabaseManager(Config.DATABASE_PATH)
 detector = RogueDeviceDetector(Config)
+detector.emit_callback = socketio.emit
 
 # Simple session-based authentication
 USERS = {
@@ -41,6 +42,16 @@ def login_required(f):
     return decorated_function
 
 
+def unknown_switch_error(switch_ip):
+    """400 response if a request names a switch that is not in the inventory, else None
+    
+    No switch (None) means the first switch, as before the inventory existed.
+    """
+    if detector.is_known_switch(switch_ip):
+        return None
+    return jsonify({'success': False, 'message': f'Unknown switch {switch_ip}'}), 400
+
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     """Login page"""
@@ -184,12 +195,7 @@ def api_authorize_device(mac_address):
                 target_vlan = original_vlan if original_vlan else Config.DEFAULT_AUTHORIZED_VLAN
                 
                 try:
-                    with SwitchConnector(
-                        host=Config.SWITCH_IP,
-                        username=Config.SWITCH_USERNAME,
-                        password=Config.SWITCH_PASSWORD,
-                        secret=Config.SWITCH_ENABLE_PASSWORD
-                    ) as switch:
+                    with detector.switch_session(device.get('switch_ip')) as switch:
                         # Move to authorized VLAN
                         switch.change_port_vlan(port, target_vlan)
                         
@@ -238,12 +244,7 @@ def api_unauthorize_device(mac_address):
         port = device['switch_port']
         
         try:
-            with SwitchConnector(
-                host=Config.SWITCH_IP,
-                username=Config.SWITCH_USERNAME,
-                password=Config.SWITCH_PASSWORD,
-                secret=Config.SWITCH_ENABLE_PASSWORD
-            ) as switch:
+            with detector.switch_session(device.get('switch_ip')) as switch:
                 # Move to quarantine VLAN immediately
                 success = switch.quarantine_port_vlan(port, Config.QUARANTINE_VLAN)
                 
@@ -303,7 +304,8 @@ def api_isolate_device(mac_address):
     
     if success:
         # Update port status in database
-        db.update_port_status(port, 'shutdown', f'Isolated rogue device {mac_address}', session.get('username', 'admin'))
+        db.update_port_status(detector.switch_host(device.get('switch_ip')), port, 'shutdown',
+                              f'Isolated rogue device {mac_address}', session.get('username', 'admin'))
         
         socketio.emit('device_isolated', {'mac_address': mac_address, 'port': port})
         return jsonify({'success': True, 'message': f'Device isolated on port {port}'})
@@ -332,11 +334,7 @@ def api_quarantine_device(mac_address):
     try:
         if Config.ENABLE_VLAN_QUARANTINE:
             # VLAN-based quarantine (preferred method)
-            with SwitchConnector(
-                host=Config.SWITCH_IP,
-                username=Config.SWITCH_USERNAME,
-                password=Config.SWITCH_PASSWORD
-            ) as switch:
+            with detector.switch_session(device.get('switch_ip')) as switch:
                 # Move to quarantine VLAN
                 success = switch.quarantine_port_vlan(port, Config.QUARANTINE_VLAN)
                 
@@ -344,6 +342,7 @@ def api_quarantine_device(mac_address):
                     # Update database
                     db.quarantine_device(mac_address, Config.QUARANTINE_VLAN, reason)
                     db.update_port_status(
+                        switch.host,
                         port, 
                         'quarantine', 
                         f'Moved to VLAN {Config.QUARANTINE_VLAN}: {reason}', 
@@ -376,7 +375,8 @@ def api_quarantine_device(mac_address):
             
             if success:
                 db.quarantine_device(mac_address, 0, reason)
-                db.update_port_status(port, 'quarantine', f'Port shutdown: {reason}', session.get('username', 'admin'))
+                db.update_port_status(detector.switch_host(device.get('switch_ip')), port, 'quarantine',
+                                      f'Port shutdown: {reason}', session.get('username', 'admin'))
                 
                 # Send email notification (port shutdown)
                 detector.email_notifier.send_rogue_device_alert(device, f'Port {port} shut down - {reason}')
@@ -404,17 +404,16 @@ def api_shutdown_port(port_name):
     
     data = request.get_json() or {}
     reason = data.get('reason', 'Manual shutdown')
+    error = unknown_switch_error(data.get('switch'))
+    if error:
+        return error
     
     try:
-        with SwitchConnector(
-            host=Config.SWITCH_IP,
-            username=Config.SWITCH_USERNAME,
-            password=Config.SWITCH_PASSWORD
-        ) as switch:
+        with detector.switch_session(data.get('switch')) as switch:
             success = switch.shutdown_port(port_name)
             
             if success:
-                db.update_port_status(port_name, 'shutdown', reason, session.get('username', 'admin'))
+                db.update_port_status(switch.host, port_name, 'shutdown', reason, session.get('username', 'admin'))
                 
                 db.log_event({
                     'event_type': 'PORT_SHUTDOWN',
@@ -445,17 +444,16 @@ def api_enable_port(port_name):
     
     data = request.get_json() or {}
     reason = data.get('reason', 'Manual enable')
+    error = unknown_switch_error(data.get('switch'))
+    if error:
+        return error
     
     try:
-        with SwitchConnector(
-            host=Config.SWITCH_IP,
-            username=Config.SWITCH_USERNAME,
-            password=Config.SWITCH_PASSWORD
-        ) as switch:
+        with detector.switch_session(data.get('switch')) as switch:
             success = switch.enable_port(port_name)
             
             if success:
-                db.update_port_status(port_name, 'enabled', reason, session.get('username', 'admin'))
+                db.update_port_status(switch.host, port_name, 'enabled', reason, session.get('username', 'admin'))
                 
                 db.log_event({
                     'event_type': 'PORT_ENABLED',
@@ -480,17 +478,17 @@ def api_enable_port(port_name):
 @login_required
 def api_get_port_status(port_name):
     """Get status of a specific port"""
+    error = unknown_switch_error(request.args.get('switch'))
+    if error:
+        return error
+    
     try:
-        with SwitchConnector(
-            host=Config.SWITCH_IP,
-            username=Config.SWITCH_USERNAME,
-            password=Config.SWITCH_PASSWORD
-        ) as switch:
+        with detector.switch_session(request.args.get('switch')) as switch:
             details = switch.get_port_details(port_name)
             
             if details:
                 # Also get database status
-                db_status = db.get_port_status(port_name)
+                db_status = db.get_port_status(switch.host, port_name)
                 
                 return jsonify({
                     'success': True,
@@ -508,14 +506,14 @@ def api_get_port_status(port_name):
 @login_required
 def api_get_all_ports_status():
     """Get status of all ports"""
+    error = unknown_switch_error(request.args.get('switch'))
+    if error:
+        return error
+    
     try:
-        with SwitchConnector(
-            host=Config.SWITCH_IP,
-            username=Config.SWITCH_USERNAME,
-            password=Config.SWITCH_PASSWORD
-        ) as switch:
+        with detector.switch_session(request.args.get('switch')) as switch:
             ports = switch.get_interface_status()
-            db_ports = db.get_all_port_statuses()
+            db_ports = db.get_all_port_statuses(switch.host)
             
             return jsonify({
                 'success': True,
@@ -554,13 +552,12 @@ def api_change_port_vlan():
     except ValueError:
         return jsonify({'success': False, 'message': 'Invalid VLAN ID'}), 400
     
+    error = unknown_switch_error(data.get('switch'))
+    if error:
+        return error
+    
     try:
-        with SwitchConnector(
-            host=Config.SWITCH_IP,
-            username=Config.SWITCH_USERNAME,
-            password=Config.SWITCH_PASSWORD,
-            secret=Config.SWITCH_ENABLE_PASSWORD
-        ) as switch:
+        with detector.switch_session(data.get('switch')) as switch:
             # Change the port VLAN
             success = switch.change_port_vlan(port, vlan_id)
             
@@ -576,6 +573,7 @@ def api_change_port_vlan():
                 
                 # Update port status in database
                 db.update_port_status(
+                    switch_ip=switch.host,
                     port_name=port,
                     admin_status='enabled',
 #                    operational_status='up',
@@ -646,11 +644,7 @@ def api_restore_device_vlan(mac_address):
         return jsonify({'success': False, 'message': 'Original VLAN not found'}), 400
     
     try:
-        with SwitchConnector(
-            host=Config.SWITCH_IP,
-            username=Config.SWITCH_USERNAME,
-            password=Config.SWITCH_PASSWORD
-        ) as switch:
+        with detector.switch_session(device.get('switch_ip')) as switch:
             success = switch.change_port_vlan(port, original_vlan)
             
             if success:
@@ -702,23 +696,36 @@ def api_restore_all_quarantined():
     quarantined = db.get_quarantined_devices()
     count = 0
     
+    # Group by switch so each switch gets all its port changes in one config set
+    by_switch = {}
     for device in quarantined:
         mac = device['mac_address']
         port = device.get('switch_port')
         original_vlan = db.get_device_original_vlan(mac)
         
         if port and original_vlan:
-            try:
-                with SwitchConnector(
-                    host=Config.SWITCH_IP,
-                    username=Config.SWITCH_USERNAME,
-                    password=Config.SWITCH_PASSWORD
-                ) as switch:
-                    if switch.change_port_vlan(port, original_vlan):
-                        db.restore_device_vlan(mac, original_vlan)
-                        count += 1
-            except Exception as e:
-                print(f"Failed to restore {mac}: {e}")
+            by_switch.setdefault(device.get('switch_ip'), []).append((mac, port, original_vlan))
+    
+    for switch_ip, restores in by_switch.items():
+        try:
+            with detector.switch_session(switch_ip) as switch:
+                results = switch.apply_port_states([
+                    {'port': port, 'action': 'vlan', 'vlan': original_vlan}
+                    for mac, port, original_vlan in restores
+                ])
+            
+            for mac, port, original_vlan in restores:
+                result = results[port]
+                # Devices sharing a port with a different original VLAN keep the last one requested
+                if result['success'] and result['vlan'] == original_vlan:
+                    db.restore_device_vlan(mac, original_vlan)
+                    db.update_port_status(switch.host, port, 'enabled', f'Restored to VLAN {original_vlan}',
+                                          session.get('username', 'admin'))
+                    count += 1
+                else:
+                    print(f"Failed to restore {mac}: {result['error'] or 'port restored to another VLAN'}")
+        except Exception as e:
+            print(f"Failed to restore devices on {switch_ip}: {e}")
     
     return jsonify({'success': True, 'count': count, 'message': f'Restored {count} devices'})
 
@@ -782,6 +789,46 @@ def api_stop_monitoring():
     return jsonify({'success': True, 'message': 'Monitoring stopped'})
 
 
+@app.route('/api/switch/save-config', methods=['GET', 'POST'])
+@login_required
+def api_save_switch_config():
+    """Get unsaved config state, or save pending changes now"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        switch_ip = data.get('switch')
+        error = unknown_switch_error(switch_ip)
+        if error:
+            return error
+        if detector.save_switch_configs(switch_ip):
+            return jsonify({'success': True, 'message': 'Configuration saved', 'status': detector.get_config_save_status()})
+        return jsonify({'success': False, 'message': 'Failed to save configuration', 'status': detector.get_config_save_status()}), 500
+    
+    return jsonify({'success': True, 'status': detector.get_config_save_status()})
+
+
+@app.route('/api/switch/circuits', methods=['GET', 'POST'])
+@login_required
+def api_switch_circuits():
+    """Get switch circuit breaker state, or close a switch's circuit (all of them without 'switch')"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if not detector.is_known_switch(data.get('switch')):
+            return jsonify({'success': False, 'message': f"Unknown switch {data.get('switch')}"}), 404
+        detector.reset_switch_circuit(data.get('switch'))
+        return jsonify({'success': True, 'message': 'Circuit reset', 'status': detector.get_switch_circuit_stats()})
+    
+    return jsonify({'success': True, 'status': detector.get_switch_circuit_stats()})
+
+
+@app.route('/api/monitoring/trigger', methods=['POST'])
+@login_required
+def api_trigger_monitoring_scan():
+    """Run the next monitoring scan now"""
+    if not detector.request_scan():
+        return jsonify({'success': False, 'message': 'Monitoring is not running'}), 400
+    return jsonify({'success': True, 'message': 'Scan requested'})
+
+
 @app.route('/api/monitoring/status', methods=['GET'])
 @login_required
 def api_monitoring_status():
@@ -789,7 +836,19 @@ def api_monitoring_status():
     return jsonify({
         'success': True,
         'is_running': detector.is_running,
-        'latest_scan': detector.get_latest_results()
+        'latest_scan': detector.get_latest_results(),
+        'scheduler': detector.get_scheduler_stats(),
+        'authorized_cache': db.get_authorized_cache_stats(),
+        'remediation': detector.remediation.get_stats(),
+        'switch_sessions': detector.switch_pool.get_stats(),
+        'async_switch_sessions': detector.async_switch_pool.get_stats(),
+        'switch_circuits': detector.get_switch_circuit_stats(),
+        'mac_change_detection': detector.get_table_cache_stats(),
+        'infrastructure_ports': detector.get_infrastructure_stats(),
+        'enrichment': detector.get_enrichment_stats(),
+        'notifications': detector.get_notification_stats(),
+        'config_saves': detector.get_config_save_status(),
+        'email_delivery': detector.email_notifier.get_delivery_stats()
     })
 
 
@@ -885,6 +944,7 @@ def api_reset_database():
             'rogues': 0,
             'devices': []
         }
+        detector.reset_scan_snapshot()
         
         return jsonify({
             'success': True,
@@ -1064,6 +1124,8 @@ def api_update_email_settings():
         print("Reinitializing email notifier...")
         try:
             from email_notifier import EmailNotifier
+            # Deliver anything still queued with the old settings before replacing it
+            detector.email_notifier.close()
             detector.email_notifier = EmailNotifier(Config)
             print("Email notifier reinitialized successfully")
         except Exception as e:
@@ -1122,6 +1184,12 @@ def status_badge(status):
 # Debug route removed - using <path:port_name> now handles slashes correctly
 
 if __name__ == '__main__':
+    # Open switch sessions ahead of the first scan and API calls
+    detector.warm_up_sessions()
+    
+    # Save pending switch config and drain queued work on exit
+    atexit.register(detector.shutdown)
+    
     # Start continuous monitoring on startup
     detector.start_continuous_monitoring()
     
@@ -0,0 +1,540 @@
+"""
+asyncio switch connector: the SwitchConnector API over asyncssh
+
+netmiko is blocking, so every switch a SwitchConnector talks to holds an
+OS thread for as long as its command runs. AsyncSwitchConnector runs the
+same show commands and port changes as coroutines on one event loop, with
+a timeout per command, so hundreds of switches can be polled at once.
+Output is parsed with the switch_parsers platform registry, and port
+changes are planned, rendered and checked exactly as SwitchConnector does.
+
+AsyncSwitchPool runs the event loop on a background thread and keeps one
+session per switch open between scans, for synchronous callers such as
+the detector's scan pipeline.
+
+asyncssh is optional; it is only needed when SWITCH_COLLECTOR = "asyncssh".
+"""
+import asyncio
+import re
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+from circuit_breaker import SwitchCircuitBreakers
+from switch_connector import SwitchConnector
+from switch_parsers import get_platform
+
+# Prompt at the end of the login banner or of a command's output
+ANY_PROMPT = re.compile(r'[\w.@/:-]+(?:\([\w.-]+\))?[>#]\s*$')
+PASSWORD_PROMPT = re.compile(r'(?i)password:\s*$')
+
+
+class AsyncSwitchConnector:
+    """Connection to one switch over asyncssh; every call is a coroutine
+    
+    Mirrors SwitchConnector: get_* calls return an empty result on error,
+    iter_*, get_mac_address_table_for_vlans() and get_mac_address_entries()
+    raise. Each command must finish within its timeout (command_timeout by
+    default); a session that timed out is closed, since its output state
+    is unknown.
+    """
+    
+    def __init__(self, host, username, password, device_type="cisco_ios", port=22, secret="",
+                 connect_timeout: float = 10, command_timeout: float = 60):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.device_type = device_type
+        self.platform = get_platform(device_type)
+        self.port = port
+        self.secret = secret
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        # Optional callback(host) that defers saving config changes, as on SwitchConnector
+        self.mark_dirty = None
+        self.commands = 0
+        # Why the last connect() failed (None after a successful one)
+        self.last_error = None
+        
+        self._connection = None
+        self._process = None
+        self._prompt = None
+        self._exec_prompt = None
+        self._lock = None
+    
+    # Port change planning and output parsing are shared with SwitchConnector
+    plan_port_states = SwitchConnector.plan_port_states
+    _render_port_config = SwitchConnector._render_port_config
+    _port_errors_from_output = SwitchConnector._port_errors_from_output
+    _port_results_from_output = SwitchConnector._port_results_from_output
+    _mac_entries_command = SwitchConnector._mac_entries_command
+    _filter_mac_entries = SwitchConnector._filter_mac_entries
+    _parse_port_vlan = SwitchConnector._parse_port_vlan
+    _parse_port_details = SwitchConnector._parse_port_details
+    _parse_single_interface_status = SwitchConnector._parse_single_interface_status
+    _infrastructure_commands = SwitchConnector._infrastructure_commands
+    _infrastructure_ports_from_output = SwitchConnector._infrastructure_ports_from_output
+    _extract_hostname = SwitchConnector._extract_hostname
+    _extract_model = SwitchConnector._extract_model
+    
+    @property
+    def connected(self) -> bool:
+        return self._process is not None
+    
+    async def connect(self) -> bool:
+        """Open the SSH session, enter enable mode and turn off paging"""
+        if asyncssh is None:
+            self.last_error = 'asyncssh is not installed (pip install asyncssh)'
+            print(f"Failed to connect to switch {self.host}: {self.last_error}")
+            return False
+        
+        try:
+            await asyncio.wait_for(self._open(), self.connect_timeout)
+            self.last_error = None
+            return True
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = f"no prompt within {self.connect_timeout}s"
+            self.last_error = str(e) or type(e).__name__
+            print(f"Failed to connect to switch {self.host}: {e}")
+            await self.disconnect()
+            return False
+    
+    async def _open(self):
+        self._lock = asyncio.Lock()
+        self._connection = await asyncssh.connect(
+            self.host, port=self.port, username=self.username, password=self.password,
+            known_hosts=None, client_keys=None
+        )
+        self._process = await self._connection.create_process(term_type='vt100', term_size=(511, 24))
+        banner = await self._read_until(ANY_PROMPT)
+        self._set_prompt(banner)
+        
+        if self.secret and self._prompt.endswith('>'):
+            self._process.stdin.write('enable\n')
+            reply = await self._read_until(PASSWORD_PROMPT, ANY_PROMPT)
+            if PASSWORD_PROMPT.search(reply):
+                self._process.stdin.write(self.secret + '\n')
+                reply = await self._read_until(ANY_PROMPT)
+            self._set_prompt(reply)
+            if self._prompt.endswith('#'):
+                print(f"Entered enable mode on {self.host}")
+            else:
+                print(f"Warning: Could not enter enable mode on {self.host}")
+        
+        for command in self.platform.session_commands:
+            await self._run(command, self.connect_timeout)
+    
+    def _set_prompt(self, output: str):
+        """Remember the device prompt from the end of some output"""
+        self._prompt = output.replace('\r', '').rstrip().rsplit('\n', 1)[-1].strip()
+        # Exec mode only: config mode prompts ("switch(config-if)#") don't end a
+        # command. Some CLIs echo pipelined lines early, so prompts can follow
+        # each other on one line.
+        self._exec_prompt = re.compile(rf'(?:^|[\n>#]){re.escape(self._prompt[:-1])}[>#]\s*$')
+    
+    async def disconnect(self):
+        """Close the SSH session"""
+        connection, self._connection, self._process = self._connection, None, None
+        if connection:
+            try:
+                connection.close()
+                await asyncio.wait_for(connection.wait_closed(), 2)
+            except Exception as e:
+                print(f"Error disconnecting from {self.host}: {e}")
+    
+    async def _read_until(self, *patterns) -> str:
+        """Read output until its tail matches one of the patterns"""
+        chunks = []
+        tail = ''
+        while True:
+            chunk = await self._process.stdout.read(65536)
+            if not chunk:
+                raise ConnectionError(f"Session to {self.host} closed")
+            chunks.append(chunk)
+            tail = (tail + chunk)[-512:]
+            if any(pattern.search(tail) for pattern in patterns):
+                return ''.join(chunks)
+    
+    async def _run(self, text: str, timeout: Optional[float] = None) -> str:
+        """Send one or more lines and return the raw transcript up to the prompt"""
+        if not self._process:
+            if not await self.connect():
+                raise ConnectionError(f"Could not connect to {self.host}")
+        
+        timeout = timeout or self.command_timeout
+        async with self._lock:
+            process = self._process
+            if process is None:
+                raise ConnectionError(f"Session to {self.host} closed")
+            process.stdin.write(text + '\n')
+            self.commands += 1
+            try:
+                return await asyncio.wait_for(self._read_until(self._exec_prompt), timeout)
+            except asyncio.TimeoutError:
+                # Output state is unknown - don't reuse this session
+                await self.disconnect()
+                raise TimeoutError(f"{self.host} did not finish '{(text.splitlines() or [''])[0]}' within {timeout}s")
+            except BaseException:
+                await self.disconnect()
+                raise
+    
+    async def send_command(self, command: str, timeout: Optional[float] = None) -> str:
+        """Run a show command and return its output, without the echo and the prompt"""
+        transcript = await self._run(command, timeout)
+        lines = transcript.replace('\r', '').split('\n')[:-1]
+        if lines and command in lines[0]:
+            lines = lines[1:]
+        return '\n'.join(lines)
+    
+    async def send_config_set(self, commands: List[str], timeout: Optional[float] = None) -> str:
+        """Run config-mode commands in one round trip and return the echoed transcript"""
+        text = '\n'.join(['configure terminal'] + list(commands) + ['end'])
+        return (await self._run(text, timeout)).replace('\r', '')
+    
+    async def save_config(self, timeout: Optional[float] = None) -> bool:
+        """Write the running-config to startup-config"""
+        if not self.platform.save_command:
+            print(f"Saving the configuration is not supported on {self.platform.name}")
+            return False
+        try:
+            output = await self.send_command(self.platform.save_command, timeout)
+            if '%' in output:
+                print(f"Error saving configuration on {self.host}: {output.strip()}")
+                return False
+            return True
+        except Exception as e:
+            print(f"Error saving configuration on {self.host}: {e}")
+            return False
+    
+    async def is_alive(self) -> bool:
+        """Check that the session still answers (also serves as a keepalive)"""
+        if not self._process:
+            return False
+        try:
+            await self._run('', min(10, self.command_timeout))
+            return True
+        except Exception:
+            return False
+    
+    async def get_mac_address_table(self, timeout: Optional[float] = None) -> List[Dict]:
+        """Get MAC address table from switch"""
+        try:
+            return self.platform.parse_mac_table(await self.send_command(self.platform.mac_table_command, timeout))
+        except Exception as e:
+            print(f"Error getting MAC table from {self.host}: {e}")
+            return []
+    
+    async def iter_mac_address_table(self, timeout: Optional[float] = None) -> AsyncIterator[Dict]:
+        """Yield MAC address table entries, parsed line by line once read
+        
+        Unlike get_mac_address_table(), errors are raised to the caller.
+        """
+        output = await self.send_command(self.platform.mac_table_command, timeout)
+        for entry in self.platform.iter_mac_table(output.split('\n')):
+            yield entry
+    
+    async def get_mac_address_count(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Get the MAC table counters per VLAN (None if unsupported or failed)"""
+        platform = self.platform
+        if not platform.mac_count_command:
+            return None
+        try:
+            return platform.parse_mac_count(await self.send_command(platform.mac_count_command, timeout)) or None
+        except Exception as e:
+            print(f"Error getting MAC table counters from {self.host}: {e}")
+            return None
+    
+    async def get_mac_address_table_for_vlans(self, vlans, timeout: Optional[float] = None) -> Optional[List[Dict]]:
+        """Get the MAC table entries of some VLANs only (errors are raised; None if the platform can't)"""
+        platform = self.platform
+        if not platform.mac_table_vlan_command:
+            return None
+        
+        entries = []
+        for vlan in vlans:
+            output = await self.send_command(platform.mac_table_vlan_command.format(vlan=vlan), timeout)
+            entries.extend(platform.parse_mac_table(output))
+        return entries
+    
+    async def get_mac_address_entries(self, mac_address: str = None, port: str = None,
+                                      timeout: Optional[float] = None) -> List[Dict]:
+        """Get the MAC table entries of one MAC or one port (errors are raised)"""
+        output = await self.send_command(self._mac_entries_command(mac_address, port), timeout)
+        return self._filter_mac_entries(self.platform.parse_mac_table(output), mac_address, port)
+    
+    async def get_arp_table(self, timeout: Optional[float] = None) -> List[Dict]:
+        """Get ARP table from switch"""
+        try:
+            return self.platform.parse_arp_table(await self.send_command(self.platform.arp_command, timeout))
+        except Exception as e:
+            print(f"Error getting ARP table from {self.host}: {e}")
+            return []
+    
+    async def iter_arp_table(self, timeout: Optional[float] = None) -> AsyncIterator[Dict]:
+        """Yield ARP table entries, parsed line by line once read
+        
+        Unlike get_arp_table(), errors are raised to the caller.
+        """
+        output = await self.send_command(self.platform.arp_command, timeout)
+        for entry in self.platform.iter_arp_table(output.split('\n')):
+            yield entry
+    
+    async def get_interface_status(self, port_name: str = None, timeout: Optional[float] = None) -> List[Dict]:
+        """Get status of interfaces"""
+        try:
+            if port_name:
+                output = await self.send_command(f"show interface {port_name}", timeout)
+                return self._parse_single_interface_status(output, port_name)
+            output = await self.send_command(self.platform.interface_status_command, timeout)
+            return self.platform.parse_interface_status(output)
+        except Exception as e:
+            print(f"Error getting interface status from {self.host}: {e}")
+            return []
+    
+    async def get_port_details(self, port_name: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Get detailed information about a specific port"""
+        try:
+            return self._parse_port_details(await self.send_command(f"show interface {port_name}", timeout), port_name)
+        except Exception as e:
+            print(f"Error getting port details from {self.host}: {e}")
+            return None
+    
+    async def get_port_vlan(self, port_name: str, timeout: Optional[float] = None) -> Optional[int]:
+        """Get the current VLAN of a port"""
+        try:
+            return self._parse_port_vlan(await self.send_command(f"show interface {port_name} switchport", timeout))
+        except Exception as e:
+            print(f"Error getting VLAN for port {port_name} on {self.host}: {e}")
+            return None
+    
+    async def get_device_info(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Get switch device information"""
+        try:
+            version_output = await self.send_command("show version", timeout)
+            hostname_output = await self.send_command("show running-config | include hostname", timeout)
+            return {
+                'hostname': self._extract_hostname(hostname_output),
+                'version': 'Cisco IOS',
+                'model': self._extract_model(version_output)
+            }
+        except Exception as e:
+            print(f"Error getting device info from {self.host}: {e}")
+            return None
+    
+    async def get_infrastructure_ports(self, trunks: bool = True,
+                                       timeout: Optional[float] = None) -> Optional[Dict[str, str]]:
+        """Find the ports that lead to other network devices (see SwitchConnector.get_infrastructure_ports)"""
+        try:
+            outputs = {}
+            for command in self._infrastructure_commands(trunks):
+                outputs[command] = await self.send_command(command, timeout)
+            return self._infrastructure_ports_from_output(outputs)
+        except Exception as e:
+            print(f"Error getting neighbors and trunks from {self.host}: {e}")
+            return None
+    
+    async def apply_port_states(self, changes: List[Dict], save: bool = True,
+                                timeout: Optional[float] = None) -> Dict[str, Dict]:
+        """Push many intended port states in one config-mode exchange (see SwitchConnector.apply_port_states)"""
+        plan = self.plan_port_states(changes)
+        results = {port: dict(state, success=False, error=None) for port, state in plan.items()}
+        if not plan:
+            return results
+        
+        if not self.platform.port_config:
+            for result in results.values():
+                result['error'] = f"Port configuration is not supported on {self.platform.name}"
+            return results
+        
+        try:
+            output = await self.send_config_set(self._render_port_config(plan), timeout)
+        except Exception as e:
+            for result in results.values():
+                result['error'] = str(e)
+            return results
+        
+        self._port_results_from_output(results, output)
+        
+        if save and any(result['success'] for result in results.values()):
+            if self.mark_dirty:
+                self.mark_dirty(self.host)
+            else:
+                await self.save_config(timeout)
+        
+        return results
+    
+    async def _apply_one(self, port_name: str, change: Dict, done: str, failed: str) -> bool:
+        result = (await self.apply_port_states([dict(change, port=port_name)]))[port_name]
+        if result['success']:
+            print(done)
+        else:
+            print(f"{failed}: {result['error']}")
+        return result['success']
+    
+    async def shutdown_port(self, port_name: str) -> bool:
+        """Shutdown a specific switch port"""
+        return await self._apply_one(port_name, {'action': 'shutdown'},
+                                     f"Port {port_name} has been shutdown", f"Error shutting down port {port_name}")
+    
+    async def enable_port(self, port_name: str) -> bool:
+        """Enable a specific switch port"""
+        return await self._apply_one(port_name, {'action': 'enable'},
+                                     f"Port {port_name} has been enabled", f"Error enabling port {port_name}")
+    
+    async def change_port_vlan(self, port_name: str, vlan_id: int) -> bool:
+        """Change port to a different VLAN"""
+        return await self._apply_one(port_name, {'action': 'vlan', 'vlan': vlan_id},
+                                     f"Port {port_name} moved to VLAN {vlan_id}",
+                                     f"Error changing port {port_name} to VLAN {vlan_id}")
+    
+    async def quarantine_port_vlan(self, port_name: str, quarantine_vlan: int) -> bool:
+        """Move port to quarantine VLAN (keeps port enabled, just isolates to different VLAN)"""
+        return await self._apply_one(port_name, {'action': 'quarantine', 'vlan': quarantine_vlan},
+                                     f"Port {port_name} quarantined to VLAN {quarantine_vlan}",
+                                     f"Error quarantining port {port_name} to VLAN {quarantine_vlan}")
+    
+    async def __aenter__(self):
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+
+class AsyncSwitchPool:
+    """One event loop and one AsyncSwitchConnector session per switch
+    
+    The loop runs on a background thread; synchronous code hands it
+    coroutines with run(). Sessions stay open between scans, and a session
+    that fails is closed and reopened on next use. At most max_concurrency
+    switches are talked to at the same time. With breakers, switches whose
+    circuit is open are refused without connecting, as in SwitchSessionPool.
+    """
+    
+    def __init__(self, factory: Callable[[str], AsyncSwitchConnector], max_concurrency: int = 256,
+                 breakers: SwitchCircuitBreakers = None):
+        """
+        Args:
+            factory: factory(host) -> (not yet connected) AsyncSwitchConnector
+            max_concurrency: Most switches with a command running at once
+            breakers: Optional per-switch circuit breakers fed by connect results
+        """
+        self.factory = factory
+        self.max_concurrency = max(1, max_concurrency)
+        self.breakers = breakers
+        self._sessions = {}
+        self._locks = {}
+        self._semaphore = None
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.in_use = 0
+        self.connects = 0
+        self.failures = 0
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='async-switches', daemon=True)
+                self._thread.start()
+            return self._loop
+    
+    def run(self, coroutine, timeout: Optional[float] = None):
+        """Run a coroutine on the pool's loop and wait for its result (from any thread but the loop's)"""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+    
+    @asynccontextmanager
+    async def session(self, host: str) -> AsyncIterator[AsyncSwitchConnector]:
+        """Use a switch's session (inside the pool's loop)
+        
+        Usage:
+            async with pool.session(host) as switch:
+                counts = await switch.get_mac_address_count()
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        
+        # Fail fast on an open circuit instead of waiting for the semaphore
+        trial = self.breakers.check(host) if self.breakers else False
+        async with self._semaphore, lock:
+            # The circuit may have opened while we waited (unless we hold its trial)
+            if self.breakers and not trial:
+                self.breakers.check(host)
+            switch = self._sessions.get(host)
+            if switch is None:
+                switch = self._sessions[host] = self.factory(host)
+            if not switch.connected:
+                self.connects += 1
+                try:
+                    connected = await switch.connect()
+                except asyncio.CancelledError:
+                    # Abandoned at a deadline while still logging in: a hung switch
+                    self.failures += 1
+                    if self.breakers:
+                        self.breakers.record_failure(host, f"no prompt from {host} before the deadline")
+                    await switch.disconnect()
+                    raise
+                if not connected:
+                    self.failures += 1
+                    error = ConnectionError(f"Could not connect to {host}: {switch.last_error}")
+                    if self.breakers:
+                        self.breakers.record_failure(host, error)
+                    raise error
+            if self.breakers:
+                self.breakers.record_success(host)
+            
+            self.in_use += 1
+            try:
+                yield switch
+            except BaseException:
+                # Also on cancellation (timeouts): the session may be mid-command
+                self.failures += 1
+                await switch.disconnect()
+                raise
+            finally:
+                self.in_use -= 1
+    
+    async def _close_all(self):
+        sessions, self._sessions = list(self._sessions.values()), {}
+        await asyncio.gather(*(switch.disconnect() for switch in sessions), return_exceptions=True)
+    
+    def close_all(self, timeout: float = 10):
+        """Close every session and stop the loop"""
+        if self._loop is None:
+            return
+        try:
+            self.run(self._close_all(), timeout)
+        except Exception as e:
+            print(f"Error closing switch sessions: {e}")
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout)
+            self._semaphore = None
+            self._locks = {}
+    
+    def get_stats(self) -> Dict:
+        """Get open and busy session counts and connection attempts"""
+        sessions = list(self._sessions.values())
+        return {
+            'running': self._loop is not None,
+            'open': sum(1 for switch in sessions if switch.connected),
+            'in_use': self.in_use,
+            'max_concurrency': self.max_concurrency,
+            'connects': self.connects,
+            'failures': self.failures,
+            'commands': sum(switch.commands for switch in sessions)
+        }
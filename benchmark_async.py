@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Fleet polling benchmark: netmiko threads vs one asyncssh event loop
+
+Starts ssh_simulator.py in a separate process (synthetic IOS switches on
+127.0.0.1, 127.0.0.2, ...; each command takes latency_seconds) and polls
+every switch's MAC table with RogueDeviceDetector.collect_fleet_tables(),
+once per collector:
+
+- ssh: SwitchConnector over netmiko, FLEET_SCAN_WORKERS threads
+- asyncssh: AsyncSwitchConnector, every switch on one event loop
+
+The first round includes logging in; later rounds reuse the open sessions.
+MAC counters are off, so every round pulls every table in full.
+
+Usage:
+    python benchmark_async.py [switches] [mac_entries] [latency_seconds] [rounds] [collectors]
+
+collectors is a comma-separated list (default "asyncssh,ssh").
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmark_detector import make_config
+from detector import RogueDeviceDetector
+from ssh_simulator import synthetic_hosts
+
+
+def start_simulator(switches: int, mac_entries: int, latency: float):
+    """Start ssh_simulator.py; returns (process, port)"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ssh_simulator.py')
+    process = subprocess.Popen([sys.executable, script, str(switches), '0', str(mac_entries), str(latency)],
+                               stdout=subprocess.PIPE, text=True)
+    ready = process.stdout.readline()
+    if ' port ' not in ready:
+        process.kill()
+        raise RuntimeError(f"SSH simulator did not start: {ready!r}")
+    return process, int(ready.split(' port ')[1].split()[0])
+
+
+def poll_fleet(collector: str, hosts, port: int, rounds: int, workers: int) -> bool:
+    """Poll every switch `rounds` times with one collector and print a row per round"""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(os.path.join(tmp, 'benchmark.db'), hosts,
+                             SWITCH_COLLECTOR=collector,
+                             SWITCH_SSH_PORT=port,
+                             SWITCH_USERNAME='admin',
+                             SWITCH_PASSWORD='admin',
+                             SWITCH_ENABLE_PASSWORD='admin',
+                             SWITCH_MAX_SESSIONS=1,
+                             MAC_CHANGE_DETECTION=False,
+                             FLEET_SCAN_WORKERS=workers,
+                             FLEET_SCAN_TIMEOUT_SECONDS=600)
+        detector = RogueDeviceDetector(config)
+        inventory = detector.get_switch_inventory()
+        passed = True
+        try:
+            for number in range(1, rounds + 1):
+                peak_threads = threading.active_count()
+                start = time.perf_counter()
+                done = threading.Event()
+                
+                def sample_threads():
+                    nonlocal peak_threads
+                    while not done.wait(0.05):
+                        peak_threads = max(peak_threads, threading.active_count())
+                
+                sampler = threading.Thread(target=sample_threads, daemon=True)
+                sampler.start()
+                results = detector.collect_fleet_tables(inventory)
+                elapsed = time.perf_counter() - start
+                done.set()
+                sampler.join()
+                
+                ok = sum(1 for result in results if result['success'])
+                entries = sum(result['mac_entries'] for result in results)
+                passed = passed and ok == len(hosts)
+                print(f"{collector:<10}{number:>6}{elapsed:>10.3f}{ok:>6}/{len(hosts):<6}{entries:>10}"
+                      f"{entries / elapsed:>14,.0f}{peak_threads - 1:>9}")
+        finally:
+            detector.shutdown()
+        return passed
+
+
+def run_benchmark(switches: int = 100, mac_entries: int = 1000, latency: float = 0.5, rounds: int = 3,
+                  collectors=('asyncssh', 'ssh')) -> bool:
+    """Benchmark fleet polling with each collector against the same simulated switches"""
+    hosts = synthetic_hosts(switches)
+    workers = 8
+    print(f"Fleet polling benchmark: {switches} simulated switches x {mac_entries} MACs, "
+          f"{latency}s per command, {rounds} rounds (ssh: {workers} threads)")
+    print("=" * 72)
+    process, port = start_simulator(switches, mac_entries, latency)
+    try:
+        print(f"{'collector':<10}{'round':>6}{'seconds':>10}{'switches':>13}{'entries':>10}"
+              f"{'entries/sec':>14}{'threads':>9}")
+        passed = True
+        for collector in collectors:
+            passed = poll_fleet(collector, hosts, port, rounds, workers) and passed
+        return passed
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    passed = run_benchmark(
+        int(args[0]) if len(args) > 0 else 100,
+        int(args[1]) if len(args) > 1 else 1000,
+        float(args[2]) if len(args) > 2 else 0.5,
+        int(args[3]) if len(args) > 3 else 3,
+        tuple(args[4].split(',')) if len(args) > 4 else ('asyncssh', 'ssh')
+    )
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+End-to-end scan benchmark for the Rogue Detection System
+
+Runs RogueDeviceDetector.perform_scan() against a fleet of synthetic
+switches (switch_transport.SyntheticConnection), or against recordings made
+with SWITCH_TRANSPORT = "record", and reports the time per scan. The first
+scan inserts every device; later scans measure the steady state, with
+`churn` of each MAC table replaced by new devices every scan. Churn
+replaces MACs one for one, which MAC table counters can't see, so with
+churn the counter-based table cache (MAC_CHANGE_DETECTION) is turned off
+and every scan pulls every table; churn 0 measures the cached steady state.
+
+Usage:
+    python benchmark_detector.py [switches] [macs_per_switch] [scans] [churn]
+    python benchmark_detector.py --replay <recordings_dir> [scans]
+
+Reverse DNS is skipped (every IP resolves to 'Unknown'): its cost depends
+on the local resolver, not on the code being measured.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from config import Config
+from detector import RogueDeviceDetector
+
+
+def make_config(database_path: str, hosts, **overrides):
+    """Config for an isolated benchmark run (no alerts, no remediation)"""
+    settings = {
+        'DATABASE_PATH': database_path,
+        'SWITCHES': [{'host': host} for host in hosts],
+        'ENABLE_EMAIL_ALERTS': False,
+        'AUTO_QUARANTINE_ROGUES': False,
+        'AUTO_ISOLATE_ROGUES': False,
+        'SWITCH_SESSION_KEEPALIVE_SECONDS': 0,
+        'FLEET_SCAN_WORKERS': min(32, max(1, len(hosts))),
+    }
+    settings.update(overrides)
+    return type('BenchmarkConfig', (Config,), settings)
+
+
+def run_scans(config, scans: int):
+    """Run scans and print one timing row per scan"""
+    detector = RogueDeviceDetector(config)
+    detector.hostname_resolver._lookup = lambda ip_address: None
+    try:
+        print(f"{'scan':>6}{'seconds':>10}{'entries':>10}{'added':>8}{'removed':>9}{'entries/sec':>14}")
+        for number in range(1, scans + 1):
+            start = time.perf_counter()
+            results = detector.perform_scan()
+            elapsed = time.perf_counter() - start
+            if not results['success']:
+                print(f"Scan {number} failed: {results['error']}")
+                return False
+            
+            delta = results['delta']
+            entries = sum(switch['mac_entries'] for switch in results['switches'])
+            print(f"{number:>6}{elapsed:>10.3f}{entries:>10}{len(delta['added']):>8}"
+                  f"{len(delta['removed']):>9}{entries / elapsed:>14,.0f}")
+        return True
+    finally:
+        detector.shutdown()
+
+
+def run_synthetic(switches: int = 10, macs_per_switch: int = 2000, scans: int = 5, churn: float = 0.01) -> bool:
+    """Benchmark a synthetic fleet"""
+    hosts = [f'10.255.{i // 256}.{i % 256}' for i in range(switches)]
+    print(f"Detector benchmark: {switches} synthetic switches x {macs_per_switch} MACs, "
+          f"{scans} scans, churn {churn:.1%}")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(os.path.join(tmp, 'benchmark.db'), hosts,
+                             SWITCH_TRANSPORT='synthetic',
+                             SWITCH_SYNTHETIC_MAC_ENTRIES=macs_per_switch,
+                             SWITCH_SYNTHETIC_CHURN=churn,
+                             MAC_CHANGE_DETECTION=not churn)
+        return run_scans(config, scans)
+
+
+def run_replay(directory: str, scans: int = 5) -> bool:
+    """Benchmark against recorded switch sessions (one <host>.json per switch)"""
+    hosts = sorted(name[:-len('.json')] for name in os.listdir(directory) if name.endswith('.json'))
+    if not hosts:
+        print(f"No recordings in {directory}")
+        return False
+    print(f"Detector benchmark: replaying {len(hosts)} recorded switch(es), {scans} scans")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(os.path.join(tmp, 'benchmark.db'), hosts,
+                             SWITCH_TRANSPORT='replay',
+                             SWITCH_RECORDINGS_DIR=directory)
+        return run_scans(config, scans)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == '--replay':
+        passed = run_replay(args[1], int(args[2]) if len(args) > 2 else 5)
+    else:
+        passed = run_synthetic(
+            int(args[0]) if len(args) > 0 else 10,
+            int(args[1]) if len(args) > 1 else 2000,
+            int(args[2]) if len(args) > 2 else 5,
+            float(args[3]) if len(args) > 3 else 0.01
+        )
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Notification load test for the Rogue Detection System
+
+Starts a detector against a fleet of synthetic switches on 127.0.0.x with
+its trap listener on a local port, then sends CISCO-MAC-NOTIFICATION-MIB
+MAC changed traps (SNMPv2c) from each switch's address at a fixed rate.
+Every trapped MAC is on its switch and unauthorized, so each one is a new
+rogue. Reports traps received and dropped, events deduplicated and
+evaluated, and the time from receiving a trap to finishing its evaluation.
+
+A scan then runs over the same fleet: every MAC not already found through
+a trap is a new rogue for it, and none is reported twice.
+
+Usage:
+    python benchmark_notifications.py [switches] [traps_per_switch] [traps_per_second] [repeat]
+
+`repeat` sends each trap that many times (a flapping MAC or a trap storm)
+to exercise deduplication.
+"""
+import os
+import socket
+import sys
+import tempfile
+import time
+
+from benchmark_detector import make_config
+from detector import RogueDeviceDetector
+from notifications import CMN_HIST_MAC_CHANGED_MSG, CMN_MAC_CHANGED_NOTIFICATION, SNMP_TRAP_OID
+from snmp_collector import encode_message, OBJECT_IDENTIFIER, OCTET_STRING, TIMETICKS, TRAP_V2
+from switch_parsers import normalize_mac
+from switch_transport import SyntheticConnection
+
+
+def mac_changed_trap(number: int, mac_address: str, vlan: int, community: bytes = b'public') -> bytes:
+    """A cmnMacChangedNotification for one learned MAC"""
+    record = bytes([1]) + vlan.to_bytes(2, 'big') + bytes.fromhex(mac_address.replace(':', '')) + (1).to_bytes(2, 'big')
+    varbinds = [
+        ((1, 3, 6, 1, 2, 1, 1, 3, 0), TIMETICKS, number),
+        (SNMP_TRAP_OID, OBJECT_IDENTIFIER, CMN_MAC_CHANGED_NOTIFICATION),
+        (CMN_HIST_MAC_CHANGED_MSG + (number,), OCTET_STRING, record + b'\x00'),
+    ]
+    return encode_message(community, TRAP_V2, number, 0, 0, varbinds)
+
+
+def switch_traps(host: str, macs_per_switch: int, count: int):
+    """Traps for the first `count` MACs of a synthetic switch's table"""
+    switch = SyntheticConnection(host, mac_entries=macs_per_switch)
+    traps = []
+    for slot, i in enumerate(switch._current_macs()[:count]):
+        traps.append(mac_changed_trap(slot + 1, normalize_mac(switch._mac(i)), switch._vlan(slot)))
+    return traps
+
+
+def send_traps(traps_by_host, address, traps_per_second: float, repeat: int) -> int:
+    """Send every switch's traps round-robin at traps_per_second; returns traps sent"""
+    sockets = {}
+    for host in traps_by_host:
+        sockets[host] = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sockets[host].bind((host, 0))
+    
+    sent = 0
+    start = time.perf_counter()
+    try:
+        rounds = max(len(traps) for traps in traps_by_host.values())
+        for number in range(rounds):
+            for host, traps in traps_by_host.items():
+                if number >= len(traps):
+                    continue
+                for _ in range(repeat):
+                    sockets[host].sendto(traps[number], address)
+                    sent += 1
+                    ahead = sent / traps_per_second - (time.perf_counter() - start)
+                    if ahead > 0.001:
+                        time.sleep(ahead)
+    finally:
+        for sock in sockets.values():
+            sock.close()
+    return sent
+
+
+def run_load_test(switches: int = 10, traps_per_switch: int = 500, traps_per_second: float = 2000,
+                  repeat: int = 2, macs_per_switch: int = 2000) -> bool:
+    """Trap a synthetic fleet at a fixed rate and check every trapped MAC is found once"""
+    hosts = [f'127.0.{1 + i // 250}.{1 + i % 250}' for i in range(switches)]
+    traps_per_switch = min(traps_per_switch, macs_per_switch)
+    print(f"Notification load test: {switches} switches x {traps_per_switch} MAC traps, "
+          f"{traps_per_second:,.0f} traps/s, each sent {repeat}x")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(os.path.join(tmp, 'benchmark.db'), hosts,
+                             SWITCH_TRANSPORT='synthetic',
+                             SWITCH_SYNTHETIC_MAC_ENTRIES=macs_per_switch,
+                             NOTIFICATION_LISTEN_ADDRESS='127.0.0.1',
+                             SNMP_TRAP_PORT=0,
+                             SYSLOG_PORT=None,
+                             LINK_UP_EVALUATION_DELAY_SECONDS=0)
+        detector = RogueDeviceDetector(config)
+        detector.hostname_resolver._lookup = lambda ip_address: None
+        try:
+            if not detector.notification_listener.start():
+                print("Could not start the notification listener")
+                return False
+            traps_by_host = {host: switch_traps(host, macs_per_switch, traps_per_switch) for host in hosts}
+            
+            start = time.perf_counter()
+            sent = send_traps(traps_by_host, ('127.0.0.1', detector.notification_listener.trap_port),
+                              traps_per_second, repeat)
+            send_seconds = time.perf_counter() - start
+            drained = detector.notifications.join(timeout=120)
+            total_seconds = time.perf_counter() - start
+            
+            listener = detector.notification_listener.get_stats()
+            events = detector.get_notification_stats()
+            dropped = sent - listener['traps']
+            print(f"Sent {sent} traps in {send_seconds:.2f}s ({sent / send_seconds:,.0f}/s); "
+                  f"all evaluated after {total_seconds:.2f}s{'' if drained else ' (TIMED OUT)'}")
+            print(f"Received {listener['traps']} traps, dropped {dropped}, rejected {listener['rejected']}, "
+                  f"ignored {listener['ignored']}")
+            print(f"Events: submitted {events['submitted']}, deduplicated {events['deduplicated']}, "
+                  f"evaluated {events['evaluated']} in {events['batches']} batches, failed {events['failed']}, "
+                  f"new rogues {events['new_rogues']}")
+            print(f"Detection latency: avg {events['avg_latency_seconds']}s, max {events['max_latency_seconds']}s")
+            
+            results = detector.perform_scan()
+            expected = switches * macs_per_switch
+            found = events['new_rogues'] + results.get('new_rogues', 0)
+            print(f"Follow-up scan: {results.get('new_rogues', 0)} new rogues; "
+                  f"{found} of {expected} devices reported once")
+            
+            return drained and results['success'] and found == expected
+        finally:
+            detector.shutdown()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    passed = run_load_test(
+        int(args[0]) if len(args) > 0 else 10,
+        int(args[1]) if len(args) > 1 else 500,
+        float(args[2]) if len(args) > 2 else 2000,
+        int(args[3]) if len(args) > 3 else 2
+    )
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Benchmark switch output parsers for the Rogue Detection System
+
+Parses synthetic 'show mac address-table', 'show arp' and 'show interfaces
+status' outputs with the
+line-by-line parsers the connector used to have ('legacy') and with the
+compiled single-pass parsers in switch_parsers, and reports lines/sec
+and allocations per entry. Then every registered platform's parsers are
+run on recorded sample output (fixtures/parsers/<device_type>/), scaled up
+to the same line count, after checking that each capture parses to exactly
+the entries in the expected-output JSON next to it.
+
+Usage:
+    python benchmark_parsers.py [lines] [min_lines_per_sec]
+
+With min_lines_per_sec the script exits with status 1 if either current
+parser is slower, so a throughput target can be held in CI. It also exits
+with status 1 if a platform's fixture does not parse to its expected output.
+"""
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+import switch_parsers
+from switch_parsers import PLATFORMS, parse_mac_table, parse_arp_table, parse_interface_status
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'parsers')
+FIXTURE_TABLES = [('mac_table', 'parse_mac_table'), ('arp_table', 'parse_arp_table'),
+                  ('interface_status', 'parse_interface_status')]
+
+
+def legacy_parse_mac_table(output: str):
+    """Previous MAC table parser (re.search per line, per-entry MAC rebuild)"""
+    devices = []
+    pattern = r'(\d+)\s+([0-9a-f.]+)\s+(\w+)\s+([\w/]+)'
+    for line in output.split('\n'):
+        match = re.search(pattern, line, re.IGNORECASE)
+        if match:
+            vlan, mac, entry_type, port = match.groups()
+            mac = mac.replace('.', '').upper()
+            mac = ':'.join([mac[i:i+2] for i in range(0, 12, 2)])
+            devices.append({'vlan': int(vlan), 'mac_address': mac, 'type': entry_type, 'port': port})
+    return devices
+
+
+def legacy_parse_arp_table(output: str):
+    """Previous ARP table parser"""
+    entries = []
+    pattern = r'Internet\s+(\d+\.\d+\.\d+\.\d+)\s+\d+\s+([0-9a-f.]+)\s+\w+\s+([\w/]+)'
+    for line in output.split('\n'):
+        match = re.search(pattern, line, re.IGNORECASE)
+        if match:
+            ip, mac, interface = match.groups()
+            mac = mac.replace('.', '').upper()
+            mac = ':'.join([mac[i:i+2] for i in range(0, 12, 2)])
+            entries.append({'ip_address': ip, 'mac_address': mac, 'interface': interface})
+    return entries
+
+
+def legacy_parse_interface_status(output: str):
+    """Previous interface status parser (prefix list + token scan per line)"""
+    interfaces = []
+    interface_patterns = [
+        'Et0/', 'Et1/', 'Et2/', 'Et3/', 'Et4/', 'Et5/', 'Et6/', 'Et7/',
+        'Gi0/', 'Gi1/', 'Gi2/', 'Gi3/', 'Gi4/', 'Gi5/', 'Gi6/', 'Gi7/',
+        'Fa0/', 'Fa1/', 'Fa2/', 'Fa3/', 'Fa4/', 'Fa5/', 'Fa6/', 'Fa7/',
+        'Te0/', 'Te1/', 'Te2/', 'Te3/', 'Te4/', 'Te5/', 'Te6/', 'Te7/',
+        'Po0', 'Po1', 'Po2', 'Po3', 'Po4', 'Po5', 'Po6', 'Po7'
+    ]
+    for line in output.split('\n'):
+        if any(pattern in line for pattern in interface_patterns):
+            parts = line.split()
+            if len(parts) >= 3:
+                status = 'unknown'
+                vlan = 'unknown'
+                for i, part in enumerate(parts):
+                    if part.lower() in ['connected', 'notconnect', 'disabled', 'notconnected']:
+                        status = part.lower()
+                        if i + 1 < len(parts):
+                            vlan = parts[i + 1]
+                        break
+                interfaces.append({'port': parts[0], 'status': status, 'vlan': vlan})
+    return interfaces
+
+
+def cisco_mac(i: int) -> str:
+    """Unicast MAC in Cisco dotted form for index i"""
+    return f'02{(i >> 24) & 0xFF:02x}.{(i >> 16) & 0xFFFF:04x}.{i & 0xFFFF:04x}'
+
+
+def generate_mac_table(lines: int) -> str:
+    """Synthetic 'show mac address-table' output with headers and multicast lines"""
+    out = [
+        '          Mac Address Table',
+        '-------------------------------------------',
+        '',
+        'Vlan    Mac Address       Type        Ports',
+        '----    -----------       --------    -----',
+        ' All    0100.0ccc.cccc    STATIC      CPU',
+        ' All    0100.0ccc.cccd    STATIC      CPU',
+    ]
+    for i in range(lines):
+        if i % 50 == 0:
+            out.append(f' {1 + i % 100:<4}   0100.5e00.{i & 0xFFFF:04x}    STATIC      Gi1/0/{1 + i % 48}')
+        else:
+            out.append(f' {1 + i % 100:<4}   {cisco_mac(i)}    DYNAMIC     Gi{1 + i % 8}/0/{1 + i % 48}')
+    out.append(f'Total Mac Addresses for this criterion: {lines}')
+    return '\n'.join(out)
+
+
+def generate_arp_table(lines: int) -> str:
+    """Synthetic 'show arp' output"""
+    out = ['Protocol  Address          Age (min)  Hardware Addr   Type   Interface']
+    for i in range(lines):
+        out.append(f'Internet  10.{(i >> 16) & 0xFF}.{(i >> 8) & 0xFF}.{i & 0xFF}'
+                   f'{"":<8}{i % 240:>3}   {cisco_mac(i)}  ARPA   Vlan{1 + i % 100}')
+    return '\n'.join(out)
+
+
+def generate_interface_status(lines: int) -> str:
+    """Synthetic 'show interfaces status' output for a large stacked chassis"""
+    out = ['Port      Name               Status       Vlan       Duplex  Speed Type']
+    statuses = ('connected', 'notconnect', 'disabled', 'err-disabled')
+    for i in range(lines):
+        prefix = 'Te' if i % 10 == 0 else 'Gi'
+        name = f'desk-{i}' if i % 3 else ''
+        out.append(f'{prefix}{1 + (i // 48) % 9}/0/{1 + i % 48:<6}{name:<19}{statuses[i % 4]:<13}'
+                   f'{1 + i % 100:<11}a-full  a-1000 10/100/1000BaseTX')
+    return '\n'.join(out)
+
+
+def measure(parser, output: str, repeat: int = 3):
+    """Best-of-N time, then allocations of one traced run"""
+    best = None
+    for _ in range(repeat):
+        switch_parsers._MAC_CACHE.clear()
+        switch_parsers._PORT_CACHE.clear()
+        start = time.perf_counter()
+        entries = parser(output)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    
+    switch_parsers._MAC_CACHE.clear()
+    switch_parsers._PORT_CACHE.clear()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    entries = parser(output)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    return best, len(entries), blocks, peak
+
+
+def run_benchmark(lines: int = 100000, min_lines_per_sec: float = None) -> bool:
+    """Run every parser and print one result row per parser"""
+    outputs = {
+        'mac': generate_mac_table(lines),
+        'arp': generate_arp_table(lines),
+        'ifstat': generate_interface_status(lines)
+    }
+    line_counts = {name: output.count('\n') + 1 for name, output in outputs.items()}
+    parsers = [
+        ('mac', 'legacy', legacy_parse_mac_table),
+        ('mac', 'compiled', parse_mac_table),
+        ('arp', 'legacy', legacy_parse_arp_table),
+        ('arp', 'compiled', parse_arp_table),
+        ('ifstat', 'legacy', legacy_parse_interface_status),
+        ('ifstat', 'compiled', parse_interface_status),
+    ]
+    
+    print(f"Parser benchmark: {lines} lines per table")
+    print("=" * 78)
+    print(f"{'table':<8}{'parser':<10}{'entries':>9}{'seconds':>10}{'lines/sec':>14}"
+          f"{'allocs/entry':>14}{'peak bytes/entry':>17}")
+    
+    passed = True
+    for table, label, parser in parsers:
+        seconds, entries, blocks, peak = measure(parser, outputs[table])
+        rate = line_counts[table] / seconds
+        print(f"{table:<8}{label:<10}{entries:>9}{seconds:>10.3f}{rate:>14,.0f}"
+              f"{blocks / max(entries, 1):>14.2f}{peak / max(entries, 1):>17.0f}")
+        if min_lines_per_sec and label == 'compiled' and rate < min_lines_per_sec:
+            passed = False
+    
+    if min_lines_per_sec:
+        print(f"\nTarget {min_lines_per_sec:,.0f} lines/sec: {'met' if passed else 'NOT met'}")
+    return passed
+
+
+def scale_fixture(output: str, lines: int) -> str:
+    """Repeat a fixture's body until the output has about `lines` lines
+    
+    Header lines before the first row that looks like data are kept once.
+    """
+    rows = output.splitlines()
+    start = next((i for i, row in enumerate(rows) if re.search(r'\d/|\d\.\d|:\w\w:', row)), 0)
+    header, body = rows[:start], rows[start:] or rows
+    repeat = max(1, (lines - len(header)) // len(body))
+    return '\n'.join(header + body * repeat)
+
+
+def fixture_platforms() -> List[str]:
+    """Device types with recorded fixtures (aliases share their main platform's)"""
+    return [device_type for device_type in sorted(PLATFORMS)
+            if os.path.isdir(os.path.join(FIXTURES_DIR, device_type))]
+
+
+def load_fixture(device_type: str, table: str) -> Tuple[str, List[Dict]]:
+    """A platform's captured output for a table and the entries it must parse to"""
+    path = os.path.join(FIXTURES_DIR, device_type, table)
+    with open(f'{path}.txt') as f:
+        output = f.read()
+    with open(f'{path}.json') as f:
+        expected = json.load(f)
+    return output, expected
+
+
+def check_fixtures() -> bool:
+    """Parse every fixture once and compare with its expected output exactly"""
+    passed = True
+    for device_type in fixture_platforms():
+        platform = PLATFORMS[device_type]
+        for table, parser_name in FIXTURE_TABLES:
+            output, expected = load_fixture(device_type, table)
+            entries = getattr(platform, parser_name)(output)
+            if entries != expected:
+                passed = False
+                print(f"  {device_type} {table}: parsed output differs from {table}.json")
+                for index in range(max(len(entries), len(expected))):
+                    got = entries[index] if index < len(entries) else None
+                    want = expected[index] if index < len(expected) else None
+                    if got != want:
+                        print(f"    entry {index}: expected {want}, got {got}")
+    return passed
+
+
+def run_platform_benchmark(lines: int = 100000) -> bool:
+    """Check each registered platform's parsers against its fixtures, then time them scaled up"""
+    print(f"\nPlatform parsers: fixtures scaled to ~{lines} lines")
+    print("=" * 78)
+    print(f"{'device_type':<16}{'table':<18}{'entries':>9}{'seconds':>10}{'lines/sec':>14}")
+    
+    passed = check_fixtures()
+    for device_type in fixture_platforms():
+        platform = PLATFORMS[device_type]
+        for table, parser_name in FIXTURE_TABLES:
+            output = scale_fixture(load_fixture(device_type, table)[0], lines)
+            seconds, entries, _, _ = measure(getattr(platform, parser_name), output, repeat=2)
+            rate = (output.count('\n') + 1) / seconds
+            print(f"{device_type:<16}{table:<18}{entries:>9}{seconds:>10.3f}{rate:>14,.0f}")
+    return passed
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    passed = run_benchmark(lines, target)
+    passed = run_platform_benchmark(lines) and passed
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark scan persistence for the Rogue Detection System
+
+Compares the per-device write path (add_or_update_device) with the
+single-transaction bulk path (bulk_upsert_devices) on synthetic MAC tables
+and reports the time per 10k entries.
+
+Usage:
+    python benchmark_scan.py [entries]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from database import DatabaseManager
+
+
+def generate_devices(count: int):
+    """Generate synthetic scan results with unique MAC addresses"""
+    devices = []
+    for i in range(count):
+        mac = ':'.join(f'{b:02X}' for b in (0x02, 0x00, (i >> 24) & 0xFF, (i >> 16) & 0xFF, (i >> 8) & 0xFF, i & 0xFF))
+        devices.append({
+            'mac_address': mac,
+            'ip_address': f'10.{(i >> 16) & 0xFF}.{(i >> 8) & 0xFF}.{i & 0xFF}',
+            'hostname': 'Unknown',
+            'vendor': 'Unknown',
+            'switch_port': f'Gi1/0/{i % 48 + 1}',
+            'vlan': 1 + i % 10,
+            'is_authorized': 0,
+            'is_rogue': 1
+        })
+    return devices
+
+
+def time_per_device(db: DatabaseManager, devices) -> float:
+    """Time writing devices one connection/commit at a time"""
+    start = time.perf_counter()
+    for device in devices:
+        db.add_or_update_device(device)
+    return time.perf_counter() - start
+
+
+def time_bulk(db: DatabaseManager, devices) -> float:
+    """Time writing devices in a single transaction"""
+    start = time.perf_counter()
+    db.bulk_upsert_devices(devices)
+    return time.perf_counter() - start
+
+
+def run_benchmark(entries: int = 10000):
+    """Run insert and update passes for both write paths"""
+    devices = generate_devices(entries)
+    scale = 10000 / entries
+
+    print(f"Scan persistence benchmark: {entries} entries")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, timer in (('per-device', time_per_device), ('bulk', time_bulk)):
+            db = DatabaseManager(os.path.join(tmp, f'{label}.db'))
+
+            # First pass inserts every device, second pass updates them all
+            insert_time = timer(db, devices)
+            update_time = timer(db, devices)
+
+            print(f"{label:>12}: insert {insert_time * scale:8.3f}s / 10k   "
+                  f"update {update_time * scale:8.3f}s / 10k")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
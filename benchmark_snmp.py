@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+SNMP vs SSH collection benchmark for the Rogue Detection System
+
+Reads the same synthetic switch's MAC and ARP tables both ways:
+
+- SSH: SwitchConnector over the synthetic transport, parsing the CLI output
+  (streamed, as the detector does)
+- SNMP: SnmpCollector against snmp_simulator.SnmpAgent on a local UDP port,
+  serving the same tables as BRIDGE-MIB/Q-BRIDGE-MIB/IP-MIB
+
+and checks that both return the same entries. By default the SSH side is
+CPU only; pass ssh_lines_per_second to add a realistic terminal output
+rate (a few thousand lines/s on access switches). The agent runs in this
+process, so the SNMP time includes the agent's own encoding.
+
+Usage:
+    python benchmark_snmp.py [entries] [runs] [ssh_lines_per_second]
+    python benchmark_snmp.py --agent <host>[:port] [community] [runs]
+"""
+import sys
+import time
+
+from snmp_collector import SnmpCollector
+from snmp_simulator import SnmpAgent, synthetic_view
+from switch_connector import SwitchConnector
+from switch_transport import SyntheticConnection
+
+
+def time_collection(read, runs: int):
+    """Best-of-runs seconds and the last result of read()"""
+    best, result = None, None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = read()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def print_row(label: str, table: str, seconds: float, entries: int, requests: str = ''):
+    print(f"{label:<6}{table:<6}{seconds:>10.3f}{entries:>10}{entries / seconds if seconds else 0:>14,.0f}{requests:>10}")
+
+
+def run_comparison(entries: int = 20000, runs: int = 3, ssh_lines_per_second: float = None) -> bool:
+    """Benchmark SSH against SNMP on one synthetic switch"""
+    print(f"SNMP vs SSH benchmark: {entries} MAC/ARP entries, best of {runs}")
+    print("=" * 60)
+    switch = SyntheticConnection('10.255.0.1', mac_entries=entries, lines_per_second=ssh_lines_per_second)
+    view = synthetic_view(switch)
+    
+    ssh = SwitchConnector('10.255.0.1', '', '', transport=lambda connector: switch)
+    ssh_mac_seconds, ssh_mac = time_collection(lambda: list(ssh.iter_mac_address_table()), runs)
+    ssh_arp_seconds, ssh_arp = time_collection(lambda: list(ssh.iter_arp_table()), runs)
+    ssh.disconnect()
+    
+    with SnmpAgent({'public': view}) as agent:
+        with SnmpCollector('127.0.0.1', port=agent.port) as snmp:
+            snmp_mac_seconds, snmp_mac = time_collection(lambda: list(snmp.iter_mac_address_table()), runs)
+            mac_requests = snmp.requests // runs
+            snmp.requests = 0
+            snmp_arp_seconds, snmp_arp = time_collection(lambda: list(snmp.iter_arp_table()), runs)
+            arp_requests = snmp.requests // runs
+    
+    print(f"{'path':<6}{'table':<6}{'seconds':>10}{'entries':>10}{'entries/sec':>14}{'requests':>10}")
+    print_row('ssh', 'mac', ssh_mac_seconds, len(ssh_mac))
+    print_row('snmp', 'mac', snmp_mac_seconds, len(snmp_mac), str(mac_requests))
+    print_row('ssh', 'arp', ssh_arp_seconds, len(ssh_arp))
+    print_row('snmp', 'arp', snmp_arp_seconds, len(snmp_arp), str(arp_requests))
+    
+    mac_key = lambda entry: (entry['vlan'], entry['mac_address'])
+    arp_key = lambda entry: entry['ip_address']
+    same = (sorted(ssh_mac, key=mac_key) == sorted(snmp_mac, key=mac_key)
+            and sorted(ssh_arp, key=arp_key) == sorted(snmp_arp, key=arp_key))
+    print(f"\nSSH and SNMP entries {'match' if same else 'DIFFER'}; "
+          f"SNMP/SSH time: MAC {snmp_mac_seconds / ssh_mac_seconds:.2f}x, ARP {snmp_arp_seconds / ssh_arp_seconds:.2f}x")
+    return same
+
+
+def run_agent(address: str, community: str = 'public', runs: int = 3) -> bool:
+    """Benchmark SnmpCollector against an existing agent (snmpsim or a switch)"""
+    host, _, port = address.partition(':')
+    print(f"SNMP benchmark: {host}:{port or 161} community '{community}', best of {runs}")
+    print("=" * 60)
+    with SnmpCollector(host, community=community, port=int(port or 161)) as snmp:
+        mac_seconds, mac = time_collection(lambda: list(snmp.iter_mac_address_table()), runs)
+        arp_seconds, arp = time_collection(lambda: list(snmp.iter_arp_table()), runs)
+    print(f"{'path':<6}{'table':<6}{'seconds':>10}{'entries':>10}{'entries/sec':>14}")
+    print_row('snmp', 'mac', mac_seconds, len(mac))
+    print_row('snmp', 'arp', arp_seconds, len(arp))
+    return bool(mac or arp)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == '--agent':
+        passed = run_agent(args[1], args[2] if len(args) > 2 else 'public', int(args[3]) if len(args) > 3 else 3)
+    else:
+        passed = run_comparison(
+            int(args[0]) if len(args) > 0 else 20000,
+            int(args[1]) if len(args) > 1 else 3,
+            float(args[2]) if len(args) > 2 and float(args[2]) > 0 else None
+        )
+    sys.exit(0 if passed else 1)
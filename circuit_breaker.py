@@ -0,0 +1,173 @@
+"""
+Per-switch circuit breakers for switch connections
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of connecting to a switch whose circuit is open"""
+
+
+class _Circuit:
+    """Breaker state for one switch"""
+    
+    def __init__(self, reset_timeout: float):
+        self.state = SwitchCircuitBreakers.CLOSED
+        self.failures = 0  # consecutive
+        self.reset_timeout = reset_timeout  # doubles after each failed trial
+        self.retry_at = 0.0
+        self.trial_started = None
+        self.last_error = None
+        self.last_failure = None
+        self.times_opened = 0
+        self.rejected = 0
+
+
+class SwitchCircuitBreakers:
+    """Remembers which switches are failing, across scans and API calls
+    
+    A switch starts closed: every call goes through. After
+    failure_threshold consecutive failed connects (including connects
+    abandoned at a scan deadline) its circuit opens and calls fail at
+    once with CircuitOpenError instead of waiting for another connect
+    timeout. After reset_timeout seconds the circuit is half-open: one
+    call is let through as a trial. If it succeeds the circuit closes;
+    if it fails the circuit opens again for twice as long, up to
+    max_reset_timeout.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60, max_reset_timeout: float = 900):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open a switch's circuit (0 = never open)
+            reset_timeout: Seconds an opened circuit waits before its first trial call
+            max_reset_timeout: Longest wait between trials of a switch that keeps failing
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max(reset_timeout, max_reset_timeout)
+        
+        self._lock = threading.Lock()
+        self._circuits = {}  # host -> _Circuit
+        
+        self.rejected = 0
+        self.times_opened = 0
+        self.times_closed = 0
+    
+    def _circuit(self, host: str) -> _Circuit:
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = _Circuit(self.reset_timeout)
+        return circuit
+    
+    def check(self, host: str) -> bool:
+        """Call before talking to a switch
+        
+        Returns:
+            True if this call was let through as the half-open trial: the
+            caller must report it with record_success/record_failure and
+            must not call check() again for the same attempt
+        
+        Raises:
+            CircuitOpenError: The switch's circuit is open, or half-open
+                with its trial call still running
+        """
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.state == self.CLOSED:
+                return False
+            
+            # A trial that never reported back (e.g. its thread was abandoned) expires
+            if circuit.state == self.HALF_OPEN and now - circuit.trial_started >= circuit.reset_timeout:
+                circuit.state = self.OPEN
+            
+            if circuit.state == self.OPEN and now >= circuit.retry_at:
+                circuit.state = self.HALF_OPEN
+                circuit.trial_started = now
+                return True
+            
+            circuit.rejected += 1
+            self.rejected += 1
+            if circuit.state == self.HALF_OPEN:
+                reason = 'a trial connection is in progress'
+            else:
+                reason = f'retrying in {max(0, circuit.retry_at - now):.0f}s'
+            raise CircuitOpenError(f"Circuit open for {host} after {circuit.failures} failure(s) "
+                                   f"({circuit.last_error}); {reason}")
+    
+    def record_success(self, host: str):
+        """A session to the switch was obtained: close its circuit"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                return
+            if circuit.state != self.CLOSED:
+                self.times_closed += 1
+                print(f"Circuit for switch {host} closed")
+            circuit.state = self.CLOSED
+            circuit.failures = 0
+            circuit.reset_timeout = self.reset_timeout
+            circuit.trial_started = None
+    
+    def record_failure(self, host: str, error=None):
+        """Connecting to the switch failed (or was abandoned)"""
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuit(host)
+            circuit.failures += 1
+            circuit.last_error = str(error) if error else 'failed'
+            circuit.last_failure = datetime.now().isoformat()
+            
+            if circuit.state == self.HALF_OPEN:
+                circuit.reset_timeout = min(circuit.reset_timeout * 2, self.max_reset_timeout)
+            elif circuit.state == self.OPEN or not self.failure_threshold or circuit.failures < self.failure_threshold:
+                return
+            
+            circuit.state = self.OPEN
+            circuit.retry_at = now + circuit.reset_timeout
+            circuit.trial_started = None
+            circuit.times_opened += 1
+            self.times_opened += 1
+            print(f"Circuit for switch {host} opened after {circuit.failures} failure(s): {circuit.last_error}; "
+                  f"retrying in {circuit.reset_timeout:.0f}s")
+    
+    def reset(self, host: Optional[str] = None):
+        """Close one switch's circuit (or every circuit), e.g. after it was repaired"""
+        with self._lock:
+            if host is None:
+                self._circuits = {}
+            else:
+                self._circuits.pop(host, None)
+    
+    def get_stats(self) -> Dict:
+        """Get every tracked switch's circuit state and the fail-fast counters"""
+        now = time.monotonic()
+        with self._lock:
+            switches = {}
+            for host, circuit in self._circuits.items():
+                switches[host] = {
+                    'state': circuit.state,
+                    'consecutive_failures': circuit.failures,
+                    'last_error': circuit.last_error,
+                    'last_failure': circuit.last_failure,
+                    'retry_in_seconds': round(max(0, circuit.retry_at - now), 1) if circuit.state == self.OPEN else None,
+                    'times_opened': circuit.times_opened,
+                    'rejected_calls': circuit.rejected
+                }
+            return {
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout_seconds': self.reset_timeout,
+                'open': sum(1 for switch in switches.values() if switch['state'] != self.CLOSED),
+                'switches': switches,
+                'rejected_calls': self.rejected,
+                'times_opened': self.times_opened,
+                'times_closed': self.times_closed
+            }
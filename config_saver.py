@@ -0,0 +1,142 @@
+"""
+Coalesced saving of switch running-config to startup-config
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+class ConfigSaveCoalescer:
+    """Saves each switch's config once per burst of changes
+    
+    Port changes only mark their switch dirty. The switch is saved once no
+    further change has arrived for quiet_period seconds, or at the latest
+    max_delay seconds after its first unsaved change, so a bulk quarantine
+    of N ports costs one "write memory" instead of N. flush() saves on
+    demand (e.g. before shutdown).
+    """
+    
+    def __init__(self, save: Callable[[str], bool], quiet_period: float = 10, max_delay: float = 60):
+        """
+        Args:
+            save: save(host) -> bool, writes the switch's running-config
+            quiet_period: Save after this many seconds without a new change
+            max_delay: Never leave a change unsaved longer than this
+        """
+        self.save = save
+        self.quiet_period = quiet_period
+        self.max_delay = max(quiet_period, max_delay)
+        
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._dirty = {}  # host -> {'first': monotonic, 'last': monotonic, 'changes': int, 'since': datetime}
+        self._thread = None
+        
+        self.saves = 0
+        self.failed_saves = 0
+        self.changes_coalesced = 0
+        self.last_save = None
+    
+    def mark_dirty(self, host: str):
+        """Record an unsaved change on a switch"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._dirty.get(host)
+            if state is None:
+                self._dirty[host] = {'first': now, 'last': now, 'changes': 1, 'since': datetime.now()}
+            else:
+                state['last'] = now
+                state['changes'] += 1
+                self.changes_coalesced += 1
+        
+        self._start()
+        self._wakeup.set()
+    
+    def has_unsaved_changes(self, host: str = None) -> bool:
+        """Check whether a switch (or any switch) has unsaved changes"""
+        with self._lock:
+            return host in self._dirty if host else bool(self._dirty)
+    
+    def flush(self, host: Optional[str] = None) -> bool:
+        """Save now (one switch, or every dirty switch)
+        
+        Returns:
+            True if every save succeeded
+        """
+        with self._lock:
+            hosts = [host] if host else list(self._dirty)
+            pending = {h: self._dirty.pop(h) for h in hosts if h in self._dirty}
+        
+        return all([self._save(h, state) for h, state in pending.items()])
+    
+    def _save(self, host: str, state: Dict) -> bool:
+        """Save one switch; a failed save stays dirty and is retried later"""
+        try:
+            success = bool(self.save(host))
+        except Exception as e:
+            print(f"Error saving configuration on {host}: {e}")
+            success = False
+        
+        with self._lock:
+            if success:
+                self.saves += 1
+                self.last_save = datetime.now()
+                print(f"Saved configuration on {host} ({state['changes']} change(s))")
+            else:
+                self.failed_saves += 1
+                retry = self._dirty.setdefault(host, state)
+                if retry is not state:
+                    # New changes arrived during the save; merge them in
+                    retry['since'] = min(retry['since'], state['since'])
+                    retry['changes'] += state['changes']
+                else:
+                    # Retry after another quiet period
+                    state['first'] = state['last'] = time.monotonic()
+        return success
+    
+    def _start(self):
+        """Start the flush timer thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='config-saver', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        """Save each dirty switch once it is quiet or has waited max_delay"""
+        while True:
+            # Clear before reading state so a change marked meanwhile still wakes us
+            self._wakeup.clear()
+            with self._lock:
+                now = time.monotonic()
+                due = []
+                deadlines = []
+                for host, state in self._dirty.items():
+                    deadline = min(state['last'] + self.quiet_period, state['first'] + self.max_delay)
+                    if deadline <= now:
+                        due.append(host)
+                    else:
+                        deadlines.append(deadline)
+            
+            for host in due:
+                self.flush(host)
+            
+            if due:
+                continue
+            self._wakeup.wait(max(0.0, min(deadlines) - time.monotonic()) if deadlines else None)
+    
+    def get_stats(self) -> Dict:
+        """Get unsaved-change state and save counters"""
+        with self._lock:
+            return {
+                'unsaved_changes': bool(self._dirty),
+                'dirty_switches': {
+                    host: {'changes': state['changes'], 'since': state['since'].isoformat()}
+                    for host, state in self._dirty.items()
+                },
+                'saves': self.saves,
+                'failed_saves': self.failed_saves,
+                'changes_coalesced': self.changes_coalesced,
+                'last_save': self.last_save.isoformat() if self.last_save else None
+            }
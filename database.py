@@ -1,10 +1,97 @@
 """
 Database management for Rogue Device Detection System
 """
+import os
 import sqlite3
 import json
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, FrozenSet, Iterable
+
+from switch_parsers import canonical_port
+
+
+class AuthorizedMacCache:
+    """Thread-safe cache of the authorized MAC allowlist
+    
+    Loaded lazily from the database on first use and then kept current by
+    write-through from DatabaseManager. Every change bumps the generation
+    counter, so callers can tell whether a set they hold is still current.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._macs = None  # None until first load
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, loader) -> FrozenSet[str]:
+        """Return the cached allowlist, loading it with loader() on a miss"""
+        with self._lock:
+            if self._macs is None:
+                self.misses += 1
+                # Loaded under the lock so a concurrent write-through cannot
+                # be overwritten by a stale read
+                self._macs = frozenset(loader())
+                self.generation += 1
+            else:
+                self.hits += 1
+            return self._macs
+    
+    def add(self, macs: Iterable[str]):
+        """Write-through: MACs were added to authorized_devices"""
+        with self._lock:
+            if self._macs is not None:
+                self._macs = self._macs.union(macs)
+            self.generation += 1
+    
+    def discard(self, macs: Iterable[str]):
+        """Write-through: MACs were removed from authorized_devices"""
+        with self._lock:
+            if self._macs is not None:
+                self._macs = self._macs.difference(macs)
+            self.generation += 1
+    
+    def replace(self, macs: Iterable[str]):
+        """Write-through: authorized_devices was rewritten as a whole"""
+        with self._lock:
+            self._macs = frozenset(macs)
+            self.generation += 1
+    
+    def invalidate(self):
+        """Force a reload on next access"""
+        with self._lock:
+            self._macs = None
+            self.generation += 1
+    
+    def get_stats(self) -> Dict:
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'loaded': self._macs is not None,
+                'size': len(self._macs) if self._macs is not None else 0,
+                'generation': self.generation,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# One cache per database file, shared by every DatabaseManager in the process
+# (the Flask app and the detector each create their own manager)
+_authorized_caches: Dict[str, AuthorizedMacCache] = {}
+_authorized_caches_lock = threading.Lock()
+
+
+def get_authorized_cache(db_path: str) -> AuthorizedMacCache:
+    """Get the process-wide allowlist cache for a database file"""
+    key = os.path.abspath(db_path)
+    with _authorized_caches_lock:
+        if key not in _authorized_caches:
+            _authorized_caches[key] = AuthorizedMacCache()
+        return _authorized_caches[key]
 
 
 class DatabaseManager:
@@ -12,6 +99,7 @@ class DatabaseManager:
     
     def __init__(self, db_path="rogue_monitor.db"):
         self.db_path = db_path
+        self.authorized_cache = get_authorized_cache(db_path)
         self.init_database()
     
     def get_connection(self):
@@ -44,6 +132,7 @@ class DatabaseManager:
                 hostname TEXT,
                 vendor TEXT,
                 switch_port TEXT,
+                switch_ip TEXT,
                 vlan INTEGER,
                 original_vlan INTEGER,
                 is_authorized INTEGER DEFAULT 0,
@@ -54,6 +143,12 @@ class DatabaseManager:
             )
         ''')
         
+        # Columns added after the initial schema (upgrade existing databases)
+        cursor.execute('PRAGMA table_info(devices)')
+        device_columns = {row['name'] for row in cursor.fetchall()}
+        if 'switch_ip' not in device_columns:
+            cursor.execute('ALTER TABLE devices ADD COLUMN switch_ip TEXT')
+        
         # Authorized devices table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS authorized_devices (
@@ -84,17 +179,31 @@ class DatabaseManager:
             )
         ''')
         
-        # Port status table
+        # Port status table, keyed by switch and port (switch_ip '' = recorded
+        # before ports were tracked per switch)
+        cursor.execute('PRAGMA table_info(port_status)')
+        port_columns = {row['name'] for row in cursor.fetchall()}
+        if port_columns and 'switch_ip' not in port_columns:
+            cursor.execute('ALTER TABLE port_status RENAME TO port_status_old')
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS port_status (
-                port_name TEXT PRIMARY KEY,
+                switch_ip TEXT NOT NULL DEFAULT '',
+                port_name TEXT NOT NULL,
                 admin_status TEXT DEFAULT 'enabled',
                 operational_status TEXT DEFAULT 'up',
                 last_modified TIMESTAMP,
                 modified_by TEXT,
-                reason TEXT
+                reason TEXT,
+                PRIMARY KEY (switch_ip, port_name)
             )
         ''')
+        if port_columns and 'switch_ip' not in port_columns:
+            cursor.execute('''
+                INSERT INTO port_status (port_name, admin_status, operational_status, last_modified, modified_by, reason)
+                SELECT port_name, admin_status, operational_status, last_modified, modified_by, reason
+                FROM port_status_old
+            ''')
+            cursor.execute('DROP TABLE port_status_old')
         
         conn.commit()
         conn.close()
@@ -162,6 +271,86 @@ class DatabaseManager:
             print(f"Error adding/updating device: {e}")
             return False
     
+    def bulk_upsert_devices(self, devices: List[Dict]) -> int:
+        """Add or update a whole scan's devices in a single transaction
+        
+        Same column semantics as add_or_update_device(), but one connection,
+        one executemany() and one commit for the entire list.
+        
+        Returns:
+            Number of device rows written (0 on error)
+        """
+        if not devices:
+            return 0
+        
+        now = datetime.now()
+        rows = [(
+            device['mac_address'],
+            device.get('ip_address'),
+            device.get('hostname'),
+            device.get('vendor'),
+            device.get('switch_port'),
+            device.get('switch_ip'),
+            device.get('vlan'),
+            device.get('is_authorized', 0),
+            device.get('is_rogue', 0),
+            now,
+            now
+        ) for device in devices]
+        
+        conn = self.get_connection()
+        try:
+            with conn:
+                conn.executemany('''
+                    INSERT INTO devices (
+                        mac_address, ip_address, hostname, vendor, switch_port, switch_ip, vlan,
+                        is_authorized, is_rogue, first_seen, last_seen, status
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'active')
+                    ON CONFLICT(mac_address) DO UPDATE SET
+                        ip_address = excluded.ip_address,
+                        hostname = excluded.hostname,
+                        vendor = excluded.vendor,
+                        switch_port = excluded.switch_port,
+                        switch_ip = excluded.switch_ip,
+                        vlan = excluded.vlan,
+                        is_rogue = excluded.is_rogue,
+                        last_seen = excluded.last_seen,
+                        status = 'active'
+                ''', rows)
+            return len(rows)
+        except Exception as e:
+            print(f"Error bulk upserting devices: {e}")
+            return 0
+        finally:
+            conn.close()
+    
+    def update_device_hostnames(self, hostnames: Dict[str, Dict]) -> int:
+        """Set hostnames found after their devices were written, in one transaction
+        
+        Args:
+            hostnames: mac -> {'ip_address': ip, 'hostname': name}; a row is
+                only updated while it still has that IP
+        
+        Returns:
+            Number of device rows updated (0 on error)
+        """
+        if not hostnames:
+            return 0
+        
+        rows = [(lookup['hostname'], mac, lookup['ip_address']) for mac, lookup in hostnames.items()]
+        conn = self.get_connection()
+        try:
+            with conn:
+                cursor = conn.executemany(
+                    'UPDATE devices SET hostname = ? WHERE mac_address = ? AND ip_address = ?', rows
+                )
+            return cursor.rowcount
+        except Exception as e:
+            print(f"Error updating device hostnames: {e}")
+            return 0
+        finally:
+            conn.close()
+    
     def get_device_by_mac(self, mac_address: str) -> Dict:
         """Get a single device by MAC address"""
         conn = self.get_connection()
@@ -212,13 +401,57 @@ class DatabaseManager:
         return devices
     
     def is_device_authorized(self, mac_address: str) -> bool:
-        """Check if a MAC address is authorized"""
+        """Check if a MAC address is authorized (served from the allowlist cache)"""
+        return mac_address in self.get_authorized_mac_set()
+    
+    def get_authorized_mac_set(self) -> FrozenSet[str]:
+        """Get all authorized MAC addresses (for per-scan prefetch)"""
+        return self.authorized_cache.get(self._load_authorized_macs)
+    
+    def _load_authorized_macs(self) -> Set[str]:
+        """Load the authorized MAC set from the database in a single query"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT mac_address FROM authorized_devices WHERE mac_address = ?', (mac_address,))
-        result = cursor.fetchone()
+        cursor.execute('SELECT mac_address FROM authorized_devices')
+        macs = {row['mac_address'] for row in cursor.fetchall()}
         conn.close()
-        return result is not None
+        return macs
+    
+    def get_authorized_cache_stats(self) -> Dict:
+        """Get allowlist cache generation and hit/miss counters"""
+        return self.authorized_cache.get_stats()
+    
+    def get_device_scan_state(self, macs: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Get mac -> {switch_port, switch_ip, status, first_seen} for known devices in a single query
+        
+        Args:
+            macs: Only these devices (None = all)
+        """
+        query = 'SELECT mac_address, switch_port, switch_ip, status, first_seen FROM devices'
+        if macs is None:
+            chunks = [()]
+        else:
+            macs = list(macs)
+            # Stay below SQLite's limit on bound parameters
+            chunks = [macs[start:start + 500] for start in range(0, len(macs), 500)]
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        state = {}
+        for chunk in chunks:
+            if macs is None:
+                cursor.execute(query)
+            else:
+                cursor.execute(f"{query} WHERE mac_address IN ({','.join('?' * len(chunk))})", chunk)
+            for row in cursor.fetchall():
+                state[row['mac_address']] = {
+                    'switch_port': row['switch_port'],
+                    'switch_ip': row['switch_ip'],
+                    'status': row['status'],
+                    'first_seen': row['first_seen']
+                }
+        conn.close()
+        return state
     
     def authorize_device(self, mac_address: str, device_info: Dict) -> bool:
         """Authorize a device"""
@@ -252,6 +485,7 @@ class DatabaseManager:
             
             conn.commit()
             conn.close()
+            self.authorized_cache.add([mac_address])
             
             # Log event
             self.log_event({
@@ -278,6 +512,7 @@ class DatabaseManager:
             
             conn.commit()
             conn.close()
+            self.authorized_cache.discard([mac_address])
             
             return True
         except Exception as e:
@@ -313,6 +548,43 @@ class DatabaseManager:
             print(f"Error logging event: {e}")
             return False
     
+    def bulk_log_events(self, events: List[Dict]) -> int:
+        """Log many security events in a single transaction
+        
+        Returns:
+            Number of events written (0 on error)
+        """
+        if not events:
+            return 0
+        
+        now = datetime.now()
+        rows = [(
+            now,
+            event_info.get('event_type'),
+            event_info.get('severity'),
+            event_info.get('mac_address'),
+            event_info.get('ip_address'),
+            event_info.get('switch_port'),
+            event_info.get('description'),
+            event_info.get('action_taken')
+        ) for event_info in events]
+        
+        conn = self.get_connection()
+        try:
+            with conn:
+                conn.executemany('''
+                    INSERT INTO events (
+                        timestamp, event_type, severity, mac_address, ip_address,
+                        switch_port, description, action_taken
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+            return len(rows)
+        except Exception as e:
+            print(f"Error logging {len(rows)} events: {e}")
+            return 0
+        finally:
+            conn.close()
+    
     def get_recent_events(self, limit=100) -> List[Dict]:
         """Get recent events"""
         conn = self.get_connection()
@@ -406,6 +678,7 @@ class DatabaseManager:
         for device in devices_list:
             try:
                 mac = device.get('mac_address')
+                # authorize_device() writes each MAC through to the allowlist cache
                 if mac and self.authorize_device(mac, device):
                     count += 1
             except Exception as e:
@@ -436,17 +709,19 @@ class DatabaseManager:
         
         return self.bulk_authorize_devices(default_devices)
     
-    def update_port_status(self, port_name: str, admin_status: str, reason: str = '', modified_by: str = 'system') -> bool:
-        """Update port status in database"""
+    def update_port_status(self, switch_ip: str, port_name: str, admin_status: str, reason: str = '',
+                           modified_by: str = 'system') -> bool:
+        """Update port status in database (keyed by switch and canonical port name)"""
+        port_name = canonical_port(port_name)
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
             cursor.execute('''
                 INSERT OR REPLACE INTO port_status 
-                (port_name, admin_status, last_modified, modified_by, reason)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (port_name, admin_status, datetime.now(), modified_by, reason))
+                (switch_ip, port_name, admin_status, last_modified, modified_by, reason)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (switch_ip or '', port_name, admin_status, datetime.now(), modified_by, reason))
             
             conn.commit()
             conn.close()
@@ -455,20 +730,24 @@ class DatabaseManager:
             print(f"Error updating port status: {e}")
             return False
     
-    def get_port_status(self, port_name: str) -> Optional[Dict]:
-        """Get status of a specific port"""
+    def get_port_status(self, switch_ip: str, port_name: str) -> Optional[Dict]:
+        """Get status of a specific port of a switch"""
+        port_name = canonical_port(port_name)
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM port_status WHERE port_name = ?', (port_name,))
+        cursor.execute('SELECT * FROM port_status WHERE switch_ip = ? AND port_name = ?', (switch_ip or '', port_name))
         result = cursor.fetchone()
         conn.close()
         return dict(result) if result else None
     
-    def get_all_port_statuses(self) -> List[Dict]:
-        """Get status of all ports"""
+    def get_all_port_statuses(self, switch_ip: Optional[str] = None) -> List[Dict]:
+        """Get status of all ports (of one switch, or of every switch)"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM port_status ORDER BY port_name')
+        if switch_ip is None:
+            cursor.execute('SELECT * FROM port_status ORDER BY switch_ip, port_name')
+        else:
+            cursor.execute('SELECT * FROM port_status WHERE switch_ip = ? ORDER BY port_name', (switch_ip,))
         ports = [dict(row) for row in cursor.fetchall()]
         conn.close()
         return ports
@@ -590,6 +869,9 @@ class DatabaseManager:
             conn.commit()
             conn.close()
             
+            if not keep_authorized:
+                self.authorized_cache.replace([])
+            
             print(f"✅ Database reset complete (authorized devices {'kept' if keep_authorized else 'cleared'})")
             return True
         except Exception as e:
@@ -1,15 +1,29 @@
 """
 Core rogue device detection engine
 """
-import time
+import asyncio
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, FrozenSet, Optional
 from database import DatabaseManager
 from switch_connector import SwitchConnector
+from async_switch_connector import AsyncSwitchConnector, AsyncSwitchPool
+from snmp_collector import SnmpCollector
+from switch_transport import transport_from_config
 from email_notifier import EmailNotifier
 from config import Config
-from vendor_lookup import VendorLookup
+from hostname_resolver import HostnameResolver
+from remediation import RemediationQueue
+from scan_scheduler import ScanScheduler
+from session_pool import SwitchSessionPool
+from circuit_breaker import SwitchCircuitBreakers
+from config_saver import ConfigSaveCoalescer
+from table_cache import SwitchTableCache
+from enrichment import DeviceEnrichment
+from infrastructure import InfrastructurePortIndex
+from notifications import NotificationListener, NotificationQueue
 
 
 class RogueDeviceDetector:
@@ -19,8 +33,108 @@ class RogueDeviceDetector:
         self.config = config or Config
         self.db = DatabaseManager(self.config.DATABASE_PATH)
         self.email_notifier = EmailNotifier(self.config)
+        self.hostname_resolver = HostnameResolver(
+            max_workers=getattr(self.config, 'HOSTNAME_RESOLVER_WORKERS', 16),
+            timeout=getattr(self.config, 'HOSTNAME_LOOKUP_TIMEOUT_SECONDS', 2.0),
+            ttl=getattr(self.config, 'HOSTNAME_CACHE_TTL_SECONDS', 3600),
+            negative_ttl=getattr(self.config, 'HOSTNAME_NEGATIVE_TTL_SECONDS', 300),
+            max_entries=getattr(self.config, 'HOSTNAME_CACHE_MAX_ENTRIES', 10000)
+        )
+        # None for live SSH; record/replay/synthetic stand-ins otherwise
+        self.switch_transport = transport_from_config(self.config)
+        self.config_saver = ConfigSaveCoalescer(
+            self._save_switch_config,
+            quiet_period=getattr(self.config, 'SWITCH_SAVE_QUIET_SECONDS', 10),
+            max_delay=getattr(self.config, 'SWITCH_SAVE_MAX_DELAY_SECONDS', 60)
+        )
+        # Shared by both session pools, so scans and API calls learn from each other's failures
+        self.switch_breakers = SwitchCircuitBreakers(
+            failure_threshold=getattr(self.config, 'SWITCH_BREAKER_FAILURE_THRESHOLD', 3),
+            reset_timeout=getattr(self.config, 'SWITCH_BREAKER_RESET_SECONDS', 60),
+            max_reset_timeout=getattr(self.config, 'SWITCH_BREAKER_MAX_RESET_SECONDS', 900)
+        )
+        self.switch_pool = SwitchSessionPool(
+            lambda host: self._new_switch_connector(self._switch_info_for_host(host)),
+            max_sessions_per_switch=getattr(self.config, 'SWITCH_MAX_SESSIONS', 2),
+            checkout_timeout=getattr(self.config, 'SWITCH_SESSION_CHECKOUT_TIMEOUT_SECONDS', 30),
+            idle_timeout=getattr(self.config, 'SWITCH_SESSION_IDLE_TIMEOUT_SECONDS', 300),
+            keepalive_interval=getattr(self.config, 'SWITCH_SESSION_KEEPALIVE_SECONDS', 60),
+            health_check_after=getattr(self.config, 'SWITCH_SESSION_HEALTH_CHECK_AFTER_SECONDS', 30),
+            breakers=self.switch_breakers
+        )
+        # Switches with collector 'asyncssh' are polled from one event loop instead of a thread each
+        self.async_switch_pool = AsyncSwitchPool(
+            lambda host: self._new_async_switch_connector(self._switch_info_for_host(host)),
+            max_concurrency=getattr(self.config, 'ASYNC_SWITCH_CONCURRENCY', 256),
+            breakers=self.switch_breakers
+        )
+        self.remediation = RemediationQueue(
+            self._execute_remediation,
+            lambda host: self.switch_pool.checkout(self._switch_info_for_host(host)['host']),
+            workers=getattr(self.config, 'REMEDIATION_WORKERS', 1),
+            session_release=self.switch_pool.checkin
+        )
+        self.table_cache = SwitchTableCache(
+            full_refresh_every=getattr(self.config, 'MAC_FULL_REFRESH_EVERY_N_SCANS', 3),
+            max_vlan_fetches=getattr(self.config, 'MAC_CHANGE_MAX_VLAN_FETCHES', 4)
+        )
+        # Uplink and trunk ports, found from CDP/LLDP neighbors and the trunk
+        # table on a slow cadence; MACs learned on them are dropped while parsing
+        self.infrastructure = InfrastructurePortIndex(
+            refresh_interval=getattr(self.config, 'INFRASTRUCTURE_REFRESH_INTERVAL_SECONDS', 3600)
+        )
+        # ARP bindings, hostnames and vendors are refreshed on their own
+        # cadences and joined to each MAC scan from memory
+        self.enrichment = DeviceEnrichment(
+            self.hostname_resolver,
+            arp_max_age=getattr(self.config, 'ARP_REFRESH_INTERVAL_SECONDS', 300)
+        )
+        self.arp_scheduler = ScanScheduler(
+            self._refresh_arp_bindings,
+            lambda: getattr(self.config, 'ARP_REFRESH_INTERVAL_SECONDS', 300),
+            name='arp-refresh'
+        )
+        self.hostname_scheduler = ScanScheduler(
+            self._apply_resolved_hostnames,
+            lambda: getattr(self.config, 'HOSTNAME_REFRESH_INTERVAL_SECONDS', 15),
+            name='hostname-refresh'
+        )
         self.is_running = False
-        self.monitor_thread = None
+        self.scheduler = ScanScheduler(
+            self._scheduled_scan,
+            lambda: self.config.SCAN_INTERVAL_SECONDS,
+            adaptive=getattr(self.config, 'ADAPTIVE_SCAN_INTERVAL', False),
+            min_interval=getattr(self.config, 'SCAN_INTERVAL_MIN_SECONDS', 10),
+            max_interval=getattr(self.config, 'SCAN_INTERVAL_MAX_SECONDS', 300),
+            max_duty_cycle=getattr(self.config, 'SCAN_MAX_DUTY_CYCLE', 0.5)
+        )
+        # Traps and syslog from the switches trigger targeted evaluations between scans
+        self.notifications = NotificationQueue(
+            self.evaluate_notifications,
+            workers=getattr(self.config, 'NOTIFICATION_WORKERS', 4),
+            link_up_delay=getattr(self.config, 'LINK_UP_EVALUATION_DELAY_SECONDS', 5),
+            max_batch=getattr(self.config, 'NOTIFICATION_BATCH_SIZE', 100)
+        )
+        self.notification_listener = NotificationListener(
+            self.notifications.submit,
+            address=getattr(self.config, 'NOTIFICATION_LISTEN_ADDRESS', '0.0.0.0'),
+            trap_port=getattr(self.config, 'SNMP_TRAP_PORT', 162),
+            syslog_port=getattr(self.config, 'SYSLOG_PORT', 514),
+            allowed_sources=lambda: {switch_info['host'] for switch_info in self.get_switch_inventory()},
+            trap_community=getattr(self.config, 'SNMP_TRAP_COMMUNITY', '')
+        )
+        # mac -> when it was first alerted on, shared by scans and notifications
+        self._new_rogue_claims = {}
+        self._claims_lock = threading.Lock()
+        # Optional Socket.IO-style emitter: emit_callback(event_name, payload)
+        self.emit_callback = None
+        # mac -> ((switch, port, vlan, ip, is_authorized), device_info) from the previous scan
+        self._scan_snapshot = {}
+        # mac -> {'ip_address', 'hostname'} resolved in the background, merged
+        # into the snapshot by the next scan (the snapshot is the scan thread's)
+        self._resolved_hostnames = {}
+        self._resolved_hostnames_lock = threading.Lock()
+        self._scans_since_full_sync = 0
         self.latest_scan_results = {
             'timestamp': None,
             'total_devices': 0,
@@ -39,222 +153,1021 @@ class RogueDeviceDetector:
             'authorized': 0,
             'rogues': 0,
             'new_rogues': 0,
+            'remediation_queued': 0,
             'devices': [],
             'success': False,
             'error': None
         }
         
         try:
-            # Connect to switch
-            with SwitchConnector(
-                host=self.config.SWITCH_IP,
-                username=self.config.SWITCH_USERNAME,
-                password=self.config.SWITCH_PASSWORD,
-                device_type=self.config.SWITCH_DEVICE_TYPE
-            ) as switch:
+            # One deadline for every switch call this scan makes; switches
+            # still busy at the deadline are abandoned and reported
+            deadline = time.monotonic() + getattr(self.config, 'FLEET_SCAN_TIMEOUT_SECONDS', 60)
+            
+            # Collect MAC tables from every switch in the inventory concurrently
+            inventory = {switch_info['host']: switch_info for switch_info in self.get_switch_inventory()}
+            self.infrastructure.retain_switches(inventory)
+            switch_results = self.collect_fleet_tables(list(inventory.values()), deadline=deadline)
+            results['switches'] = [
+                {key: value for key, value in result.items() if key != 'mac_table'}
+                for result in switch_results
+            ]
+            results['abandoned_switches'] = [result['host'] for result in switch_results if result.get('abandoned')]
+            
+            failed_hosts = {result['host'] for result in switch_results if not result['success']}
+            if len(failed_hosts) == len(switch_results):
+                raise ConnectionError('No switch could be scanned: ' + '; '.join(
+                    f"{result['host']}: {result['error']}" for result in switch_results))
+            
+            # Merge in inventory order, so a MAC seen on several switches is
+            # always attributed to the same one
+            mac_table = [entry for result in switch_results for entry in result['mac_table']]
+            
+            # ARP bindings are pulled by the ARP refresh scheduler; without the
+            # monitoring loop running, pull the ones that are due now
+            if not self.arp_scheduler.is_running() and time.monotonic() < deadline:
+                self._refresh_arp_bindings(deadline)
+            ip_for = self.enrichment.ip_for
+            
+            # Prefetch authorization and device state once per scan so
+            # every decision below is an in-memory lookup
+            authorized_macs = self.db.get_authorized_mac_set()
+            known_devices = self.db.get_device_scan_state()
+            
+            # Periodically rewrite every row so last_seen stays fresh and
+            # any drift between the snapshot and the DB is repaired
+            self._scans_since_full_sync += 1
+            full_sync = self._scans_since_full_sync >= getattr(self.config, 'FULL_SYNC_EVERY_N_SCANS', 20)
+            if full_sync:
+                self._scans_since_full_sync = 0
+            
+            self._merge_resolved_hostnames()
+            
+            # Diff against the previous scan: unchanged entries cost one
+            # signature comparison and generate no writes or events
+            delta = {
+                'added': [],
+                'removed': [],
+                'moved': [],
+                'vlan_changed': [],
+                'ip_changed': [],
+                'unchanged': 0,
+                'full_sync': full_sync
+            }
+            snapshot = {}
+            changed = []
+            unchanged = []
+            for entry in mac_table:
+                mac = entry['mac_address']
                 
-                # Get MAC address table
-                mac_table = switch.get_mac_address_table()
+                # Skip switch's own MAC and broadcast
+                if mac == 'FF:FF:FF:FF:FF:FF' or not mac:
+                    continue
                 
-                # Get ARP table for IP addresses
-                arp_table = switch.get_arp_table()
+                # A MAC learned on several VLANs is only processed once per scan
+                if mac in snapshot:
+                    continue
                 
-                # Create IP lookup dictionary
-                ip_lookup = {entry['mac_address']: entry['ip_address'] 
-                            for entry in arp_table}
+                # Check if authorized
+                is_authorized = mac in authorized_macs
                 
-                # Process each device
-                for entry in mac_table:
-                    mac = entry['mac_address']
-                    
-                    # Skip switch's own MAC and broadcast
-                    if mac == 'FF:FF:FF:FF:FF:FF' or not mac:
-                        continue
-                    
-                    # Check if authorized
-                    is_authorized = self.db.is_device_authorized(mac)
-                    is_rogue = not is_authorized
-                    
-                    # Get IP from ARP table
-                    ip_address = ip_lookup.get(mac, 'Unknown')
-                    
-                    # CRITICAL: Check if device exists BEFORE adding to database
-                    # This must be done BEFORE add_or_update_device() call
-                    existing_device_check = self.db.get_device_by_mac(mac)
-                    device_existed_before = existing_device_check is not None
-                    
-                    # Prepare device info
-                    device_info = {
-                        'mac_address': mac,
-                        'ip_address': ip_address,
-                        'hostname': self._resolve_hostname(ip_address),
-                        'vendor': self._get_vendor_from_mac(mac),
-                        'switch_port': entry['port'],
-                        'vlan': entry.get('vlan', 1),
-                        'is_authorized': 1 if is_authorized else 0,
-                        'is_rogue': 1 if is_rogue else 0
-                    }
-                    
-                    # Add/update in database
-                    self.db.add_or_update_device(device_info)
-                    
-                    results['devices'].append(device_info)
-                    results['total_devices'] += 1
-                    
-                    if is_authorized:
-                        results['authorized'] += 1
-                    else:
-                        results['rogues'] += 1
-                        
-                        # Device is NEW rogue if it didn't exist before AND is not authorized
-                        # We checked device_existed_before BEFORE adding to database
-                        is_new_rogue = not device_existed_before and is_rogue
-                        
-                        if is_new_rogue:
-                            results['new_rogues'] += 1
-                            
-                            # Determine action taken
-                            action_taken = 'Pending'
-                            
-                            # Log rogue detection event
-                            self.db.log_event({
-                                'event_type': 'ROGUE_DETECTED',
-                                'severity': 'CRITICAL',
-                                'mac_address': mac,
-                                'ip_address': ip_address,
-                                'switch_port': entry['port'],
-                                'description': f"Rogue device detected: {mac} on port {entry['port']}",
-                                'action_taken': action_taken
-                            })
-                            
-                            # Auto-quarantine rogue devices to separate VLAN
-                            if self.config.ENABLE_VLAN_QUARANTINE and self.config.AUTO_QUARANTINE_ROGUES:
-                                try:
-                                    # Move to quarantine VLAN
-                                    success = switch.quarantine_port_vlan(entry['port'], self.config.QUARANTINE_VLAN)
-                                    
-                                    if success:
-                                        action_taken = f'Auto-quarantined to VLAN {self.config.QUARANTINE_VLAN}'
-                                        
-                                        # Update database
-                                        self.db.quarantine_device(mac, self.config.QUARANTINE_VLAN, 'Auto-quarantine: Unauthorized device')
-                                        self.db.update_port_status(
-                                            entry['port'], 
-                                            'auto-quarantine', 
-                                            f'Rogue device auto-moved to VLAN {self.config.QUARANTINE_VLAN}',
-                                            'system'
-                                        )
-                                        
-                                        self.db.log_event({
-                                            'event_type': 'AUTO_QUARANTINE',
-                                            'severity': 'HIGH',
-                                            'mac_address': mac,
-                                            'ip_address': ip_address,
-                                            'switch_port': entry['port'],
-                                            'description': f'Rogue device auto-quarantined to VLAN {self.config.QUARANTINE_VLAN}',
-                                            'action_taken': action_taken
-                                        })
-                                        
-                                        print(f"✅ Auto-quarantined rogue device {mac} to VLAN {self.config.QUARANTINE_VLAN}")
-                                        
-                                        # Send quarantine email notification
-                                        self.email_notifier.send_quarantine_alert(device_info, self.config.QUARANTINE_VLAN)
-                                        
-                                except Exception as e:
-                                    print(f"⚠️ Failed to auto-quarantine {mac}: {e}")
-                            
-                            # Fallback: Auto-isolate via port shutdown if configured
-                            elif self.config.AUTO_ISOLATE_ROGUES and not self.config.ENABLE_VLAN_QUARANTINE:
-                                action_taken = 'Port shutdown initiated'
-                                self.isolate_device(mac, entry['port'], switch)
-                            
-                            # Send email notification for new rogue device
-                            self.email_notifier.send_rogue_device_alert(device_info, action_taken)
-                        
-                        else:
-                            # Existing rogue device - already notified, no need to spam
-                            # Only log if status changed (e.g., moved ports or came back from quarantine)
-                            if existing_device_check and existing_device_check.get('switch_port') != entry['port']:
-                                self.db.log_event({
-                                    'event_type': 'ROGUE_PORT_CHANGED',
-                                    'severity': 'HIGH',
-                                    'mac_address': mac,
-                                    'ip_address': ip_address,
-                                    'switch_port': entry['port'],
-                                    'description': f"Rogue device {mac} moved from port {existing_device_check.get('switch_port')} to {entry['port']}",
-                                    'action_taken': 'Port change detected'
-                                })
-                                # Send notification about port change
-                                self.email_notifier.send_rogue_device_alert(device_info, 'Port changed - requires attention')
-                            
-                            # Just update last_seen timestamp, don't spam notifications
-                            print(f"ℹ️ Existing rogue device {mac} still present on port {entry['port']} - awaiting admin action")
+                # Get IP from the cached ARP bindings
+                ip_address = ip_for(mac)
                 
-                results['success'] = True
+                switch_host = entry['switch']
+                port = entry['port']
+                vlan = entry.get('vlan', 1)
+                signature = (switch_host, port, vlan, ip_address, is_authorized)
                 
-                # Always use DB statistics for accurate counts (scan may miss devices)
-                db_stats = self.db.get_statistics()
-                results['statistics'] = db_stats
-                # Map database field names to scan result field names
-                results['total_devices'] = db_stats.get('active_devices', 0)  # Active devices on network
-                results['authorized'] = db_stats.get('authorized_devices', 0)
-                results['rogues'] = db_stats.get('active_rogues', 0)  # Active rogues (not quarantined)
-
-                self.latest_scan_results = results
+                previous = self._scan_snapshot.get(mac)
                 
-                print(f"Scan complete: {results['total_devices']} devices found, "
-                      f"{results['authorized']} authorized, {results['rogues']} rogues")
+                # Hostnames come from the resolver cache, so they are re-resolved
+                # once their TTL runs out; a miss is looked up in the background
+                # and applied later (keeping the device's name for this IP
+                # meanwhile), so DNS never delays detection
+                current_hostname = previous[1]['hostname'] if previous and previous[0][3] == ip_address else None
+                hostname = self.enrichment.hostname_for(mac, ip_address, current_hostname)
                 
+                if (previous and previous[0] == signature and mac in known_devices
+                        and previous[1]['hostname'] == hostname):
+                    snapshot[mac] = previous
+                    unchanged.append(previous[1])
+                    continue
+                
+                device_info = self._device_info(entry, ip_address, hostname, is_authorized)
+                snapshot[mac] = (signature, device_info)
+                
+                # CRITICAL: Device state was prefetched BEFORE adding to database,
+                # so new vs. existing is decided against the pre-scan state
+                existing_device_check = known_devices.get(mac)
+                changed.append((entry, device_info, existing_device_check))
+                
+                if previous is None:
+                    delta['added'].append(mac)
+                    continue
+                previous_switch, previous_port, previous_vlan, previous_ip, _ = previous[0]
+                if (previous_switch, previous_port) != (switch_host, port):
+                    delta['moved'].append({'mac_address': mac, 'from': previous_port, 'to': port,
+                                           'from_switch': previous_switch, 'to_switch': switch_host})
+                if previous_vlan != vlan:
+                    delta['vlan_changed'].append({'mac_address': mac, 'from': previous_vlan, 'to': vlan})
+                if previous_ip != ip_address:
+                    delta['ip_changed'].append({'mac_address': mac, 'from': previous_ip, 'to': ip_address})
+            
+            # Devices behind a switch that failed this scan are carried
+            # over rather than reported as removed
+            for mac, previous in self._scan_snapshot.items():
+                if mac in snapshot:
+                    continue
+                if previous[0][0] in failed_hosts:
+                    snapshot[mac] = previous
+                else:
+                    delta['removed'].append(mac)
+            delta['unchanged'] = len(unchanged)
+            
+            # New devices without an ARP binding: pull their switches' ARP tables early
+            unbound = {snapshot[mac][1]['switch_ip'] for mac in delta['added']
+                       if snapshot[mac][1]['ip_address'] == 'Unknown'}
+            if unbound and self.enrichment.request_arp(unbound):
+                self.arp_scheduler.trigger()
+            
+            # Add/update only what changed, in a single transaction. This
+            # must happen before quarantine below, which updates existing rows.
+            to_write = [device_info for _, device_info, _ in changed]
+            if full_sync:
+                to_write.extend(unchanged)
+            self.db.bulk_upsert_devices(to_write)
+            
+            for device_info in unchanged:
+                results['devices'].append(device_info)
+                results['total_devices'] += 1
+                if device_info['is_authorized']:
+                    results['authorized'] += 1
+                else:
+                    results['rogues'] += 1
+            
+            # Process changed devices
+            for entry, device_info, existing_device_check in changed:
+                results['devices'].append(device_info)
+                results['total_devices'] += 1
+                
+                if device_info['is_authorized']:
+                    results['authorized'] += 1
+                else:
+                    results['rogues'] += 1
+                    self._process_rogue(entry, device_info, existing_device_check, results)
+            
+            self._prune_new_rogue_claims()
+            self._scan_snapshot = snapshot
+            results['delta'] = delta
+            results['success'] = True
+            
+            if self._has_changes(delta):
+                self._emit('scan_delta', {'timestamp': results['timestamp'], 'delta': delta})
+            
+            # Always use DB statistics for accurate counts (scan may miss devices)
+            db_stats = self.db.get_statistics()
+            results['statistics'] = db_stats
+            # Map database field names to scan result field names
+            results['total_devices'] = db_stats.get('active_devices', 0)  # Active devices on network
+            results['authorized'] = db_stats.get('authorized_devices', 0)
+            results['rogues'] = db_stats.get('active_rogues', 0)  # Active rogues (not quarantined)
+
+            self.latest_scan_results = results
+            
+            print(f"Scan complete: {results['total_devices']} devices found, "
+                  f"{results['authorized']} authorized, {results['rogues']} rogues")
+            
         except Exception as e:
             results['error'] = str(e)
             print(f"Scan error: {e}")
         
         return results
     
-    def isolate_device(self, mac_address: str, port: str, switch: SwitchConnector = None) -> bool:
-        """Isolate a rogue device by shutting down its port"""
-        try:
-            print(f"Isolating rogue device {mac_address} on port {port}")
+    def _device_info(self, entry: Dict, ip_address: str, hostname: str, is_authorized: bool) -> Dict:
+        """Device row for a MAC table entry"""
+        mac = entry['mac_address']
+        return {
+            'mac_address': mac,
+            'ip_address': ip_address,
+            'hostname': hostname,
+            'vendor': self._get_vendor_from_mac(mac),
+            'switch_port': entry['port'],
+            'switch_ip': entry['switch'],
+            'vlan': entry.get('vlan', 1),
+            'is_authorized': 1 if is_authorized else 0,
+            'is_rogue': 0 if is_authorized else 1
+        }
+    
+    def _claim_new_rogue(self, mac_address: str) -> bool:
+        """Claim the first alert for a new rogue
+        
+        Scans and notification workers can find the same new device at the
+        same time; only the first to claim it alerts and remediates.
+        """
+        with self._claims_lock:
+            if mac_address in self._new_rogue_claims:
+                return False
+            self._new_rogue_claims[mac_address] = time.monotonic()
+            return True
+    
+    def _prune_new_rogue_claims(self, max_age: float = 600):
+        """Forget claims old enough for the device to be in every later scan's prefetch"""
+        cutoff = time.monotonic() - max_age
+        with self._claims_lock:
+            for mac_address in [mac for mac, claimed in self._new_rogue_claims.items() if claimed < cutoff]:
+                del self._new_rogue_claims[mac_address]
+    
+    def _process_rogue(self, entry: Dict, device_info: Dict, existing_device_check: Optional[Dict], results: Dict,
+                       event_log: Optional[List[Dict]] = None):
+        """Alert on and remediate a rogue device, or log its port change if already known
+        
+        Args:
+            entry: MAC table entry (with 'switch')
+            device_info: The device row, already written
+            existing_device_check: The device's state before it was written (None if new)
+            results: Counters to update ('new_rogues', 'remediation_queued')
+            event_log: Collect events here for one bulk_log_events() (None = log each now)
+        """
+        log_event = self.db.log_event if event_log is None else event_log.append
+        mac = device_info['mac_address']
+        ip_address = device_info['ip_address']
+        
+        # Device is NEW rogue if it didn't exist before AND is not authorized
+        # We checked existing_device_check BEFORE adding to database
+        is_new_rogue = existing_device_check is None and self._claim_new_rogue(mac)
+        
+        if is_new_rogue:
+            results['new_rogues'] += 1
             
-            # Use provided switch connection or create new one
-            should_disconnect = False
-            if not switch:
-                switch = SwitchConnector(
-                    host=self.config.SWITCH_IP,
-                    username=self.config.SWITCH_USERNAME,
-                    password=self.config.SWITCH_PASSWORD
-                )
-                switch.connect()
-                should_disconnect = True
+            # Determine action taken
+            action_taken = 'Pending'
             
-            # Shutdown the port
-            success = switch.shutdown_port(port)
+            # Log rogue detection event
+            log_event({
+                'event_type': 'ROGUE_DETECTED',
+                'severity': 'CRITICAL',
+                'mac_address': mac,
+                'ip_address': ip_address,
+                'switch_port': entry['port'],
+                'description': f"Rogue device detected: {mac} on port {entry['port']}",
+                'action_taken': action_taken
+            })
             
-            if success:
-                # Log the action
-                self.db.log_event({
-                    'event_type': 'PORT_SHUTDOWN',
+            # Auto-quarantine rogue devices to separate VLAN (executed by the remediation worker)
+            if self.config.ENABLE_VLAN_QUARANTINE and self.config.AUTO_QUARANTINE_ROGUES:
+                if self.remediation.enqueue('quarantine', entry['switch'], entry['port'], device_info,
+                                            vlan=self.config.QUARANTINE_VLAN):
+                    action_taken = f'Auto-quarantine to VLAN {self.config.QUARANTINE_VLAN} queued'
+                    results['remediation_queued'] += 1
+            
+            # Fallback: Auto-isolate via port shutdown if configured
+            elif self.config.AUTO_ISOLATE_ROGUES and not self.config.ENABLE_VLAN_QUARANTINE:
+                if self.remediation.enqueue('shutdown', entry['switch'], entry['port'], device_info):
+                    action_taken = 'Port shutdown queued'
+                    results['remediation_queued'] += 1
+            
+            # Send email notification for new rogue device
+            self.email_notifier.send_rogue_device_alert(device_info, action_taken)
+        
+        else:
+            # Existing rogue device - already notified, no need to spam
+            # Only log if status changed (e.g., moved ports or came back from quarantine)
+            if existing_device_check and existing_device_check.get('switch_port') != entry['port']:
+                log_event({
+                    'event_type': 'ROGUE_PORT_CHANGED',
                     'severity': 'HIGH',
-                    'mac_address': mac_address,
-                    'switch_port': port,
-                    'description': f"Automatically shut down port {port} due to rogue device",
-                    'action_taken': 'Port shutdown successful'
+                    'mac_address': mac,
+                    'ip_address': ip_address,
+                    'switch_port': entry['port'],
+                    'description': f"Rogue device {mac} moved from port {existing_device_check.get('switch_port')} to {entry['port']}",
+                    'action_taken': 'Port change detected'
                 })
+                # Send notification about port change
+                self.email_notifier.send_rogue_device_alert(device_info, 'Port changed - requires attention', 'HIGH')
+            
+            # Just update last_seen timestamp, don't spam notifications
+            print(f"ℹ️ Existing rogue device {mac} still present on port {entry['port']} - awaiting admin action")
+    
+    def evaluate_notification(self, event: Dict) -> Optional[Dict]:
+        """Evaluate one switch notification (see evaluate_notifications)"""
+        return self.evaluate_notifications([event])[0]
+    
+    def evaluate_notifications(self, events: List[Dict]) -> List[Optional[Dict]]:
+        """Evaluate the MACs or ports switch notifications are about (runs on a notification worker)
+        
+        Each MAC (or every MAC on the port) is looked up on the reporting
+        switch and goes through the same authorization, alert and
+        quarantine steps as in a scan. Authorized MACs need no lookup. A
+        batch shares one session per switch, one device state query and
+        one write each for devices and events.
+        
+        Returns:
+            One {'entries', 'rogues', 'new_rogues', 'remediation_queued'}
+            per event, or None where its switch could not be asked (e.g. a
+            host outside the inventory)
+        """
+        outcomes = [{'entries': 0, 'rogues': 0, 'new_rogues': 0, 'remediation_queued': 0} for _ in events]
+        authorized_macs = self.db.get_authorized_mac_set()
+        
+        by_switch = {}
+        for index, event in enumerate(events):
+            if not (event.get('mac_address') and event['mac_address'] in authorized_macs):
+                by_switch.setdefault(event['switch'], []).append(index)
+        
+        # (event index, MAC table entry) of every MAC the notifications point at
+        found = []
+        for host, indexes in by_switch.items():
+            switch_found = []
+            try:
+                switch_info = self._switch_info_for_host(host)
+                excluded = self._excluded_ports(switch_info)
+                with self._table_session(switch_info) as switch:
+                    for index in indexes:
+                        event = events[index]
+                        if event.get('port') in excluded:
+                            continue  # An uplink flapping or learning upstream MACs
+                        mac_address = event.get('mac_address')
+                        entries = switch.get_mac_address_entries(mac_address=mac_address,
+                                                                 port=None if mac_address else event['port'])
+                        entries = [entry for entry in entries if entry['port'] not in excluded]
+                        outcomes[index]['entries'] = len(entries)
+                        for entry in entries:
+                            entry['switch'] = switch_info['host']
+                            switch_found.append((index, entry))
+            except Exception as e:
+                print(f"Error evaluating {len(indexes)} notification(s) from {host}: {e}")
+                for index in indexes:
+                    outcomes[index] = None
+                continue
+            found.extend(switch_found)
+        
+        rogues = []
+        seen = set()
+        for index, entry in found:
+            mac = entry['mac_address']
+            if mac in authorized_macs or mac in seen:
+                continue
+            seen.add(mac)
+            outcomes[index]['rogues'] += 1
+            rogues.append((index, entry))
+        
+        # Device state before the write decides new vs. known, as in a scan
+        known_devices = self.db.get_device_scan_state(entry['mac_address'] for _, entry in rogues) if rogues else {}
+        changed = []
+        unbound = set()
+        for index, entry in rogues:
+            mac = entry['mac_address']
+            existing_device_check = known_devices.get(mac)
+            if (existing_device_check and existing_device_check.get('switch_ip') == entry['switch']
+                    and existing_device_check.get('switch_port') == entry['port']):
+                continue  # A known rogue where the last scan saw it
+            
+            ip_address = self.enrichment.ip_for(mac)
+            device_info = self._device_info(entry, ip_address, self.enrichment.hostname_for(mac, ip_address), False)
+            changed.append((index, entry, device_info, existing_device_check))
+            if existing_device_check is None and ip_address == 'Unknown':
+                unbound.add(entry['switch'])
+        
+        self.db.bulk_upsert_devices([device_info for _, _, device_info, _ in changed])
+        event_log = []
+        for index, entry, device_info, existing_device_check in changed:
+            self._process_rogue(entry, device_info, existing_device_check, outcomes[index], event_log)
+        self.db.bulk_log_events(event_log)
+        
+        if unbound and self.enrichment.request_arp(unbound):
+            self.arp_scheduler.trigger()
+        for event, outcome in zip(events, outcomes):
+            if outcome and outcome['new_rogues']:
+                self._emit('notification_rogue', {
+                    'timestamp': datetime.now().isoformat(),
+                    'event': event['kind'],
+                    'switch': event['switch'],
+                    'port': event.get('port'),
+                    'mac_address': event.get('mac_address'),
+                    'new_rogues': outcome['new_rogues']
+                })
+        return outcomes
+    
+    def get_switch_inventory(self) -> List[Dict]:
+        """Get the switches to scan
+        
+        Uses Config.SWITCHES (a list of dicts with at least 'host') when set;
+        missing credentials and collector settings fall back to the SWITCH_*
+        and SNMP_* settings. Without an inventory the single SWITCH_IP is
+        scanned.
+        """
+        defaults = {
+            'username': self.config.SWITCH_USERNAME,
+            'password': self.config.SWITCH_PASSWORD,
+            'device_type': self.config.SWITCH_DEVICE_TYPE,
+            'secret': getattr(self.config, 'SWITCH_ENABLE_PASSWORD', ''),
+            'ssh_port': getattr(self.config, 'SWITCH_SSH_PORT', 22),
+            'collector': getattr(self.config, 'SWITCH_COLLECTOR', 'ssh'),
+            'snmp_community': getattr(self.config, 'SNMP_COMMUNITY', 'public'),
+            'snmp_port': getattr(self.config, 'SNMP_PORT', 161)
+        }
+        
+        switches = getattr(self.config, 'SWITCHES', None) or [{'host': self.config.SWITCH_IP}]
+        inventory = []
+        for switch_info in switches:
+            host = switch_info.get('host') or switch_info.get('ip')
+            if not host:
+                continue
+            entry = dict(defaults, **{key: value for key, value in switch_info.items() if value not in (None, '')})
+            entry['host'] = host
+            entry.setdefault('name', host)
+            inventory.append(entry)
+        return inventory
+    
+    def _new_switch_connector(self, switch_info: Dict) -> SwitchConnector:
+        """Create a (not yet connected) SwitchConnector for an inventory entry"""
+        switch = SwitchConnector(
+            host=switch_info['host'],
+            username=switch_info['username'],
+            password=switch_info['password'],
+            device_type=switch_info['device_type'],
+            port=switch_info.get('ssh_port', 22),
+            secret=switch_info.get('secret', ''),
+            transport=self.switch_transport,
+            connect_timeout=getattr(self.config, 'SWITCH_CONNECT_TIMEOUT_SECONDS', 10)
+        )
+        if getattr(self.config, 'COALESCE_CONFIG_SAVES', True):
+            switch.mark_dirty = self.config_saver.mark_dirty
+        return switch
+    
+    def _new_async_switch_connector(self, switch_info: Dict) -> AsyncSwitchConnector:
+        """Create a (not yet connected) AsyncSwitchConnector for an inventory entry"""
+        return AsyncSwitchConnector(
+            host=switch_info['host'],
+            username=switch_info['username'],
+            password=switch_info['password'],
+            device_type=switch_info['device_type'],
+            port=switch_info.get('ssh_port', 22),
+            secret=switch_info.get('secret', ''),
+            connect_timeout=getattr(self.config, 'SWITCH_CONNECT_TIMEOUT_SECONDS', 10),
+            command_timeout=getattr(self.config, 'SWITCH_COMMAND_TIMEOUT_SECONDS', 60)
+        )
+    
+    def _table_session(self, switch_info: Dict):
+        """Context manager for reading a switch's tables: SNMP when its collector is 'snmp', else a pooled SSH session"""
+        if switch_info.get('collector') == 'snmp':
+            return SnmpCollector(
+                host=switch_info['host'],
+                community=switch_info['snmp_community'],
+                port=switch_info['snmp_port'],
+                timeout=getattr(self.config, 'SNMP_TIMEOUT_SECONDS', 2),
+                retries=getattr(self.config, 'SNMP_RETRIES', 2),
+                max_repetitions=getattr(self.config, 'SNMP_MAX_REPETITIONS', 25)
+            )
+        return self.switch_pool.session(switch_info['host'])
+    
+    def _save_switch_config(self, host: str) -> bool:
+        """Write memory on one switch (called by the config save coalescer)"""
+        with self.switch_session(host) as switch:
+            return switch.save_config()
+    
+    def save_switch_configs(self, host: str = None) -> bool:
+        """Save unsaved config changes now (one switch, or all of them)"""
+        return self.config_saver.flush(host)
+    
+    def get_config_save_status(self) -> Dict:
+        """Get which switches have unsaved config changes"""
+        return self.config_saver.get_stats()
+    
+    def _switch_info_for_host(self, host: Optional[str]) -> Dict:
+        """Get the inventory entry for a switch host
+        
+        None means the first switch (devices recorded before switch_ip was
+        stored, API calls that name no switch).
+        
+        Raises:
+            ValueError: host is not in the inventory - a typo, a removed
+                switch or a forged notification must never reach another switch
+        """
+        inventory = self.get_switch_inventory()
+        if host is None:
+            return inventory[0]
+        for switch_info in inventory:
+            if switch_info['host'] == host:
+                return switch_info
+        raise ValueError(f"Unknown switch {host}")
+    
+    def switch_host(self, host: Optional[str]) -> str:
+        """The inventory host of a switch (None = the first switch)
+        
+        Raises:
+            ValueError: host is not in the inventory
+        """
+        return self._switch_info_for_host(host)['host']
+    
+    def is_known_switch(self, host: Optional[str]) -> bool:
+        """Whether switch_session(host) would find the switch (None = the first switch)"""
+        return host is None or any(switch_info['host'] == host for switch_info in self.get_switch_inventory())
+    
+    def _switch_info_for_device(self, mac_address: str) -> Dict:
+        """Get the inventory entry for the switch a device was last seen on
+        
+        Raises:
+            ValueError: The device was seen on a switch no longer in the inventory
+        """
+        device = self.db.get_device_by_mac(mac_address)
+        return self._switch_info_for_host(device.get('switch_ip') if device else None)
+    
+    def switch_session(self, host: str = None):
+        """Borrow a pooled session to a switch (None = the first switch)
+        
+        Raises:
+            ValueError: host is not in the inventory
+        
+        Usage:
+            with detector.switch_session(device.get('switch_ip')) as switch:
+                switch.enable_port(port)
+        """
+        return self.switch_pool.session(self._switch_info_for_host(host)['host'])
+    
+    def warm_up_sessions(self):
+        """Open a pooled session to every switch in the background"""
+        self.switch_pool.warm_up([switch_info['host'] for switch_info in self.get_switch_inventory()])
+    
+    def _mac_table_result(self, switch_info: Dict) -> Dict:
+        """Empty result of collecting one switch's MAC table"""
+        return {
+            'host': switch_info['host'],
+            'name': switch_info['name'],
+            'success': False,
+            'error': None,
+            'mac_entries': 0,
+            'fetch': None,  # 'full', 'vlans' or 'cached' (see SwitchTableCache)
+            'infrastructure_entries': 0,  # dropped for being on an uplink or trunk
+            'abandoned': False,
+            'duration_seconds': None,
+            'mac_table': []
+        }
+    
+    def _infrastructure_due(self, switch_info: Dict, switch) -> bool:
+        """Whether to pull a switch's neighbors and trunks in this session (SNMP collectors can't)"""
+        return (getattr(self.config, 'INFRASTRUCTURE_PORT_DISCOVERY', True)
+                and hasattr(switch, 'get_infrastructure_ports')
+                and self.infrastructure.due(switch_info['host']))
+    
+    def _store_infrastructure(self, host: str, ports: Optional[Dict[str, str]]):
+        """Index a switch's discovered uplinks (None = discovery failed, retried next scan)"""
+        if ports is not None and self.infrastructure.update(host, ports):
+            # The cached table was filtered with the old ports
+            self.table_cache.invalidate(host)
+    
+    def _excluded_ports(self, switch_info: Dict) -> FrozenSet[str]:
+        """Ports of a switch whose MAC entries are dropped: discovered uplinks plus its 'uplink_ports'"""
+        return self.infrastructure.ports_for(switch_info['host'], switch_info.get('uplink_ports'))
+    
+    def _plan_mac_fetch(self, host: str, counts: Optional[Dict], switch):
+        """(fetch, changed VLANs) for a switch's MAC table counters (see SwitchTableCache.plan)"""
+        # Without a per-VLAN command the plan is never VLANS, so get_mac_address_table_for_vlans() isn't called
+        per_vlan = counts is not None and bool(switch.platform.mac_table_vlan_command)
+        return self.table_cache.plan(host, counts, per_vlan)
+    
+    def _store_mac_table(self, result: Dict, fetch: str, counts: Optional[Dict], vlans: List, mac_entries,
+                         excluded: FrozenSet[str]) -> List[Dict]:
+        """Tag pulled entries with their switch, drop those on excluded ports and update the table cache
+        
+        Returns:
+            The switch's MAC table (the number dropped goes to result['infrastructure_entries'])
+        """
+        host = result['host']
+        mac_table = []
+        dropped = 0
+        for entry in mac_entries:
+            if entry['port'] in excluded:
+                dropped += 1
+                continue
+            entry['switch'] = host
+            mac_table.append(entry)
+        result['infrastructure_entries'] = dropped
+        self.infrastructure.record_dropped(dropped)
+        
+        if fetch == SwitchTableCache.VLANS:
+            return self.table_cache.store_vlans(host, counts, vlans, mac_table)
+        if counts is not None and mac_table:
+            return self.table_cache.store_full(host, counts, mac_table)
+        self.table_cache.invalidate(host)
+        return mac_table
+    
+    def _collect_switch_tables(self, switch_info: Dict) -> Dict:
+        """Collect the MAC table from one switch, with timing and error"""
+        started = time.monotonic()
+        result = self._mac_table_result(switch_info)
+        
+        # Streaming tags entries while the output is still arriving, without
+        # holding the raw output
+        streaming = getattr(self.config, 'STREAM_SWITCH_OUTPUT', True)
+        change_detection = getattr(self.config, 'MAC_CHANGE_DETECTION', True)
+        host = switch_info['host']
+        
+        try:
+            with self._table_session(switch_info) as switch:
+                if self._infrastructure_due(switch_info, switch):
+                    self._store_infrastructure(host, switch.get_infrastructure_ports(
+                        trunks=getattr(self.config, 'INFRASTRUCTURE_TRUNK_PORTS', True)))
+                excluded = self._excluded_ports(switch_info)
+                
+                # Cheap counters first: the tables are only pulled when they moved
+                counts = switch.get_mac_address_count() if change_detection else None
+                fetch, vlans = self._plan_mac_fetch(host, counts, switch)
+                result['fetch'] = fetch
+                
+                if fetch == SwitchTableCache.CACHED:
+                    result['mac_table'] = self.table_cache.cached_table(host)
+                else:
+                    if fetch == SwitchTableCache.VLANS:
+                        mac_entries = switch.get_mac_address_table_for_vlans([vlan for vlan in vlans if vlan in counts])
+                    else:
+                        mac_entries = switch.iter_mac_address_table() if streaming else switch.get_mac_address_table()
+                    result['mac_table'] = self._store_mac_table(result, fetch, counts, vlans, mac_entries, excluded)
+            result['mac_entries'] = len(result['mac_table'])
+            result['success'] = True
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"Error collecting tables from {switch_info['host']}: {e}")
+        finally:
+            result['duration_seconds'] = round(time.monotonic() - started, 3)
+        
+        return result
+    
+    async def _collect_switch_tables_async(self, switch_info: Dict) -> Dict:
+        """Collect the MAC table from one switch on the async pool's event loop (as _collect_switch_tables)"""
+        started = time.monotonic()
+        result = self._mac_table_result(switch_info)
+        change_detection = getattr(self.config, 'MAC_CHANGE_DETECTION', True)
+        host = switch_info['host']
+        
+        try:
+            async with self.async_switch_pool.session(host) as switch:
+                if self._infrastructure_due(switch_info, switch):
+                    self._store_infrastructure(host, await switch.get_infrastructure_ports(
+                        trunks=getattr(self.config, 'INFRASTRUCTURE_TRUNK_PORTS', True)))
+                excluded = self._excluded_ports(switch_info)
+                
+                counts = await switch.get_mac_address_count() if change_detection else None
+                fetch, vlans = self._plan_mac_fetch(host, counts, switch)
+                result['fetch'] = fetch
                 
-                # Update device status
-                conn = self.db.get_connection()
-                cursor = conn.cursor()
-                cursor.execute(
-                    'UPDATE devices SET status = "isolated" WHERE mac_address = ?',
-                    (mac_address,)
+                if fetch == SwitchTableCache.CACHED:
+                    result['mac_table'] = self.table_cache.cached_table(host)
+                else:
+                    if fetch == SwitchTableCache.VLANS:
+                        mac_entries = await switch.get_mac_address_table_for_vlans([vlan for vlan in vlans if vlan in counts])
+                    else:
+                        mac_entries = [entry async for entry in switch.iter_mac_address_table()]
+                    result['mac_table'] = self._store_mac_table(result, fetch, counts, vlans, mac_entries, excluded)
+            result['mac_entries'] = len(result['mac_table'])
+            result['success'] = True
+        except Exception as e:
+            result['error'] = str(e) or type(e).__name__
+            print(f"Error collecting tables from {host}: {result['error']}")
+        finally:
+            result['duration_seconds'] = round(time.monotonic() - started, 3)
+        
+        return result
+    
+    def _arp_result(self, switch_info: Dict) -> Dict:
+        """Empty result of collecting one switch's ARP table"""
+        return {
+            'host': switch_info['host'],
+            'name': switch_info['name'],
+            'success': False,
+            'error': None,
+            'arp_entries': 0,
+            'abandoned': False,
+            'duration_seconds': None,
+            'ip_lookup': {}  # mac -> ip from this switch's ARP table
+        }
+    
+    def _collect_switch_arp(self, switch_info: Dict) -> Dict:
+        """Collect the ARP table from one switch, with timing and error"""
+        started = time.monotonic()
+        result = self._arp_result(switch_info)
+        streaming = getattr(self.config, 'STREAM_SWITCH_OUTPUT', True)
+        
+        try:
+            with self._table_session(switch_info) as switch:
+                ip_lookup = result['ip_lookup']
+                for entry in switch.iter_arp_table() if streaming else switch.get_arp_table():
+                    ip_lookup[entry['mac_address']] = entry['ip_address']
+            result['arp_entries'] = len(result['ip_lookup'])
+            result['success'] = True
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"Error collecting ARP table from {switch_info['host']}: {e}")
+        finally:
+            result['duration_seconds'] = round(time.monotonic() - started, 3)
+        
+        return result
+    
+    async def _collect_switch_arp_async(self, switch_info: Dict) -> Dict:
+        """Collect the ARP table from one switch on the async pool's event loop (as _collect_switch_arp)"""
+        started = time.monotonic()
+        result = self._arp_result(switch_info)
+        
+        try:
+            async with self.async_switch_pool.session(switch_info['host']) as switch:
+                ip_lookup = result['ip_lookup']
+                async for entry in switch.iter_arp_table():
+                    ip_lookup[entry['mac_address']] = entry['ip_address']
+            result['arp_entries'] = len(result['ip_lookup'])
+            result['success'] = True
+        except Exception as e:
+            result['error'] = str(e) or type(e).__name__
+            print(f"Error collecting ARP table from {switch_info['host']}: {result['error']}")
+        finally:
+            result['duration_seconds'] = round(time.monotonic() - started, 3)
+        
+        return result
+    
+    def _refresh_arp_bindings(self, deadline: float = None) -> bool:
+        """Pull the ARP tables that are due (run by the ARP refresh scheduler)
+        
+        Args:
+            deadline: time.monotonic() by which to give up on slow switches
+                (default: FLEET_SCAN_TIMEOUT_SECONDS from now)
+        
+        Returns:
+            True if any binding changed
+        """
+        inventory = self.get_switch_inventory()
+        self.enrichment.retain_switches(switch_info['host'] for switch_info in inventory)
+        due = set(self.enrichment.arp_due(switch_info['host'] for switch_info in inventory))
+        if not due:
+            return False
+        
+        started = time.monotonic()
+        switch_results = self.collect_fleet_tables(
+            [switch_info for switch_info in inventory if switch_info['host'] in due],
+            collect=self._collect_switch_arp,
+            collect_async=self._collect_switch_arp_async,
+            deadline=deadline
+        )
+        before = self.enrichment.get_stats()['arp_bindings']
+        self.enrichment.update_arp(
+            {result['host']: result['ip_lookup'] for result in switch_results if result['success']},
+            fetched_at=started
+        )
+        return self.enrichment.get_stats()['arp_bindings'] != before
+    
+    def _apply_resolved_hostnames(self) -> bool:
+        """Write hostnames found by background lookups (run by the hostname refresh scheduler)
+        
+        Returns:
+            True if any hostname was applied
+        """
+        resolved = self.enrichment.take_resolved()
+        if not resolved:
+            return False
+        
+        with self._resolved_hostnames_lock:
+            self._resolved_hostnames.update(resolved)
+        self.db.update_device_hostnames(resolved)
+        return True
+    
+    def _merge_resolved_hostnames(self):
+        """Copy hostnames applied in the background into the scan snapshot (scan thread)
+        
+        Entries are replaced, not edited: their device dicts were also
+        handed out in earlier scan results.
+        """
+        with self._resolved_hostnames_lock:
+            resolved, self._resolved_hostnames = self._resolved_hostnames, {}
+        
+        for mac, lookup in resolved.items():
+            previous = self._scan_snapshot.get(mac)
+            if previous and previous[1]['ip_address'] == lookup['ip_address']:
+                self._scan_snapshot[mac] = (previous[0], dict(previous[1], hostname=lookup['hostname']))
+    
+    def collect_fleet_tables(self, inventory: List[Dict], collect=None, collect_async=None,
+                             deadline: float = None) -> List[Dict]:
+        """Collect tables from all switches concurrently
+        
+        Switches with collector 'asyncssh' are collected together on the
+        async pool's event loop; the others on a bounded thread pool, at
+        the same time. Results are returned in inventory order. A switch
+        that has not answered by the deadline is abandoned: it is reported
+        as timed out (abandoned=True) and does not hold up the others.
+        Switches whose circuit is open fail at once (see SwitchCircuitBreakers).
+        
+        Args:
+            inventory: Switches to collect from
+            collect: collect(switch_info) -> result dict (default: the MAC table)
+            collect_async: Coroutine counterpart of collect for 'asyncssh' switches
+            deadline: time.monotonic() by which every switch must have answered
+                (default: FLEET_SCAN_TIMEOUT_SECONDS from now)
+        """
+        collect = collect or self._collect_switch_tables
+        collect_async = collect_async or self._collect_switch_tables_async
+        if not inventory:
+            return []
+        
+        started = time.monotonic()
+        if deadline is None:
+            deadline = started + getattr(self.config, 'FLEET_SCAN_TIMEOUT_SECONDS', 60)
+        timeout = max(0, deadline - started)
+        on_loop = [switch_info for switch_info in inventory if switch_info.get('collector') == 'asyncssh']
+        threaded = [switch_info for switch_info in inventory if switch_info.get('collector') != 'asyncssh']
+        results = {}
+        
+        executor = None
+        futures = []
+        if threaded:
+            workers = max(1, min(len(threaded), getattr(self.config, 'FLEET_SCAN_WORKERS', 8)))
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fleet-scan')
+            futures = [executor.submit(collect, switch_info) for switch_info in threaded]
+        try:
+            if on_loop:
+                for switch_info, result in zip(on_loop, self.async_switch_pool.run(
+                        self._collect_fleet_async(on_loop, collect_async, timeout), timeout + 10)):
+                    results[switch_info['host']] = result
+            
+            wait(futures, timeout=max(0, deadline - time.monotonic()))
+            for switch_info, future in zip(threaded, futures):
+                if future.done():
+                    results[switch_info['host']] = future.result()
+                else:
+                    future.cancel()
+                    results[switch_info['host']] = self._timed_out_result(switch_info, timeout)
+            
+            abandoned = [switch_info['host'] for switch_info in inventory if results[switch_info['host']].get('abandoned')]
+            if abandoned:
+                print(f"Abandoned {len(abandoned)} switch(es) still busy at the {timeout:.0f}s deadline: "
+                      + ', '.join(abandoned))
+            return [results[switch_info['host']] for switch_info in inventory]
+        finally:
+            # Don't wait for hung switches; their threads finish on their own
+            if executor:
+                executor.shutdown(wait=False)
+    
+    async def _collect_fleet_async(self, inventory: List[Dict], collect_async, timeout: float) -> List[Dict]:
+        """Run collect_async for every switch at once, each within the timeout"""
+        async def collect_one(switch_info: Dict) -> Dict:
+            try:
+                return await asyncio.wait_for(collect_async(switch_info), timeout)
+            except asyncio.TimeoutError:
+                return self._timed_out_result(switch_info, timeout)
+        
+        return await asyncio.gather(*(collect_one(switch_info) for switch_info in inventory))
+    
+    def _timed_out_result(self, switch_info: Dict, timeout: float) -> Dict:
+        """Result for a switch abandoned at the fleet deadline"""
+        return {
+            'host': switch_info['host'],
+            'name': switch_info['name'],
+            'success': False,
+            'error': f'Timed out after {timeout:.1f}s',
+            'abandoned': True,
+            'duration_seconds': round(timeout, 3),
+            'mac_entries': 0,
+            'fetch': None,
+            'infrastructure_entries': 0,
+            'mac_table': [],
+            'arp_entries': 0,
+            'ip_lookup': {}
+        }
+    
+    def reset_scan_snapshot(self):
+        """Forget the previous scan so the next one rewrites every device"""
+        self._scan_snapshot = {}
+        self._scans_since_full_sync = 0
+        self.table_cache.invalidate()
+    
+    def _has_changes(self, delta: Dict) -> bool:
+        """Check whether a scan delta contains any change"""
+        return any(delta[key] for key in ('added', 'removed', 'moved', 'vlan_changed', 'ip_changed'))
+    
+    def _emit(self, event: str, payload: Dict):
+        """Send a real-time update through emit_callback if one is attached"""
+        if not self.emit_callback:
+            return
+        try:
+            self.emit_callback(event, payload)
+        except Exception as e:
+            print(f"Error emitting {event}: {e}")
+    
+    def _execute_remediation(self, batch: List[Dict], switches) -> List[bool]:
+        """Execute a batch of queued remediation actions (runs on the remediation worker)
+        
+        All port changes for one switch are pushed as a single config set,
+        then each action is recorded from its port's outcome.
+        
+        Args:
+            batch: Queued actions with 'action', 'switch', 'port', 'devices' and 'params'
+            switches: SwitchSessionSet shared by the worker's current batch
+        
+        Returns:
+            One success flag per action, in batch order
+        """
+        by_switch = {}
+        for item in batch:
+            by_switch.setdefault(item['switch'], []).append(item)
+        
+        port_results = {}  # (switch, port) -> apply_port_states() result
+        for host, items in by_switch.items():
+            try:
+                switch = switches.get(host)
+                results = switch.apply_port_states([
+                    {'port': item['port'], 'action': item['action'], 'vlan': item['params'].get('vlan')}
+                    for item in items
+                ])
+            except Exception as e:
+                print(f"⚠️ Failed to apply {len(items)} remediation action(s) on {host}: {e}")
+                continue
+            for port, result in results.items():
+                port_results[(host, port)] = result
+        
+        return [
+            self._record_remediation(item, port_results.get((item['switch'], item['port']), {}))
+            for item in batch
+        ]
+    
+    def _record_remediation(self, item: Dict, result: Dict) -> bool:
+        """Log, notify and update the database for one executed action"""
+        port = item['port']
+        macs = [device_info['mac_address'] for device_info in item['devices']]
+        success = bool(result.get('success'))
+        
+        if item['action'] == 'quarantine':
+            vlan = item['params']['vlan']
+            if not success:
+                print(f"⚠️ Failed to auto-quarantine port {port}: {result.get('error')}")
+            else:
+                action_taken = f'Auto-quarantined to VLAN {vlan}'
+                self.db.update_port_status(
+                    item['switch'],
+                    port,
+                    'auto-quarantine',
+                    f'Rogue device auto-moved to VLAN {vlan}',
+                    'system'
                 )
-                conn.commit()
-                conn.close()
                 
-                print(f"Successfully isolated device {mac_address}")
+                for device_info in item['devices']:
+                    mac = device_info['mac_address']
+                    self.db.quarantine_device(mac, vlan, 'Auto-quarantine: Unauthorized device')
+                    self.db.log_event({
+                        'event_type': 'AUTO_QUARANTINE',
+                        'severity': 'HIGH',
+                        'mac_address': mac,
+                        'ip_address': device_info.get('ip_address'),
+                        'switch_port': port,
+                        'description': f'Rogue device auto-quarantined to VLAN {vlan}',
+                        'action_taken': action_taken
+                    })
+                    
+                    print(f"✅ Auto-quarantined rogue device {mac} to VLAN {vlan}")
+                    
+                    # Send quarantine email notification
+                    self.email_notifier.send_quarantine_alert(device_info, vlan)
+        
+        elif item['action'] == 'shutdown':
+            if not success:
+                print(f"⚠️ Failed to shut down port {port}: {result.get('error')}")
+            else:
+                self._record_isolation(macs[0], port)
+                for mac in macs[1:]:
+                    self._mark_isolated(mac)
+        
+        if not success:
+            for device_info in item['devices']:
+                self.db.log_event({
+                    'event_type': 'REMEDIATION_FAILED',
+                    'severity': 'HIGH',
+                    'mac_address': device_info['mac_address'],
+                    'ip_address': device_info.get('ip_address'),
+                    'switch_port': port,
+                    'description': f"Automatic {item['action']} of port {port} on {item['switch']} failed",
+                    'action_taken': 'None - requires attention'
+                })
+        
+        self._emit('remediation_complete', {
+            'action': item['action'],
+            'switch': item['switch'],
+            'port': port,
+            'mac_addresses': macs,
+            'success': success,
+            'queued_at': item['enqueued_time']
+        })
+        return success
+    
+    def isolate_device(self, mac_address: str, port: str, switch: SwitchConnector = None) -> bool:
+        """Isolate a rogue device by shutting down its port"""
+        try:
+            print(f"Isolating rogue device {mac_address} on port {port}")
             
-            if should_disconnect:
-                switch.disconnect()
+            # Shutdown the port on the provided session or a pooled one
+            if switch:
+                success = switch.shutdown_port(port)
+            else:
+                with self.switch_session(self._switch_info_for_device(mac_address)['host']) as switch:
+                    success = switch.shutdown_port(port)
+            
+            if success:
+                self._record_isolation(mac_address, port)
             
             return success
             
@@ -262,14 +1175,37 @@ class RogueDeviceDetector:
             print(f"Error isolating device: {e}")
             return False
     
+    def _record_isolation(self, mac_address: str, port: str):
+        """Log a port shutdown for a rogue device and mark it isolated"""
+        self.db.log_event({
+            'event_type': 'PORT_SHUTDOWN',
+            'severity': 'HIGH',
+            'mac_address': mac_address,
+            'switch_port': port,
+            'description': f"Automatically shut down port {port} due to rogue device",
+            'action_taken': 'Port shutdown successful'
+        })
+        
+        # Update device status
+        self._mark_isolated(mac_address)
+        
+        print(f"Successfully isolated device {mac_address}")
+    
+    def _mark_isolated(self, mac_address: str):
+        """Record a device as isolated (its port has been shut down)"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE devices SET status = "isolated" WHERE mac_address = ?',
+            (mac_address,)
+        )
+        conn.commit()
+        conn.close()
+    
     def restore_device(self, mac_address: str, port: str) -> bool:
         """Restore a previously isolated device"""
         try:
-            with SwitchConnector(
-                host=self.config.SWITCH_IP,
-                username=self.config.SWITCH_USERNAME,
-                password=self.config.SWITCH_PASSWORD
-            ) as switch:
+            with self.switch_session(self._switch_info_for_device(mac_address)['host']) as switch:
                 
                 success = switch.enable_port(port)
                 
@@ -299,21 +1235,15 @@ class RogueDeviceDetector:
             return False
     
     def _resolve_hostname(self, ip_address: str) -> str:
-        """Attempt to resolve hostname from IP"""
+        """Attempt to resolve hostname from IP (cached, bounded by lookup timeout)"""
         if ip_address == 'Unknown':
             return 'Unknown'
         
-        try:
-            import socket
-            hostname = socket.gethostbyaddr(ip_address)[0]
-            return hostname
-        except:
-            return 'Unknown'
+        return self.hostname_resolver.resolve(ip_address)
     
     def _get_vendor_from_mac(self, mac_address: str) -> str:
-        """Get vendor from MAC address OUI (first 3 octets)"""
-        # Use enhanced vendor lookup module
-        return VendorLookup.get_vendor(mac_address)
+        """Get vendor from MAC address OUI (first 3 octets), cached per OUI"""
+        return self.enrichment.vendor_for(mac_address)
     
     def start_continuous_monitoring(self):
         """Start continuous monitoring in background"""
@@ -321,28 +1251,86 @@ class RogueDeviceDetector:
             print("Monitoring is already running")
             return
         
+        if not self.scheduler.start():
+            print("Previous monitoring scan is still finishing - try again shortly")
+            return
+        self.arp_scheduler.start()
+        self.hostname_scheduler.start()
+        if getattr(self.config, 'ENABLE_NOTIFICATION_LISTENER', False):
+            self.notification_listener.start()
+        
         self.is_running = True
-        self.monitor_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
-        self.monitor_thread.start()
         print("Continuous monitoring started")
     
     def stop_continuous_monitoring(self):
         """Stop continuous monitoring"""
         self.is_running = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=5)
+        if not self.scheduler.stop(timeout=5):
+            print("Monitoring stopped - the scan in progress will finish in the background")
+        self.arp_scheduler.stop(timeout=5)
+        self.hostname_scheduler.stop(timeout=5)
+        self.notification_listener.stop()
         print("Continuous monitoring stopped")
     
-    def _monitoring_loop(self):
-        """Main monitoring loop"""
-        while self.is_running:
-            try:
-                self.perform_scan()
-            except Exception as e:
-                print(f"Monitoring error: {e}")
-            
-            # Wait for next scan
-            time.sleep(self.config.SCAN_INTERVAL_SECONDS)
+    def request_scan(self) -> bool:
+        """Wake the monitoring loop for an immediate scan
+        
+        Returns:
+            False if continuous monitoring is not running
+        """
+        return self.scheduler.trigger()
+    
+    def _scheduled_scan(self) -> bool:
+        """Scan run by the scheduler; returns True if the network changed"""
+        try:
+            results = self.perform_scan()
+        except Exception as e:
+            print(f"Monitoring error: {e}")
+            return False
+        return self._has_changes(results.get('delta', {}))
+    
+    def shutdown(self, timeout: float = 10):
+        """Stop monitoring, finish queued work and save unsaved switch config"""
+        if self.is_running:
+            self.stop_continuous_monitoring()
+        self.notifications.join(timeout)
+        self.remediation.join(timeout)
+        self.config_saver.flush()
+        self.email_notifier.close(timeout)
+        self.switch_pool.close_all()
+        self.async_switch_pool.close_all()
+    
+    def get_switch_circuit_stats(self) -> Dict:
+        """Get each switch's circuit breaker state"""
+        return self.switch_breakers.get_stats()
+    
+    def reset_switch_circuit(self, host: str = None):
+        """Let calls through to a switch (or every switch) again without waiting for its trial"""
+        self.switch_breakers.reset(host)
+    
+    def get_table_cache_stats(self) -> Dict:
+        """Get how many scans reused, partly pulled or fully pulled MAC tables"""
+        return self.table_cache.get_stats()
+    
+    def get_infrastructure_stats(self) -> Dict:
+        """Get each switch's uplink and trunk ports and the MAC entries they kept out of scans"""
+        return self.infrastructure.get_stats()
+    
+    def get_enrichment_stats(self) -> Dict:
+        """Get ARP binding, hostname and vendor cache state and their refresh schedules"""
+        return dict(
+            self.enrichment.get_stats(),
+            arp_scheduler=self.arp_scheduler.get_stats(),
+            hostname_scheduler=self.hostname_scheduler.get_stats()
+        )
+    
+    def get_notification_stats(self) -> Dict:
+        """Get trap/syslog listener counters and event evaluation latency"""
+        return dict(self.notifications.get_stats(), listener=self.notification_listener.get_stats())
+    
+    def get_scheduler_stats(self) -> Dict:
+        """Get next-run time, lag and missed-tick metrics of the monitoring loop"""
+        return self.scheduler.get_stats()
     
     def get_latest_results(self) -> Dict:
         """Get results from latest scan"""
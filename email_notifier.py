@@ -1,7 +1,11 @@
 """
 Email notification system for rogue device alerts
 """
+import heapq
 import smtplib
+import queue
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
@@ -9,6 +13,321 @@ from typing import Dict, List
 import traceback
 
 
+class EmailDeliveryWorker:
+    """Delivers queued messages in the background over one reused SMTP session
+    
+    The session is opened on the first message, kept open while messages
+    keep arriving and closed after idle_timeout seconds without traffic.
+    Failed sends are retried with exponential backoff, in between the
+    messages queued after them; a session the server dropped is reopened
+    and the message resent immediately.
+    """
+    
+    def __init__(self, notifier, idle_timeout: float = 60, max_retries: int = 3, retry_backoff: float = 2.0):
+        self.notifier = notifier
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        
+        self._queue = queue.Queue()
+        self._retrying = []  # heap of (not_before, sequence, msg, queued_at, attempt)
+        self._retry_sequence = 0
+        self._last_activity = time.monotonic()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._server = None
+        
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.connections = 0
+        self.last_latency = None
+        self._total_latency = 0.0
+    
+    def start(self):
+        """Start the delivery thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='email-delivery', daemon=True)
+            self._thread.start()
+    
+    def submit(self, msg) -> bool:
+        """Queue a message for delivery"""
+        self._queue.put((msg, time.monotonic()))
+        self.start()
+        return True
+    
+    def stop(self, timeout: float = 10) -> bool:
+        """Deliver what is queued, close the session and stop the thread"""
+        with self._lock:
+            thread = self._thread
+        if not thread or not thread.is_alive():
+            return True
+        self._queue.put(None)
+        thread.join(timeout)
+        return not thread.is_alive()
+    
+    def _run(self):
+        """Delivery loop"""
+        while True:
+            self._deliver_due_retries()
+            timeout = self.idle_timeout
+            if self._retrying:
+                timeout = min(timeout, max(0.0, self._retrying[0][0] - time.monotonic()))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                if time.monotonic() - self._last_activity >= self.idle_timeout:
+                    # Idle: release the session instead of letting the server time it out
+                    self._close_session()
+                continue
+            
+            try:
+                if item is None:
+                    # Stopping: give messages waiting for a retry one last attempt now
+                    self._deliver_due_retries(final=True)
+                    self._close_session()
+                    return
+                msg, queued_at = item
+                self._deliver(msg, queued_at)
+            finally:
+                self._queue.task_done()
+    
+    def _deliver_due_retries(self, final: bool = False):
+        """Resend failed messages whose backoff has elapsed (all of them if final)"""
+        while self._retrying and (final or self._retrying[0][0] <= time.monotonic()):
+            _, _, msg, queued_at, attempt = heapq.heappop(self._retrying)
+            self._deliver(msg, queued_at, attempt, final)
+    
+    def _deliver(self, msg, queued_at: float, attempt: int = 0, final: bool = False) -> bool:
+        """Send one message, reconnecting as needed
+        
+        A failed send is put back with a not-before time instead of sleeping,
+        so the messages queued behind it are not held up by its backoff.
+        """
+        self._last_activity = time.monotonic()
+        while True:
+            reused = self._server is not None
+            try:
+                if self._server is None:
+                    self._server = self.notifier._open_smtp_session()
+                    self.connections += 1
+                
+                self._server.send_message(msg)
+                
+                latency = time.monotonic() - queued_at
+                with self._lock:
+                    self.sent += 1
+                    self.last_latency = latency
+                    self._total_latency += latency
+                print(f"✅ Email alert sent successfully to {msg['To']}")
+                return True
+            
+            except smtplib.SMTPAuthenticationError:
+                print("❌ Email authentication failed - check SMTP username/password")
+                self._close_session()
+                break
+            except smtplib.SMTPServerDisconnected as e:
+                self._close_session()
+                if reused:
+                    # Server dropped an idle session: reconnect and resend right away
+                    continue
+                error = e
+            except (smtplib.SMTPException, OSError) as e:
+                self._close_session()
+                error = e
+            
+            if final or attempt >= self.max_retries:
+                print(f"❌ SMTP error: {error}")
+                break
+            
+            delay = self.retry_backoff * (2 ** attempt)
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+                self._retry_sequence += 1
+                heapq.heappush(self._retrying, (time.monotonic() + delay, self._retry_sequence, msg, queued_at, attempt))
+            print(f"⚠️ SMTP error ({error}), retrying in {delay:.0f}s (attempt {attempt}/{self.max_retries})")
+            return False
+        
+        with self._lock:
+            self.failed += 1
+        return False
+    
+    def _close_session(self):
+        """Close the SMTP session if one is open"""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            try:
+                self._server.close()
+            except Exception:
+                pass
+        self._server = None
+    
+    def get_stats(self) -> Dict:
+        """Get queue depth, outcome counters and send latency"""
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'retry_pending': len(self._retrying),
+                'session_open': self._server is not None,
+                'sent': self.sent,
+                'failed': self.failed,
+                'retries': self.retries,
+                'connections': self.connections,
+                'last_latency_seconds': round(self.last_latency, 3) if self.last_latency is not None else None,
+                'avg_latency_seconds': round(self._total_latency / self.sent, 3) if self.sent else None
+            }
+
+
+class AlertDigest:
+    """Coalesces alerts into one summary email per severity and time window
+    
+    Alerts are buffered per severity and flushed as a single message, grouped
+    by switch and port, when the severity's window has elapsed or the buffer
+    reaches max_batch. Severities listed in immediate_severities still go out
+    at once, except that only the first one per switch/port in a window does;
+    the rest (e.g. every MAC behind a rogue hub) join the digest.
+    """
+    
+    def __init__(self, notifier, window_seconds: float = 300, max_batch: int = 200,
+                 severity_windows: Dict = None, immediate_severities: List[str] = None):
+        self.notifier = notifier
+        self.window_seconds = window_seconds
+        self.max_batch = max(1, max_batch)
+        self.severity_windows = severity_windows or {}
+        self.immediate_severities = set(immediate_severities or [])
+        
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._buffers = {}  # severity -> {'opened': monotonic, 'alerts': [...]}
+        self._immediate_ports = {}  # (switch, port) -> monotonic time of last immediate alert
+        self._thread = None
+        
+        self.immediate_sent = 0
+        self.alerts_coalesced = 0
+        self.digests_sent = 0
+    
+    def add(self, severity: str, device_info: Dict, action_taken: str, kind: str = 'Rogue device detected') -> bool:
+        """Offer an alert to the digest
+        
+        Returns:
+            True if the alert was buffered, False if the caller should send it now
+        """
+        now = time.monotonic()
+        port_key = (device_info.get('switch_ip'), device_info.get('switch_port'))
+        full = None
+        
+        with self._lock:
+            if severity in self.immediate_severities:
+                last = self._immediate_ports.get(port_key)
+                if last is None or now - last >= self._window(severity):
+                    self._immediate_ports[port_key] = now
+                    self.immediate_sent += 1
+                    return False
+            
+            buffer = self._buffers.setdefault(severity, {'opened': now, 'alerts': []})
+            buffer['alerts'].append({
+                'kind': kind,
+                'severity': severity,
+                'device': dict(device_info),
+                'action_taken': action_taken,
+                'time': datetime.now()
+            })
+            self.alerts_coalesced += 1
+            
+            if len(buffer['alerts']) >= self.max_batch:
+                full = self._buffers.pop(severity)
+        
+        if full:
+            self._send_digest(severity, full['alerts'])
+        else:
+            self._start()
+            self._wakeup.set()
+        return True
+    
+    def flush(self, severity: str = None):
+        """Send buffered alerts now (all severities, or just one)"""
+        with self._lock:
+            if severity:
+                buffers = {severity: self._buffers.pop(severity)} if severity in self._buffers else {}
+            else:
+                buffers, self._buffers = self._buffers, {}
+            self._prune_immediate_ports(time.monotonic())
+        
+        for buffered_severity, buffer in buffers.items():
+            self._send_digest(buffered_severity, buffer['alerts'])
+    
+    def _window(self, severity: str) -> float:
+        """Window length for a severity"""
+        return self.severity_windows.get(severity, self.window_seconds)
+    
+    def _prune_immediate_ports(self, now: float):
+        """Forget ports whose last immediate alert is outside every immediate window (lock held)"""
+        window = max((self._window(severity) for severity in self.immediate_severities), default=0)
+        self._immediate_ports = {port_key: last for port_key, last in self._immediate_ports.items()
+                                 if now - last < window}
+    
+    def _start(self):
+        """Start the flush timer thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='email-digest', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        """Flush each severity's buffer when its window expires"""
+        while True:
+            # Clear before reading state so an alert added meanwhile still wakes us
+            self._wakeup.clear()
+            with self._lock:
+                now = time.monotonic()
+                due = [severity for severity, buffer in self._buffers.items()
+                       if now - buffer['opened'] >= self._window(severity)]
+                deadlines = [buffer['opened'] + self._window(severity)
+                             for severity, buffer in self._buffers.items() if severity not in due]
+            
+            for severity in due:
+                self.flush(severity)
+            
+            self._wakeup.wait(max(0.0, min(deadlines) - time.monotonic()) if deadlines else None)
+    
+    def _send_digest(self, severity: str, alerts: List[Dict]):
+        """Send one summary message for a batch of alerts"""
+        if not alerts:
+            return
+        
+        groups = {}
+        for alert in alerts:
+            device = alert['device']
+            key = (device.get('switch_ip') or 'Unknown', device.get('switch_port') or 'Unknown')
+            groups.setdefault(key, []).append(alert)
+        
+        subject = (f"{self.notifier.subject_prefix} Alert Digest: {len(alerts)} {severity} "
+                   f"alert{'s' if len(alerts) != 1 else ''} on {len(groups)} port{'s' if len(groups) != 1 else ''}")
+        text_body = self.notifier._create_digest_text(severity, groups, len(alerts))
+        html_body = self.notifier._create_digest_html(severity, groups, len(alerts))
+        
+        if self.notifier._send_email(subject, text_body, html_body):
+            with self._lock:
+                self.digests_sent += 1
+    
+    def get_stats(self) -> Dict:
+        """Get digest counters"""
+        with self._lock:
+            return {
+                'buffered': {severity: len(buffer['alerts']) for severity, buffer in self._buffers.items()},
+                'immediate_sent': self.immediate_sent,
+                'alerts_coalesced': self.alerts_coalesced,
+                'digests_sent': self.digests_sent
+            }
+
+
 class EmailNotifier:
     """Handles email notifications for security events"""
     
@@ -24,17 +343,44 @@ class EmailNotifier:
         self.email_from = config.EMAIL_FROM or config.SMTP_USERNAME
         self.email_to = config.EMAIL_TO if isinstance(config.EMAIL_TO, list) else [config.EMAIL_TO]
         self.subject_prefix = config.EMAIL_SUBJECT_PREFIX
+        # Without STARTTLS the connection is SMTPS unless SMTP_USE_SSL is explicitly
+        # False (plain SMTP, e.g. a local relay)
+        self.smtp_use_ssl = getattr(config, 'SMTP_USE_SSL', None)
+        if self.smtp_use_ssl is None:
+            self.smtp_use_ssl = not self.smtp_use_tls
+        self.smtp_timeout = getattr(config, 'SMTP_TIMEOUT_SECONDS', 30)
+        
+        # Alerts are handed to a background worker so callers never wait on SMTP
+        self.async_delivery = getattr(config, 'EMAIL_ASYNC_DELIVERY', True)
+        self.delivery = EmailDeliveryWorker(
+            self,
+            idle_timeout=getattr(config, 'SMTP_IDLE_TIMEOUT_SECONDS', 60),
+            max_retries=getattr(config, 'EMAIL_MAX_RETRIES', 3),
+            retry_backoff=getattr(config, 'EMAIL_RETRY_BACKOFF_SECONDS', 2.0)
+        )
+        
+        # Optional digest mode: coalesce alerts per severity and time window
+        self.digest = None
+        if getattr(config, 'EMAIL_DIGEST_ENABLED', False):
+            self.digest = AlertDigest(
+                self,
+                window_seconds=getattr(config, 'EMAIL_DIGEST_WINDOW_SECONDS', 300),
+                max_batch=getattr(config, 'EMAIL_DIGEST_MAX_BATCH', 200),
+                severity_windows=getattr(config, 'EMAIL_DIGEST_SEVERITY_WINDOWS', {}),
+                immediate_severities=getattr(config, 'EMAIL_DIGEST_IMMEDIATE_SEVERITIES', ['CRITICAL'])
+            )
     
-    def send_rogue_device_alert(self, device_info: Dict, action_taken: str = "Pending") -> bool:
+    def send_rogue_device_alert(self, device_info: Dict, action_taken: str = "Pending", severity: str = "CRITICAL") -> bool:
         """
         Send email alert for rogue device detection
         
         Args:
             device_info: Dictionary containing device details (mac, ip, port, etc.)
             action_taken: Action taken against the device
+            severity: Alert severity, used by digest mode
         
         Returns:
-            bool: True if email sent successfully, False otherwise
+            bool: True if email sent (or added to the digest) successfully, False otherwise
         """
         if not self.enabled:
             print("Email alerts disabled - skipping notification")
@@ -44,6 +390,9 @@ class EmailNotifier:
             print("Email configuration incomplete - cannot send alert")
             return False
         
+        if self.digest and self.digest.add(severity, device_info, action_taken, 'Rogue device detected'):
+            return True
+        
         try:
             # Prepare email content
             subject = f"{self.subject_prefix} Rogue Device Detected"
@@ -62,20 +411,24 @@ class EmailNotifier:
             traceback.print_exc()
             return False
     
-    def send_quarantine_alert(self, device_info: Dict, vlan_id: int) -> bool:
+    def send_quarantine_alert(self, device_info: Dict, vlan_id: int, severity: str = "HIGH") -> bool:
         """
         Send email alert when device is quarantined
         
         Args:
             device_info: Dictionary containing device details
             vlan_id: Quarantine VLAN ID
+            severity: Alert severity, used by digest mode
         
         Returns:
-            bool: True if email sent successfully
+            bool: True if email sent (or added to the digest) successfully
         """
         if not self.enabled:
             return False
         
+        if self.digest and self.digest.add(severity, device_info, f'Quarantined to VLAN {vlan_id}', 'Device quarantined'):
+            return True
+        
         try:
             subject = f"{self.subject_prefix} Device Quarantined"
             
@@ -259,7 +612,79 @@ This is an automated alert from the Rogue Device Detection System.
 Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         """
     
-    def _send_email(self, subject: str, text_body: str, html_body: str = None) -> bool:
+    def _create_digest_text(self, severity: str, groups: Dict, total: int) -> str:
+        """Create plain text body for an alert digest (alerts grouped by (switch, port))"""
+        lines = [
+            f"ALERT DIGEST - {severity}",
+            "=" * 40,
+            "",
+            f"{total} alert{'s' if total != 1 else ''} on {len(groups)} port{'s' if len(groups) != 1 else ''}.",
+            ""
+        ]
+        
+        for (switch, port), alerts in sorted(groups.items()):
+            lines.append(f"Switch {switch} - Port {port} ({len(alerts)})")
+            lines.append("-" * 40)
+            for alert in alerts:
+                device = alert['device']
+                lines.append(
+                    f"{alert['time'].strftime('%H:%M:%S')}  {device.get('mac_address', 'Unknown')}  "
+                    f"{device.get('ip_address', 'Unknown')}  VLAN {device.get('vlan', 'Unknown')}  "
+                    f"{device.get('vendor', 'Unknown')}  {alert['kind']}: {alert['action_taken']}"
+                )
+            lines.append("")
+        
+        lines.extend([
+            "---",
+            "This is an automated alert digest from the Rogue Device Detection System.",
+            f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        ])
+        return "\n".join(lines)
+    
+    def _create_digest_html(self, severity: str, groups: Dict, total: int) -> str:
+        """Create HTML body for an alert digest (alerts grouped by (switch, port))"""
+        cell = 'style="padding: 6px; border: 1px solid #ddd;"'
+        header = 'style="padding: 6px; border: 1px solid #ddd; background-color: #f2f2f2;"'
+        
+        sections = []
+        for (switch, port), alerts in sorted(groups.items()):
+            rows = "".join(
+                f"<tr><td {cell}>{alert['time'].strftime('%H:%M:%S')}</td>"
+                f"<td {cell}>{alert['device'].get('mac_address', 'Unknown')}</td>"
+                f"<td {cell}>{alert['device'].get('ip_address', 'Unknown')}</td>"
+                f"<td {cell}>{alert['device'].get('vlan', 'Unknown')}</td>"
+                f"<td {cell}>{alert['device'].get('vendor', 'Unknown')}</td>"
+                f"<td {cell}>{alert['kind']}: {alert['action_taken']}</td></tr>"
+                for alert in alerts
+            )
+            sections.append(f"""
+                <h3>Switch {switch} - Port {port} ({len(alerts)})</h3>
+                <table style="border-collapse: collapse; width: 100%;">
+                    <tr><th {header}>Time</th><th {header}>MAC Address</th><th {header}>IP Address</th>
+                        <th {header}>VLAN</th><th {header}>Vendor</th><th {header}>Alert</th></tr>
+                    {rows}
+                </table>""")
+        
+        return f"""
+        <html>
+        <body style="font-family: Arial, sans-serif;">
+            <div style="background-color: #dc3545; padding: 20px; border-radius: 5px;">
+                <h2 style="color: white; margin: 0;">🚨 Alert Digest - {severity}</h2>
+            </div>
+            <div style="padding: 20px;">
+                <p><strong>{total} alert{'s' if total != 1 else ''} on {len(groups)} port{'s' if len(groups) != 1 else ''}.</strong></p>
+                {''.join(sections)}
+                <hr>
+                <p style="color: #6c757d; font-size: 12px;">
+                    This is an automated alert digest from the Rogue Device Detection System.<br>
+                    Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+                </p>
+            </div>
+        </body>
+        </html>
+        """
+    
+    def _send_email(self, subject: str, text_body: str, html_body: str = None, wait: bool = False) -> bool:
         """
         Send email via SMTP
         
@@ -267,38 +692,23 @@ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             subject: Email subject
             text_body: Plain text email body
             html_body: HTML email body (optional)
+            wait: Send synchronously instead of queueing for the delivery worker
         
         Returns:
-            bool: True if sent successfully
+            bool: True if sent (or queued) successfully
         """
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['From'] = self.email_from
-            msg['To'] = ', '.join(self.email_to)
-            msg['Subject'] = subject
+            msg = self._build_message(subject, text_body, html_body)
             
-            # Attach plain text version
-            msg.attach(MIMEText(text_body, 'plain'))
-            
-            # Attach HTML version if provided
-            if html_body:
-                msg.attach(MIMEText(html_body, 'html'))
-            
-            # Connect to SMTP server and send
-            if self.smtp_use_tls:
-                server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-                server.starttls()
-            else:
-                server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port)
+            if self.async_delivery and not wait:
+                return self.delivery.submit(msg)
             
-            # Login if credentials provided
-            if self.smtp_username and self.smtp_password:
-                server.login(self.smtp_username, self.smtp_password)
-            
-            # Send email
-            server.send_message(msg)
-            server.quit()
+            # Synchronous send on a dedicated connection
+            server = self._open_smtp_session()
+            try:
+                server.send_message(msg)
+            finally:
+                server.quit()
             
             print(f"✅ Email alert sent successfully to {', '.join(self.email_to)}")
             return True
@@ -314,6 +724,52 @@ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             traceback.print_exc()
             return False
     
+    def _build_message(self, subject: str, text_body: str, html_body: str = None) -> MIMEMultipart:
+        """Create the MIME message"""
+        msg = MIMEMultipart('alternative')
+        msg['From'] = self.email_from
+        msg['To'] = ', '.join(self.email_to)
+        msg['Subject'] = subject
+        
+        # Attach plain text version
+        msg.attach(MIMEText(text_body, 'plain'))
+        
+        # Attach HTML version if provided
+        if html_body:
+            msg.attach(MIMEText(html_body, 'html'))
+        
+        return msg
+    
+    def _open_smtp_session(self):
+        """Connect to the SMTP server, start TLS and log in"""
+        if self.smtp_use_tls:
+            server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.smtp_timeout)
+            server.starttls()
+        elif self.smtp_use_ssl:
+            server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port, timeout=self.smtp_timeout)
+        else:
+            server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.smtp_timeout)
+        
+        # Login if credentials provided
+        if self.smtp_username and self.smtp_password:
+            server.login(self.smtp_username, self.smtp_password)
+        
+        return server
+    
+    def get_delivery_stats(self) -> Dict:
+        """Get background delivery (and digest) metrics"""
+        stats = self.delivery.get_stats()
+        stats['async_delivery'] = self.async_delivery
+        if self.digest:
+            stats['digest'] = self.digest.get_stats()
+        return stats
+    
+    def close(self, timeout: float = 10) -> bool:
+        """Send any pending digest, flush queued messages and stop the delivery worker"""
+        if self.digest:
+            self.digest.flush()
+        return self.delivery.stop(timeout)
+    
     def test_connection(self) -> bool:
         """
         Test email configuration by sending a test email
@@ -367,5 +823,6 @@ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         </html>
         """
         
-        return self._send_email(subject, text_body, html_body)
+        # Test emails report the real outcome, so they bypass the queue
+        return self._send_email(subject, text_body, html_body, wait=True)
 
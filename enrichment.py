@@ -0,0 +1,176 @@
+"""
+In-memory enrichment joined to MAC table scans (ARP bindings, hostnames, vendors)
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from hostname_resolver import HostnameResolver
+from vendor_lookup import VendorLookup
+
+
+class DeviceEnrichment:
+    """Caches the slow-changing data the detector joins to every MAC scan
+    
+    The MAC table is polled at the detection interval; everything here is
+    refreshed on its own cadence and looked up from memory by the scan:
+    
+    - ARP bindings (MAC -> IP) per switch, replaced when that switch's ARP
+      table is pulled, either on the ARP interval or on demand when a scan
+      finds new MACs without an IP
+    - Hostnames, resolved in the background by the HostnameResolver; a
+      device is written as 'Unknown' first and its name is applied once the
+      lookup has finished (take_resolved())
+    - Vendors, cached per OUI
+    """
+    
+    def __init__(self, resolver: HostnameResolver, arp_max_age: float = 300):
+        """
+        Args:
+            resolver: Hostname resolver (its cache is the hostname cache)
+            arp_max_age: A switch's ARP table is due again after this many seconds
+        """
+        self.resolver = resolver
+        self.arp_max_age = arp_max_age
+        
+        self._lock = threading.Lock()
+        self._arp = {}  # host -> {mac: ip}
+        self._arp_fetched = {}  # host -> monotonic start of the pull
+        self._ip_by_mac = {}  # merged view of every switch's bindings
+        self._arp_requested = set()
+        self._pending_hostnames = {}  # mac -> ip waiting for a lookup
+        self._vendors = {}  # OUI -> vendor
+        
+        self.arp_refreshes = 0
+        self.arp_on_demand = 0
+        self.hostnames_applied = 0
+    
+    # --- ARP bindings --------------------------------------------------------
+    
+    def update_arp(self, tables: Dict[str, Dict[str, str]], fetched_at: float = None):
+        """Replace the bindings of the switches that were just pulled
+        
+        Args:
+            tables: host -> {mac: ip}, in inventory order
+            fetched_at: time.monotonic() when the pull started
+        """
+        fetched_at = fetched_at if fetched_at is not None else time.monotonic()
+        with self._lock:
+            for host, ip_lookup in tables.items():
+                self._arp[host] = ip_lookup
+                self._arp_fetched[host] = fetched_at
+                self._arp_requested.discard(host)
+            self._merge_arp()
+            self.arp_refreshes += len(tables)
+    
+    def ip_for(self, mac_address: str) -> str:
+        """IP bound to a MAC on any switch ('Unknown' if none)"""
+        return self._ip_by_mac.get(mac_address, HostnameResolver.UNKNOWN)
+    
+    def request_arp(self, hosts: Iterable[str]) -> bool:
+        """Ask for an early ARP pull of some switches
+        
+        Returns:
+            True if any switch was newly requested
+        """
+        with self._lock:
+            new = set(hosts) - self._arp_requested
+            self._arp_requested |= new
+            self.arp_on_demand += len(new)
+            return bool(new)
+    
+    def arp_due(self, hosts: Iterable[str]) -> List[str]:
+        """Switches whose ARP table was never pulled, is older than arp_max_age, or was requested"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                host for host in hosts
+                if host in self._arp_requested or host not in self._arp_fetched
+                # One second of slack for scheduler jitter between two pulls
+                or now - self._arp_fetched[host] + 1 >= self.arp_max_age
+            ]
+    
+    def retain_switches(self, hosts: Iterable[str]):
+        """Drop the bindings of switches no longer in the inventory"""
+        hosts = set(hosts)
+        with self._lock:
+            gone = [host for host in self._arp if host not in hosts]
+            for host in gone:
+                del self._arp[host]
+                self._arp_fetched.pop(host, None)
+            self._arp_requested &= hosts
+            if gone:
+                self._merge_arp()
+    
+    def _merge_arp(self):
+        """Rebuild the MAC -> IP view from every switch's bindings (lock held)"""
+        # Later switches win, as when the tables were merged per scan
+        merged = {}
+        for ip_lookup in self._arp.values():
+            merged.update(ip_lookup)
+        self._ip_by_mac = merged
+    
+    # --- Hostnames -----------------------------------------------------------
+    
+    def hostname_for(self, mac_address: str, ip_address: str, current: Optional[str] = None) -> str:
+        """Cached hostname for an IP; otherwise a background lookup and 'Unknown'
+        
+        Args:
+            current: The name the device already has for this IP, returned
+                instead of 'Unknown' while its expired entry is looked up again
+        """
+        if not ip_address or ip_address == HostnameResolver.UNKNOWN:
+            return HostnameResolver.UNKNOWN
+        
+        hostname = self.resolver.get_cached(ip_address)
+        if hostname is not None:
+            return hostname
+        
+        with self._lock:
+            self._pending_hostnames[mac_address] = ip_address
+        self.resolver.prefetch([ip_address])
+        return current or HostnameResolver.UNKNOWN
+    
+    def take_resolved(self) -> Dict[str, Dict[str, str]]:
+        """Collect the background lookups that have finished
+        
+        Returns:
+            mac -> {'ip_address': ip, 'hostname': name} for lookups that
+            found a name; failed lookups are dropped
+        """
+        resolved = {}
+        with self._lock:
+            for mac, ip in list(self._pending_hostnames.items()):
+                hostname = self.resolver.get_cached(ip)
+                if hostname is None:
+                    continue
+                del self._pending_hostnames[mac]
+                if hostname != HostnameResolver.UNKNOWN:
+                    resolved[mac] = {'ip_address': ip, 'hostname': hostname}
+            self.hostnames_applied += len(resolved)
+        return resolved
+    
+    # --- Vendors -------------------------------------------------------------
+    
+    def vendor_for(self, mac_address: str) -> str:
+        """Vendor from the MAC's OUI, cached per OUI"""
+        oui = mac_address[:8].upper()
+        vendor = self._vendors.get(oui)
+        if vendor is None:
+            vendor = self._vendors[oui] = VendorLookup.get_vendor(mac_address)
+        return vendor
+    
+    def get_stats(self) -> Dict:
+        """Get binding counts, ARP ages and pending lookups"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'arp_bindings': len(self._ip_by_mac),
+                'arp_max_age_seconds': self.arp_max_age,
+                'arp_age_seconds': {host: round(now - fetched, 1) for host, fetched in self._arp_fetched.items()},
+                'arp_refreshes': self.arp_refreshes,
+                'arp_on_demand_requests': self.arp_on_demand,
+                'pending_hostnames': len(self._pending_hostnames),
+                'hostnames_applied': self.hostnames_applied,
+                'vendors_cached': len(self._vendors)
+            }
@@ -0,0 +1,225 @@
+"""
+Concurrent reverse DNS resolution with TTL caching
+"""
+import math
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Optional
+
+
+class HostnameResolver:
+    """Resolves hostnames for many IPs at once on a bounded thread pool
+    
+    Results are kept in an LRU cache that survives across scans. Successful
+    lookups are cached for ttl seconds, failed ones for negative_ttl seconds,
+    so an IP is only looked up again when it is new or its entry expired.
+    """
+    
+    UNKNOWN = 'Unknown'
+    
+    def __init__(self, max_workers: int = 16, timeout: float = 2.0, ttl: int = 3600,
+                 negative_ttl: int = 300, max_entries: int = 10000):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        
+        self._cache = OrderedDict()  # ip -> (hostname, expires_at)
+        self._inflight = {}  # ip -> Future, so one IP is never looked up twice at once
+        self._started = {}  # ip -> when a worker picked its lookup up
+        # Re-entrant: a lookup that finishes before add_done_callback() returns
+        # runs _store() on the submitting thread, which already holds the lock
+        self._lock = threading.RLock()
+        self._executor = None
+        
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+    
+    def resolve(self, ip_address: str) -> str:
+        """Resolve a single IP (cached)"""
+        return self.resolve_many([ip_address]).get(ip_address, self.UNKNOWN)
+    
+    def resolve_many(self, ip_addresses: Iterable[str]) -> Dict[str, str]:
+        """Resolve a batch of IPs concurrently
+        
+        Cached entries are answered immediately. The rest are looked up in
+        parallel. Each lookup gets `timeout` seconds from when a worker picks
+        it up; one still queued behind busy workers is given up once the
+        batch has had `timeout` seconds per round of max_workers lookups.
+        A lookup given up on is reported as 'Unknown' for this call, and its
+        result is cached when it eventually finishes.
+        """
+        results = {}
+        pending = {}
+        now = time.monotonic()
+        
+        with self._lock:
+            for ip in set(ip_addresses):
+                if not ip or ip == self.UNKNOWN:
+                    continue
+                
+                cached = self._cache.get(ip)
+                if cached and cached[1] > now:
+                    self._cache.move_to_end(ip)
+                    results[ip] = cached[0]
+                    self.hits += 1
+                    continue
+                
+                self.misses += 1
+                pending[ip] = self._submit(ip)
+        
+        if pending:
+            self._wait_for_lookups(pending)
+            
+            timed_out = not_started = 0
+            with self._lock:
+                for ip, future in pending.items():
+                    if future.done() and not future.exception():
+                        results[ip] = future.result() or self.UNKNOWN
+                    else:
+                        results[ip] = self.UNKNOWN
+                        if not future.done():
+                            if ip in self._started:
+                                timed_out += 1
+                            else:
+                                not_started += 1
+                self.timeouts += timed_out + not_started
+            if timed_out or not_started:
+                print(f"Reverse DNS: gave up on {timed_out + not_started} of {len(pending)} lookup(s) "
+                      f"({timed_out} took over {self.timeout}s, {not_started} never got a free worker)")
+        
+        return results
+    
+    def _wait_for_lookups(self, pending: Dict):
+        """Wait for a batch's lookups, each bounded on its own
+        
+        A running lookup is waited for until `timeout` after it started; a
+        queued one until the batch deadline.
+        """
+        rounds = math.ceil(len(pending) / self.max_workers)
+        batch_deadline = time.monotonic() + self.timeout * rounds
+        while True:
+            now = time.monotonic()
+            waiting, deadlines = [], []
+            with self._lock:
+                for ip, future in pending.items():
+                    if future.done():
+                        continue
+                    started = self._started.get(ip)
+                    deadline = batch_deadline if started is None else started + self.timeout
+                    if deadline > now:
+                        waiting.append(future)
+                        deadlines.append(deadline)
+            
+            if not deadlines:
+                return
+            wait(waiting, timeout=min(deadlines) - now, return_when=FIRST_COMPLETED)
+    
+    def get_cached(self, ip_address: str) -> Optional[str]:
+        """Get a cached hostname without looking it up
+        
+        Returns:
+            The hostname ('Unknown' for a cached failure), or None if the IP
+            is not cached or its entry expired
+        """
+        with self._lock:
+            cached = self._cache.get(ip_address)
+            if cached and cached[1] > time.monotonic():
+                self.hits += 1
+                return cached[0]
+            return None
+    
+    def prefetch(self, ip_addresses: Iterable[str]) -> int:
+        """Start background lookups for IPs that are not cached, without waiting
+        
+        Returns:
+            Number of IPs now being looked up
+        """
+        now = time.monotonic()
+        started = 0
+        with self._lock:
+            for ip in set(ip_addresses):
+                if not ip or ip == self.UNKNOWN:
+                    continue
+                cached = self._cache.get(ip)
+                if cached and cached[1] > now:
+                    continue
+                self.misses += 1
+                self._submit(ip)
+                started += 1
+        return started
+    
+    def _submit(self, ip_address: str):
+        """Start (or join) the lookup of one IP; call with the lock held"""
+        future = self._inflight.get(ip_address)
+        if future is None:
+            future = self._get_executor().submit(self._timed_lookup, ip_address)
+            self._inflight[ip_address] = future
+            future.add_done_callback(lambda f, ip=ip_address: self._store(ip, f))
+        return future
+    
+    def _timed_lookup(self, ip_address: str) -> Optional[str]:
+        """Note when a worker starts the lookup, so its timeout counts from then"""
+        with self._lock:
+            self._started[ip_address] = time.monotonic()
+        return self._lookup(ip_address)
+    
+    def _lookup(self, ip_address: str) -> Optional[str]:
+        """Blocking reverse lookup, run on the pool"""
+        try:
+            return socket.gethostbyaddr(ip_address)[0]
+        except (socket.herror, socket.gaierror, OSError):
+            return None
+    
+    def _store(self, ip_address: str, future):
+        """Cache a finished lookup (positive or negative)"""
+        try:
+            hostname = future.result()
+        except Exception:
+            hostname = None
+        
+        ttl = self.ttl if hostname else self.negative_ttl
+        with self._lock:
+            self._inflight.pop(ip_address, None)
+            self._started.pop(ip_address, None)
+            self._cache[ip_address] = (hostname or self.UNKNOWN, time.monotonic() + ttl)
+            self._cache.move_to_end(ip_address)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker pool on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='dns')
+        return self._executor
+    
+    def invalidate(self, ip_address: str = None):
+        """Drop one cached IP, or the whole cache"""
+        with self._lock:
+            if ip_address:
+                self._cache.pop(ip_address, None)
+            else:
+                self._cache.clear()
+    
+    def get_stats(self) -> Dict:
+        """Get cache and lookup counters"""
+        with self._lock:
+            return {
+                'cached': len(self._cache),
+                'inflight': len(self._inflight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'timeouts': self.timeouts
+            }
+    
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,117 @@
+"""
+Per-switch index of infrastructure ports (uplinks, trunks, inter-switch links)
+"""
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from switch_parsers import canonical_port
+
+
+class InfrastructurePortIndex:
+    """Which ports of each switch lead to other network devices
+    
+    MACs learned on an uplink are the devices of every switch behind it:
+    on an aggregation switch they are most of the MAC table, and none of
+    them is plugged into this switch. The scan drops MAC table entries on
+    these ports while the table is parsed, so they are never processed,
+    stored or quarantined (and an uplink is never shut down as a rogue's
+    port).
+    
+    Discovered ports (SwitchConnector.get_infrastructure_ports()) are
+    refreshed per switch every refresh_interval seconds - neighbors and
+    trunks change far less often than MAC tables. Ports listed in a
+    switch's inventory entry ('uplink_ports') are always included.
+    """
+    
+    def __init__(self, refresh_interval: float = 3600):
+        """
+        Args:
+            refresh_interval: A switch's neighbors and trunks are due again after this many seconds
+        """
+        self.refresh_interval = refresh_interval
+        
+        self._lock = threading.Lock()
+        self._ports = {}  # host -> {port: reason}
+        self._fetched = {}  # host -> monotonic time of the last discovery
+        self._excluded = {}  # (host, static ports) -> frozenset of ports to drop
+        
+        self.refreshes = 0
+        self.changes = 0
+        self.entries_dropped = 0
+    
+    def due(self, host: str) -> bool:
+        """Whether a switch's neighbors and trunks should be pulled now"""
+        fetched = self._fetched.get(host)
+        return fetched is None or time.monotonic() - fetched >= self.refresh_interval
+    
+    def update(self, host: str, ports: Dict[str, str]) -> bool:
+        """Replace a switch's discovered ports
+        
+        Args:
+            ports: {port: reason} from get_infrastructure_ports()
+        
+        Returns:
+            True if the set of ports changed (including the first
+            discovery), so a table cached under the old set is stale
+        """
+        with self._lock:
+            previous = self._ports.get(host)
+            self._ports[host] = dict(ports)
+            self._fetched[host] = time.monotonic()
+            self.refreshes += 1
+            changed = previous is None or set(previous) != set(ports)
+            if changed:
+                self._excluded = {key: value for key, value in self._excluded.items() if key[0] != host}
+                if previous is not None:
+                    self.changes += 1
+                    print(f"Infrastructure ports of {host} changed: {', '.join(sorted(ports)) or 'none'}")
+            return changed
+    
+    def ports_for(self, host: str, static: Optional[Iterable[str]] = None) -> FrozenSet[str]:
+        """Ports whose MAC entries are dropped for a switch (discovered plus static)"""
+        if isinstance(static, str):
+            static = static.split(',')
+        key = (host, tuple(static or ()))
+        excluded = self._excluded.get(key)
+        if excluded is None:
+            with self._lock:
+                ports = set(self._ports.get(host, ()))
+                ports.update(canonical_port(port) for port in key[1])
+                excluded = self._excluded[key] = frozenset(ports)
+        return excluded
+    
+    def record_dropped(self, count: int):
+        """Count MAC entries dropped for being on an infrastructure port"""
+        if count:
+            with self._lock:
+                self.entries_dropped += count
+    
+    def retain_switches(self, hosts: Iterable[str]):
+        """Forget switches that left the inventory"""
+        keep = set(hosts)
+        with self._lock:
+            for host in [host for host in self._ports if host not in keep]:
+                del self._ports[host]
+                self._fetched.pop(host, None)
+            self._excluded = {key: value for key, value in self._excluded.items() if key[0] in keep}
+    
+    def invalidate(self, host: Optional[str] = None):
+        """Pull a switch's (or every switch's) neighbors and trunks again on its next scan"""
+        with self._lock:
+            if host is None:
+                self._fetched = {}
+            else:
+                self._fetched.pop(host, None)
+    
+    def get_stats(self) -> Dict:
+        """Get each switch's infrastructure ports and how many entries they saved"""
+        with self._lock:
+            return {
+                'refresh_interval_seconds': self.refresh_interval,
+                'switches': {host: dict(sorted(ports.items())) for host, ports in self._ports.items()},
+                'ports': sum(len(ports) for ports in self._ports.values()),
+                'refreshes': self.refreshes,
+                'changes': self.changes,
+                'entries_dropped': self.entries_dropped
+            }
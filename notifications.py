@@ -0,0 +1,484 @@
+"""
+Event-driven detection from switch notifications (SNMP traps and syslog)
+
+Switches report MAC and port changes the moment they happen:
+
+- SNMP traps: CISCO-MAC-NOTIFICATION-MIB MAC changed/move notifications
+  and IF-MIB linkUp
+- Syslog: port-security violations, MAC flapping (SW_MATM MACFLAP_NOTIF)
+  and interface up/down
+
+NotificationListener turns those datagrams into events and
+NotificationQueue has them evaluated right away by the detector. Polling
+scans keep running as the safety net for anything not reported.
+"""
+import queue
+import re
+import selectors
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from snmp_collector import decode_message, oid, INTEGER, OCTET_STRING, TRAP_V1, TRAP_V2
+from switch_parsers import canonical_port, normalize_mac
+
+
+# Event kinds
+MAC_ADDED = 'mac_added'
+MAC_REMOVED = 'mac_removed'
+MAC_MOVED = 'mac_moved'
+PORT_SECURITY = 'port_security'
+LINK_UP = 'link_up'
+LINK_DOWN = 'link_down'
+
+# Kinds that can put a new device on the network
+EVALUATED_KINDS = frozenset((MAC_ADDED, MAC_MOVED, PORT_SECURITY, LINK_UP))
+
+SNMP_TRAP_OID = oid('1.3.6.1.6.3.1.1.4.1.0')
+# CISCO-MAC-NOTIFICATION-MIB
+CISCO_MAC_NOTIFICATION = oid('1.3.6.1.4.1.9.9.215')
+CMN_MAC_CHANGED_NOTIFICATION = oid('1.3.6.1.4.1.9.9.215.2.0.1')
+CMN_MAC_MOVE_NOTIFICATION = oid('1.3.6.1.4.1.9.9.215.2.0.3')
+CMN_HIST_MAC_CHANGED_MSG = oid('1.3.6.1.4.1.9.9.215.1.1.8.1.2')
+# IF-MIB
+LINK_DOWN_TRAP = oid('1.3.6.1.6.3.1.1.5.3')
+LINK_UP_TRAP = oid('1.3.6.1.6.3.1.1.5.4')
+IF_DESCR = oid('1.3.6.1.2.1.2.2.1.2')
+IF_NAME = oid('1.3.6.1.2.1.31.1.1.1.1')
+
+# Examples:
+# %PORT_SECURITY-2-PSECURE_VIOLATION: Security violation occurred, caused by MAC address 0011.2233.4455 on port GigabitEthernet1/0/5.
+# %SW_MATM-4-MACFLAP_NOTIF: Host 0011.2233.4455 in vlan 10 is flapping between port Gi1/0/1 and port Gi1/0/2
+# %LINK-3-UPDOWN: Interface GigabitEthernet1/0/5, changed state to up
+SYSLOG_PORT_SECURITY = re.compile(
+    r'%PORT_SECURITY-\d-PSECURE_VIOLATION\w*: .*?MAC (?:address )?(?P<mac>[0-9A-Fa-f.:-]{12,17}) on port (?P<port>[\w/.:-]+?)\.?(?:\s|$)'
+)
+SYSLOG_MAC_FLAP = re.compile(
+    r'%SW_MATC?M-\d-MACFLAP_NOTIF: Host (?P<mac>[0-9A-Fa-f.:-]{12,17}) in vlan (?P<vlan>\d+) '
+    r'is flapping between port (?P<from_port>\S+) and port (?P<port>[\w/.:-]+)'
+)
+SYSLOG_LINK = re.compile(r'%(?:LINK|LINEPROTO)-\d-UPDOWN: .*?Interface (?P<port>[\w/.:-]+), changed state to (?P<state>up|down)')
+
+
+def _event(kind: str, switch: str, mac_address: Optional[str] = None, port: Optional[str] = None,
+           vlan: Optional[int] = None) -> Dict:
+    return {
+        'kind': kind,
+        'switch': switch,
+        'mac_address': mac_address,
+        'port': canonical_port(port) if port else None,
+        'vlan': vlan,
+        'received_at': time.monotonic()
+    }
+
+
+def parse_mac_changed_message(message: bytes, switch: str) -> List[Dict]:
+    """Events from a cmnHistMacChangedMsg
+    
+    The message packs one or more 11-byte records (operation: 1 = learned,
+    2 = removed; VLAN; MAC; dot1dBasePort) and ends with a zero byte. The
+    bridge port is not an interface name, so the port is looked up later.
+    """
+    events = []
+    for offset in range(0, len(message) - 10, 11):
+        operation = message[offset]
+        if operation not in (1, 2):
+            break
+        vlan = int.from_bytes(message[offset + 1:offset + 3], 'big')
+        mac = message[offset + 3:offset + 9].hex(':').upper()
+        events.append(_event(MAC_ADDED if operation == 1 else MAC_REMOVED, switch, mac, vlan=vlan))
+    return events
+
+
+def parse_trap(data: bytes, source: str, community: Optional[str] = None) -> List[Dict]:
+    """Events from an SNMPv1/v2c trap datagram
+    
+    Args:
+        data: The datagram
+        source: Sender IP, the switch every event is attributed to (the
+            agent address inside an SNMPv1 trap is not used: any sender
+            can put another switch's address there)
+        community: Accept only this community (None = any)
+    
+    Returns:
+        Events, empty for traps that are not understood
+    """
+    message = decode_message(data)
+    if community is not None and message['community'].decode(errors='replace') != community:
+        return []
+    
+    varbinds = message['varbinds']
+    switch = source
+    if message['pdu_type'] == TRAP_V1:
+        enterprise, generic, specific = message['enterprise'], message['field1'], message['field2']
+        trap = enterprise + (0, specific) if generic == 6 else {2: LINK_DOWN_TRAP, 3: LINK_UP_TRAP}.get(generic)
+    elif message['pdu_type'] == TRAP_V2:
+        trap = next((value for name, _, value in varbinds if name == SNMP_TRAP_OID), None)
+    else:
+        return []
+    
+    events = []
+    if trap == CMN_MAC_CHANGED_NOTIFICATION:
+        for name, tag, value in varbinds:
+            if tag == OCTET_STRING and name[:len(CMN_HIST_MAC_CHANGED_MSG)] == CMN_HIST_MAC_CHANGED_MSG:
+                events.extend(parse_mac_changed_message(value, switch))
+    elif trap == CMN_MAC_MOVE_NOTIFICATION:
+        # The moved MAC is the one 6-byte string among the notification's objects
+        mac, vlan = None, None
+        for name, tag, value in varbinds:
+            if name[:len(CISCO_MAC_NOTIFICATION)] != CISCO_MAC_NOTIFICATION:
+                continue
+            if tag == OCTET_STRING and len(value) == 6:
+                mac = value.hex(':').upper()
+            elif tag == INTEGER and vlan is None and 0 < value < 4095:
+                vlan = value
+        if mac:
+            events.append(_event(MAC_MOVED, switch, mac, vlan=vlan))
+    elif trap in (LINK_UP_TRAP, LINK_DOWN_TRAP):
+        port = next((value.decode(errors='replace') for name, tag, value in varbinds
+                     if tag == OCTET_STRING and (name[:len(IF_NAME)] == IF_NAME or name[:len(IF_DESCR)] == IF_DESCR)), None)
+        if port:
+            events.append(_event(LINK_UP if trap == LINK_UP_TRAP else LINK_DOWN, switch, port=port))
+    return events
+
+
+def parse_syslog(data: bytes, source: str) -> List[Dict]:
+    """Events from a syslog datagram (RFC 3164/5424, Cisco mnemonics)"""
+    message = data.decode(errors='replace')
+    if '%' not in message:
+        return []
+    
+    match = SYSLOG_PORT_SECURITY.search(message)
+    if match:
+        return [_event(PORT_SECURITY, source, normalize_mac(match.group('mac')), match.group('port'))]
+    match = SYSLOG_MAC_FLAP.search(message)
+    if match:
+        return [_event(MAC_MOVED, source, normalize_mac(match.group('mac')), match.group('port'),
+                       int(match.group('vlan')))]
+    match = SYSLOG_LINK.search(message)
+    if match:
+        return [_event(LINK_UP if match.group('state') == 'up' else LINK_DOWN, source, port=match.group('port'))]
+    return []
+
+
+class NotificationListener:
+    """Receives SNMP traps and syslog on local UDP ports and reports events
+    
+    Datagrams whose UDP source address is outside allowed_sources() are
+    dropped before they are parsed, so only switches in the inventory can
+    trigger evaluations, and every event names the switch that sent it.
+    """
+    
+    def __init__(self, on_event: Callable[[Dict], object], address: str = "0.0.0.0", trap_port: int = 162,
+                 syslog_port: int = 514, allowed_sources: Optional[Callable[[], Set[str]]] = None,
+                 trap_community: Optional[str] = None):
+        """
+        Args:
+            on_event: Called with each event, on the listener thread
+            address: Address to listen on
+            trap_port: UDP port for SNMP traps (None = off, 0 = any free port)
+            syslog_port: UDP port for syslog (None = off, 0 = any free port)
+            allowed_sources: allowed_sources() -> set of sender IPs (None = any);
+                re-read every few seconds
+            trap_community: Accept only traps with this community (None = any)
+        """
+        self.on_event = on_event
+        self.address = address
+        self.trap_port = trap_port
+        self.syslog_port = syslog_port
+        self.allowed_sources = allowed_sources
+        self.trap_community = trap_community or None
+        
+        self._selector = None
+        self._sockets = []
+        self._thread = None
+        self._stopping = False
+        self._allowed = None
+        self._allowed_at = 0.0
+        
+        self.traps = 0
+        self.syslog_messages = 0
+        self.events = 0
+        self.ignored = 0
+        self.rejected = 0
+    
+    def start(self) -> bool:
+        """Bind the ports and start the listener thread"""
+        if self._thread and self._thread.is_alive():
+            return True
+        
+        self._selector = selectors.DefaultSelector()
+        self._stopping = False
+        try:
+            for kind, parse in (('trap', self._parse_trap), ('syslog', parse_syslog)):
+                port = getattr(self, f'{kind}_port')
+                if port is None:
+                    continue
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                # Room for bursts (e.g. a stack reloading) while events are handed on
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+                sock.bind((self.address, port))
+                sock.setblocking(False)
+                # Port 0 binds any free port; keep the real one
+                setattr(self, f'{kind}_port', sock.getsockname()[1])
+                self._sockets.append(sock)
+                self._selector.register(sock, selectors.EVENT_READ, parse)
+        except OSError as e:
+            print(f"Could not start notification listener on {self.address}: {e}")
+            self._close_sockets()
+            return False
+        
+        self._thread = threading.Thread(target=self._listen, name='notification-listener', daemon=True)
+        self._thread.start()
+        ports = ', '.join(f'{kind}: UDP {port}' for kind, port in (('traps', self.trap_port), ('syslog', self.syslog_port))
+                          if port is not None)
+        print(f"Listening for switch notifications on {self.address} ({ports})")
+        return True
+    
+    def stop(self, timeout: float = 2):
+        """Stop listening and close the ports"""
+        self._stopping = True
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self._close_sockets()
+    
+    def is_running(self) -> bool:
+        """Check whether the listener thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _close_sockets(self):
+        if self._selector is None:
+            return  # Never started, or already stopped
+        for sock in self._sockets:
+            try:
+                self._selector.unregister(sock)
+            except (KeyError, ValueError):
+                pass
+            sock.close()
+        self._sockets = []
+        self._selector.close()
+        self._selector = None
+    
+    def _parse_trap(self, data: bytes, source: str) -> List[Dict]:
+        return parse_trap(data, source, self.trap_community)
+    
+    def _is_allowed(self, source: str) -> bool:
+        if self.allowed_sources is None:
+            return True
+        now = time.monotonic()
+        if self._allowed is None or now - self._allowed_at > 10:
+            self._allowed = set(self.allowed_sources())
+            self._allowed_at = now
+        return source in self._allowed
+    
+    def _listen(self):
+        """Read datagrams until stopped, draining each socket before waiting again"""
+        while not self._stopping:
+            for key, _ in self._selector.select(timeout=0.2):
+                parse = key.data
+                while True:
+                    try:
+                        data, (source, _) = key.fileobj.recvfrom(65535)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except OSError:
+                        return
+                    self._handle(parse, data, source)
+    
+    def _handle(self, parse: Callable, data: bytes, source: str):
+        if parse is parse_syslog:
+            self.syslog_messages += 1
+        else:
+            self.traps += 1
+        
+        if not self._is_allowed(source):
+            self.rejected += 1
+            return
+        
+        try:
+            events = parse(data, source)
+        except (ValueError, IndexError, TypeError):
+            events = []
+        if not events:
+            self.ignored += 1
+            return
+        
+        for event in events:
+            self.events += 1
+            try:
+                self.on_event(event)
+            except Exception as e:
+                print(f"Error handling {event['kind']} notification from {event['switch']}: {e}")
+    
+    def get_stats(self) -> Dict:
+        """Get received datagram and event counters"""
+        return {
+            'running': self.is_running(),
+            'trap_port': self.trap_port,
+            'syslog_port': self.syslog_port,
+            'traps': self.traps,
+            'syslog_messages': self.syslog_messages,
+            'events': self.events,
+            'ignored': self.ignored,
+            'rejected': self.rejected
+        }
+
+
+class NotificationQueue:
+    """Evaluates notification events on worker threads, as they arrive
+    
+    Events are keyed by (switch, MAC) or, without a MAC, (switch, port):
+    while one is waiting, further events for the same key are dropped, so a
+    flapping MAC or a trap storm costs one evaluation per key. Events that
+    cannot reveal a new device (MAC removed, link down) are not evaluated.
+    Link-up events wait link_up_delay seconds, until the device on the port
+    has sent traffic and been learned.
+    
+    A worker takes every event waiting in the queue (up to max_batch) at
+    once and evaluates them together, so a burst costs one database write
+    per batch instead of one per event.
+    """
+    
+    def __init__(self, evaluate: Callable[[List[Dict]], List[Optional[Dict]]], workers: int = 2,
+                 link_up_delay: float = 5, max_batch: int = 100):
+        """
+        Args:
+            evaluate: evaluate(events) -> one outcome dict per event
+                ({'rogues': n, 'new_rogues': n}, None if it failed)
+            workers: Number of worker threads
+            link_up_delay: Seconds to wait before evaluating a port that came up
+            max_batch: Most events evaluated together
+        """
+        self.evaluate = evaluate
+        self.workers = max(1, workers)
+        self.link_up_delay = link_up_delay
+        self.max_batch = max(1, max_batch)
+        
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._threads = []
+        
+        self.submitted = 0
+        self.deduplicated = 0
+        self.skipped = 0
+        self.evaluated = 0
+        self.failed = 0
+        self.batches = 0
+        self.rogues = 0
+        self.new_rogues = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+    
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f'notification-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def submit(self, event: Dict) -> bool:
+        """Queue an event for evaluation
+        
+        Returns:
+            False if it was skipped or a matching event is already waiting
+        """
+        if event['kind'] not in EVALUATED_KINDS:
+            with self._lock:
+                self.skipped += 1
+            return False
+        
+        key = (event['switch'], event['mac_address'] or event['port'])
+        with self._lock:
+            if key in self._pending:
+                self.deduplicated += 1
+                return False
+            self._pending.add(key)
+            self.submitted += 1
+        
+        event['key'] = key
+        if event['kind'] == LINK_UP and self.link_up_delay > 0:
+            timer = threading.Timer(self.link_up_delay, self._queue.put, (event,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._queue.put(event)
+        self.start()
+        return True
+    
+    def _next_batch(self) -> List[Dict]:
+        """Wait for an event, then take whatever else is already queued"""
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            for event in batch:
+                self._pending.discard(event['key'])
+        return batch
+    
+    def _worker_loop(self):
+        while True:
+            batch = self._next_batch()
+            outcomes = [None] * len(batch)
+            try:
+                outcomes = self.evaluate(batch)
+            except Exception as e:
+                print(f"Error evaluating {len(batch)} notification(s): {e}")
+            finally:
+                finished = time.monotonic()
+                with self._lock:
+                    self.batches += 1
+                    for event, outcome in zip(batch, outcomes):
+                        if outcome is None:
+                            self.failed += 1
+                        else:
+                            self.evaluated += 1
+                            self.rogues += outcome.get('rogues', 0)
+                            self.new_rogues += outcome.get('new_rogues', 0)
+                        latency = finished - event['received_at']
+                        self.last_latency = latency
+                        self.max_latency = max(self.max_latency, latency)
+                        self._total_latency += latency
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been evaluated"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                idle = not self._pending and self._queue.unfinished_tasks == 0
+            if idle:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+    
+    def get_stats(self) -> Dict:
+        """Get queue depth, outcome counters and detection latency"""
+        with self._lock:
+            finished = self.evaluated + self.failed
+            return {
+                'queue_depth': self._queue.qsize(),
+                'pending': len(self._pending),
+                'submitted': self.submitted,
+                'deduplicated': self.deduplicated,
+                'skipped': self.skipped,
+                'evaluated': self.evaluated,
+                'failed': self.failed,
+                'batches': self.batches,
+                'rogues_found': self.rogues,
+                'new_rogues': self.new_rogues,
+                'last_latency_seconds': round(self.last_latency, 4) if self.last_latency is not None else None,
+                'avg_latency_seconds': round(self._total_latency / finished, 4) if finished else None,
+                'max_latency_seconds': round(self.max_latency, 4)
+            }
@@ -0,0 +1,184 @@
+"""
+Background remediation queue for rogue device actions
+"""
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from switch_connector import SwitchSessionSet
+
+
+class RemediationQueue:
+    """Queue of switch remediation actions drained by worker threads
+    
+    The scan only enqueues actions; workers hand whatever has queued up to
+    handler as one batch (so it can push all port changes to a switch at
+    once) and report back through the handler's own events. Actions are keyed by
+    (action, switch, port): a MAC that is already pending is not enqueued
+    again, and further MACs behind a port that is already pending are
+    attached to the existing action instead of creating a new one.
+    """
+    
+    def __init__(self, handler: Callable, session_factory: Callable, workers: int = 1,
+                 session_release: Optional[Callable] = None):
+        """
+        Args:
+            handler: handler(batch, switches) -> List[bool], executes a batch
+                of actions and returns one outcome per action
+            session_factory: session_factory(host) -> SwitchConnector, used
+                to open one session per switch for each batch of actions
+            workers: Number of worker threads
+            session_release: session_release(switch), called instead of
+                disconnecting when a batch is done (e.g. SwitchSessionPool.checkin)
+        """
+        self.handler = handler
+        self.session_factory = session_factory
+        self.session_release = session_release
+        self.workers = max(1, workers)
+        
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = {}  # (action, switch, port) -> queued action
+        self._pending_macs = set()
+        self._threads = []
+        
+        self.enqueued = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_progress = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+    
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f'remediation-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def enqueue(self, action: str, switch: str, port: str, device_info: Dict, **params) -> bool:
+        """Queue an action for a device
+        
+        Returns:
+            True if queued (or attached to a pending action for the same
+            port), False if the MAC already has an action pending
+        """
+        mac = device_info.get('mac_address')
+        key = (action, switch, port)
+        
+        with self._lock:
+            if mac in self._pending_macs:
+                self.deduplicated += 1
+                return False
+            self._pending_macs.add(mac)
+            
+            pending = self._pending.get(key)
+            if pending:
+                pending['devices'].append(device_info)
+                self.deduplicated += 1
+                return True
+            
+            item = {
+                'action': action,
+                'switch': switch,
+                'port': port,
+                'devices': [device_info],
+                'params': params,
+                'enqueued_at': time.monotonic(),
+                'enqueued_time': datetime.now().isoformat()
+            }
+            self._pending[key] = item
+            self.enqueued += 1
+        
+        self._queue.put(item)
+        self.start()
+        return True
+    
+    def is_pending(self, mac_address: str) -> bool:
+        """Check whether a MAC has an action queued or in progress"""
+        with self._lock:
+            return mac_address in self._pending_macs
+    
+    def _take(self, item: Dict):
+        """Detach an action from the dedup index once a worker picks it up"""
+        with self._lock:
+            self._pending.pop((item['action'], item['switch'], item['port']), None)
+            self.in_progress += 1
+    
+    def _finish(self, item: Dict, success: bool):
+        """Record the outcome of an action"""
+        latency = time.monotonic() - item['enqueued_at']
+        with self._lock:
+            for device_info in item['devices']:
+                self._pending_macs.discard(device_info.get('mac_address'))
+            self.in_progress -= 1
+            if success:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self._total_latency += latency
+    
+    def _next_batch(self) -> List[Dict]:
+        """Block for one action, then take whatever else is already queued"""
+        batch = [self._queue.get()]
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+    
+    def _worker_loop(self):
+        """Drain the queue, sharing one session per switch within a batch"""
+        while True:
+            batch = self._next_batch()
+            for item in batch:
+                self._take(item)
+            
+            outcomes = []
+            try:
+                with SwitchSessionSet(self.session_factory, self.session_release) as switches:
+                    outcomes = list(self.handler(batch, switches))
+            except Exception as e:
+                print(f"Remediation batch of {len(batch)} action(s) failed: {e}")
+            finally:
+                for item, success in zip(batch, outcomes + [False] * (len(batch) - len(outcomes))):
+                    self._finish(item, bool(success))
+                    self._queue.task_done()
+    
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every pending action has finished (e.g. before shutdown)"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                idle = not self._pending_macs
+            if idle:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+    
+    def get_stats(self) -> Dict:
+        """Get queue depth, outcome counters and latency metrics"""
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                'queue_depth': self._queue.qsize(),
+                'in_progress': self.in_progress,
+                'pending_devices': len(self._pending_macs),
+                'enqueued': self.enqueued,
+                'deduplicated': self.deduplicated,
+                'completed': self.completed,
+                'failed': self.failed,
+                'last_latency_seconds': round(self.last_latency, 3) if self.last_latency is not None else None,
+                'avg_latency_seconds': round(self._total_latency / finished, 3) if finished else None,
+                'max_latency_seconds': round(self.max_latency, 3)
+            }
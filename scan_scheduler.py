@@ -0,0 +1,211 @@
+"""
+Fixed-deadline scan scheduler for continuous monitoring
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+
+class ScanScheduler:
+    """Runs a job on fixed deadlines instead of sleeping between runs
+    
+    Deadlines are start + n * interval, so the period does not drift by the
+    job's own duration. A run that overruns one or more deadlines does not
+    queue catch-up runs: the missed ticks are skipped and counted. The wait
+    is an Event, so stop() and trigger() take effect immediately.
+    
+    With adaptive enabled the interval moves between min_interval and
+    max_interval: it halves after a run that reported changes, grows by a
+    quarter after a quiet one, and never drops below the last run's
+    duration divided by max_duty_cycle.
+    """
+    
+    def __init__(self, job: Callable, interval_provider: Callable[[], float], adaptive: bool = False,
+                 min_interval: float = 10, max_interval: float = 300, max_duty_cycle: float = 0.5,
+                 name: str = 'scan-scheduler'):
+        """
+        Args:
+            job: job() -> bool, True if the run saw changes (used when adaptive)
+            interval_provider: Returns the configured interval in seconds; read
+                before every run so config changes apply without a restart
+            adaptive: Adapt the interval to change rate and job cost
+            min_interval: Lower bound for the adaptive interval
+            max_interval: Upper bound for the adaptive interval
+            max_duty_cycle: Largest fraction of each period the job may use
+            name: Thread name
+        """
+        self.job = job
+        self.interval_provider = interval_provider
+        self.adaptive = adaptive
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.max_duty_cycle = max_duty_cycle
+        self.name = name
+        
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._triggered = False
+        self._lock = threading.Lock()
+        self._thread = None
+        self._next_deadline = None  # monotonic
+        self._interval = None
+        
+        self.runs = 0
+        self.triggered_runs = 0
+        self.missed_ticks = 0
+        self.errors = 0
+        self.last_run = None
+        self.last_duration = None
+        self.last_lag = None
+        self.max_lag = 0.0
+    
+    def start(self) -> bool:
+        """Start the scheduler thread; the first run happens immediately"""
+        with self._lock:
+            if self.is_running():
+                return False
+            self._stopping = False
+            self._triggered = False
+            self._wakeup.clear()
+            self._interval = self._base_interval()
+            self._next_deadline = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            return True
+    
+    def stop(self, timeout: Optional[float] = 5) -> bool:
+        """Stop scheduling; a run already in progress is allowed to finish
+        
+        Returns:
+            True if the thread exited within timeout
+        """
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+            self._wakeup.set()
+        
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+    
+    def trigger(self) -> bool:
+        """Run the job now instead of waiting for the next deadline
+        
+        Returns:
+            False if the scheduler is not running
+        """
+        with self._lock:
+            if not self.is_running() or self._stopping:
+                return False
+            self._triggered = True
+            self._wakeup.set()
+            return True
+    
+    def is_running(self) -> bool:
+        """Check whether the scheduler thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _base_interval(self) -> float:
+        """Configured interval, falling back to min_interval on bad values"""
+        try:
+            interval = float(self.interval_provider())
+        except (TypeError, ValueError):
+            interval = self.min_interval
+        return max(1.0, interval)
+    
+    def _adapt(self, changed: bool, duration: float):
+        """Pick the interval for the next period"""
+        base = self._base_interval()
+        if not self.adaptive:
+            self._interval = base
+            return
+        
+        current = self._interval or base
+        interval = current * 0.5 if changed else current * 1.25
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        if self.max_duty_cycle > 0:
+            interval = max(interval, duration / self.max_duty_cycle)
+        self._interval = interval
+    
+    def _run(self):
+        """Wait for the next deadline (or a trigger), run the job, repeat"""
+        while True:
+            with self._lock:
+                if self._stopping:
+                    break
+                delay = self._next_deadline - time.monotonic()
+            
+            if delay > 0:
+                self._wakeup.wait(delay)
+            
+            with self._lock:
+                self._wakeup.clear()
+                if self._stopping:
+                    break
+                triggered = self._triggered
+                self._triggered = False
+                if not triggered and time.monotonic() < self._next_deadline:
+                    continue  # Spurious wakeup
+            
+            started = time.monotonic()
+            lag = 0.0 if triggered else started - self._next_deadline
+            changed = False
+            try:
+                changed = bool(self.job())
+            except Exception as e:
+                self.errors += 1
+                print(f"Scheduled scan error: {e}")
+            duration = time.monotonic() - started
+            
+            with self._lock:
+                self.runs += 1
+                if triggered:
+                    self.triggered_runs += 1
+                else:
+                    self.last_lag = lag
+                    self.max_lag = max(self.max_lag, lag)
+                self.last_run = datetime.now()
+                self.last_duration = duration
+                
+                self._adapt(changed, duration)
+                
+                # A triggered run restarts the period; a scheduled one keeps the grid
+                if triggered:
+                    self._next_deadline = time.monotonic() + self._interval
+                else:
+                    next_deadline = self._next_deadline + self._interval
+                    now = time.monotonic()
+                    if next_deadline <= now:
+                        missed = int((now - next_deadline) // self._interval) + 1
+                        self.missed_ticks += missed
+                        next_deadline += missed * self._interval
+                        print(f"Scan overran its interval - skipped {missed} tick(s)")
+                    self._next_deadline = next_deadline
+    
+    def get_stats(self) -> Dict:
+        """Get schedule, lag and skip counters"""
+        with self._lock:
+            running = self.is_running() and not self._stopping
+            seconds_until_next = None
+            next_run = None
+            if running and self._next_deadline is not None:
+                seconds_until_next = max(0.0, self._next_deadline - time.monotonic())
+                next_run = (datetime.now() + timedelta(seconds=seconds_until_next)).isoformat()
+            
+            return {
+                'running': running,
+                'adaptive': self.adaptive,
+                'interval_seconds': round(self._interval, 3) if self._interval else self._base_interval(),
+                'next_run': next_run,
+                'seconds_until_next': round(seconds_until_next, 3) if seconds_until_next is not None else None,
+                'last_run': self.last_run.isoformat() if self.last_run else None,
+                'last_duration_seconds': round(self.last_duration, 3) if self.last_duration is not None else None,
+                'last_lag_seconds': round(self.last_lag, 3) if self.last_lag is not None else None,
+                'max_lag_seconds': round(self.max_lag, 3),
+                'runs': self.runs,
+                'triggered_runs': self.triggered_runs,
+                'missed_ticks': self.missed_ticks,
+                'errors': self.errors
+            }
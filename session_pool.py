@@ -0,0 +1,288 @@
+"""
+Persistent SSH session pool for switch connections
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable
+
+from circuit_breaker import CircuitOpenError, SwitchCircuitBreakers
+from switch_connector import SwitchConnector
+
+
+class _HostSessions:
+    """Pool state for one switch"""
+    
+    def __init__(self, max_sessions: int):
+        self.slots = threading.BoundedSemaphore(max_sessions)
+        self.idle = []  # [(SwitchConnector, last_used)], most recently used last
+        self.open = 0
+        self.in_use = 0
+
+
+class SwitchSessionPool:
+    """Connected SwitchConnector sessions shared by the detector and the API
+    
+    Sessions are kept per switch host and handed out one caller at a time
+    (netmiko sessions are not thread-safe). At most max_sessions_per_switch
+    sessions exist per switch, so concurrent users queue for a session
+    instead of exhausting the switch's vty lines. A session that has been
+    idle for more than health_check_after seconds is checked before it is
+    handed out and reconnected if it died; a background keepalive pings
+    idle sessions and closes those idle for longer than idle_timeout.
+    With breakers, a switch that keeps failing to connect is refused at
+    once (CircuitOpenError) instead of costing every caller a connect
+    timeout.
+    """
+    
+    def __init__(self, factory: Callable[[str], SwitchConnector], max_sessions_per_switch: int = 2,
+                 checkout_timeout: float = 30, idle_timeout: float = 300,
+                 keepalive_interval: float = 60, health_check_after: float = 30,
+                 breakers: SwitchCircuitBreakers = None):
+        """
+        Args:
+            factory: factory(host) -> SwitchConnector, not yet connected
+            max_sessions_per_switch: vty budget the pool may use per switch
+            checkout_timeout: Longest time a caller waits for a free session
+            idle_timeout: Close sessions unused for this long (0 = never)
+            keepalive_interval: Seconds between keepalive passes (0 = off)
+            health_check_after: Check sessions idle this long before reuse
+            breakers: Optional per-switch circuit breakers fed by connect results
+        """
+        self.factory = factory
+        self.max_sessions_per_switch = max(1, max_sessions_per_switch)
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.health_check_after = health_check_after
+        self.breakers = breakers
+        
+        self._lock = threading.Lock()
+        self._hosts = {}  # host -> _HostSessions
+        self._keepalive_thread = None
+        self._stopping = threading.Event()
+        
+        self.checkouts = 0
+        self.reused = 0
+        self.created = 0
+        self.reconnects = 0
+        self.failed_checkouts = 0
+        self.health_failures = 0
+        self.closed_idle = 0
+        self.max_wait = 0.0
+        self._total_wait = 0.0
+    
+    def _host(self, host: str) -> _HostSessions:
+        """Get (or create) the pool state for a host"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = _HostSessions(self.max_sessions_per_switch)
+            return state
+    
+    def checkout(self, host: str) -> SwitchConnector:
+        """Take a connected session for a host; return it with checkin()
+        
+        Raises:
+            TimeoutError: No session became free within checkout_timeout
+            CircuitOpenError: The switch's circuit is open (see SwitchCircuitBreakers)
+            ConnectionError: The switch could not be connected
+        """
+        state = self._host(host)
+        # Fail fast on an open circuit instead of queueing for a slot behind
+        # callers that are all about to be rejected too
+        trial = False
+        if self.breakers:
+            try:
+                trial = self.breakers.check(host)
+            except CircuitOpenError:
+                with self._lock:
+                    self.failed_checkouts += 1
+                raise
+        started = time.monotonic()
+        if not state.slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self.failed_checkouts += 1
+            raise TimeoutError(f"No free session to {host} within {self.checkout_timeout}s")
+        waited = time.monotonic() - started
+        
+        try:
+            # The circuit may have opened while we waited (unless we hold its trial)
+            if self.breakers and not trial:
+                self.breakers.check(host)
+            switch = self._take_idle(state)
+            if switch is not None:
+                with self._lock:
+                    self.reused += 1
+            else:
+                switch = self.factory(host)
+                if not switch.connect():
+                    raise ConnectionError(f"Could not connect to {host}: {switch.last_error}"
+                                          if switch.last_error else f"Could not connect to {host}")
+                with self._lock:
+                    state.open += 1
+                    self.created += 1
+        except Exception as e:
+            state.slots.release()
+            with self._lock:
+                self.failed_checkouts += 1
+            if self.breakers and not isinstance(e, CircuitOpenError):
+                self.breakers.record_failure(host, e)
+            raise
+        
+        if self.breakers:
+            self.breakers.record_success(host)
+        with self._lock:
+            state.in_use += 1
+            self.checkouts += 1
+            self._total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        
+        self._start_keepalive()
+        return switch
+    
+    def _take_idle(self, state: _HostSessions):
+        """Pop the most recently used idle session, reconnecting it if it died"""
+        while True:
+            with self._lock:
+                if not state.idle:
+                    return None
+                switch, last_used = state.idle.pop()
+            
+            if time.monotonic() - last_used < self.health_check_after or switch.is_alive():
+                return switch
+            
+            with self._lock:
+                self.health_failures += 1
+            switch.disconnect()
+            if switch.connect():
+                with self._lock:
+                    self.reconnects += 1
+                return switch
+            
+            with self._lock:
+                state.open -= 1
+    
+    def checkin(self, switch: SwitchConnector, broken: bool = False):
+        """Return a session to the pool (or close it if it is broken)"""
+        state = self._host(switch.host)
+        if broken or not switch.connection:
+            switch.disconnect()
+            with self._lock:
+                state.open -= 1
+                state.in_use -= 1
+        else:
+            with self._lock:
+                state.idle.append((switch, time.monotonic()))
+                state.in_use -= 1
+        state.slots.release()
+    
+    @contextmanager
+    def session(self, host: str):
+        """Context manager around checkout()/checkin()
+        
+        A session that raised is only returned to the pool if it still
+        answers a health check.
+        """
+        switch = self.checkout(host)
+        broken = False
+        try:
+            yield switch
+        except Exception:
+            broken = not switch.is_alive()
+            raise
+        finally:
+            self.checkin(switch, broken)
+    
+    def warm_up(self, hosts: Iterable[str], background: bool = True):
+        """Open one session per host ahead of the first scan or API call"""
+        def open_sessions():
+            for host in hosts:
+                try:
+                    self.checkin(self.checkout(host))
+                except Exception as e:
+                    print(f"Session warm-up for {host} failed: {e}")
+        
+        if background:
+            threading.Thread(target=open_sessions, name='session-warm-up', daemon=True).start()
+        else:
+            open_sessions()
+    
+    def _start_keepalive(self):
+        """Start the keepalive thread on first checkout (idempotent)"""
+        if self.keepalive_interval <= 0:
+            return
+        with self._lock:
+            if self._keepalive_thread and self._keepalive_thread.is_alive():
+                return
+            self._stopping.clear()
+            self._keepalive_thread = threading.Thread(target=self._keepalive_loop, name='session-keepalive', daemon=True)
+            self._keepalive_thread.start()
+    
+    def _keepalive_loop(self):
+        """Ping idle sessions and close the ones idle past idle_timeout"""
+        while not self._stopping.wait(self.keepalive_interval):
+            with self._lock:
+                hosts = list(self._hosts.values())
+            
+            for state in hosts:
+                # Take the idle list so checkouts can't grab a session mid-ping
+                with self._lock:
+                    idle, state.idle = state.idle, []
+                
+                keep = []
+                now = time.monotonic()
+                for switch, last_used in idle:
+                    expired = self.idle_timeout and now - last_used >= self.idle_timeout
+                    if not expired and switch.is_alive():
+                        keep.append((switch, last_used))
+                        continue
+                    
+                    switch.disconnect()
+                    with self._lock:
+                        state.open -= 1
+                        if expired:
+                            self.closed_idle += 1
+                        else:
+                            self.health_failures += 1
+                
+                with self._lock:
+                    # Sessions checked in during the pass are more recent
+                    state.idle = keep + state.idle
+    
+    def close_all(self):
+        """Stop the keepalive and disconnect every idle session"""
+        self._stopping.set()
+        with self._lock:
+            idle = [(state, switch) for state in self._hosts.values() for switch, _ in state.idle]
+            for state in self._hosts.values():
+                state.idle = []
+        
+        for state, switch in idle:
+            try:
+                switch.disconnect()
+            except Exception as e:
+                print(f"Error disconnecting from {switch.host}: {e}")
+            with self._lock:
+                state.open -= 1
+    
+    def get_stats(self) -> Dict:
+        """Get per-switch session counts, checkout wait and reuse metrics"""
+        with self._lock:
+            return {
+                'max_sessions_per_switch': self.max_sessions_per_switch,
+                'switches': {
+                    host: {'open': state.open, 'idle': len(state.idle), 'in_use': state.in_use}
+                    for host, state in self._hosts.items()
+                },
+                'checkouts': self.checkouts,
+                'created': self.created,
+                'reused': self.reused,
+                'reuse_rate': round(self.reused / self.checkouts, 3) if self.checkouts else None,
+                'reconnects': self.reconnects,
+                'health_failures': self.health_failures,
+                'closed_idle': self.closed_idle,
+                'failed_checkouts': self.failed_checkouts,
+                'avg_checkout_wait_seconds': round(self._total_wait / self.checkouts, 3) if self.checkouts else None,
+                'max_checkout_wait_seconds': round(self.max_wait, 3)
+            }
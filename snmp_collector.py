@@ -0,0 +1,502 @@
+"""
+SNMP collection of MAC and ARP tables (BRIDGE-MIB, Q-BRIDGE-MIB, IP-MIB)
+
+An alternative to scraping 'show mac address-table' and 'show arp' over
+SSH: the same tables are read with SNMPv2c GETBULK walks, which is cheaper
+for the switch and needs no text parsing. The collector is read-only;
+port actions still go through SwitchConnector.
+
+SNMPv2c only needs a handful of BER types, so the client is built in and
+has no dependencies.
+"""
+import socket
+import time
+from sys import intern
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from switch_parsers import canonical_port
+
+
+# BER / SNMP tags
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+IP_ADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIMETICKS = 0x43
+OPAQUE = 0x44
+COUNTER64 = 0x46
+NO_SUCH_OBJECT = 0x80
+NO_SUCH_INSTANCE = 0x81
+END_OF_MIB_VIEW = 0x82
+
+GET = 0xA0
+GET_NEXT = 0xA1
+RESPONSE = 0xA2
+TRAP_V1 = 0xA4
+GET_BULK = 0xA5
+TRAP_V2 = 0xA7
+
+SNMP_V1 = 0
+SNMP_V2C = 1
+TOO_BIG = 1
+ERROR_NAMES = {
+    1: 'tooBig', 2: 'noSuchName', 3: 'badValue', 4: 'readOnly', 5: 'genErr',
+    6: 'noAccess', 16: 'authorizationError'
+}
+
+_UNSIGNED = (COUNTER32, GAUGE32, TIMETICKS, COUNTER64)
+_STRINGS = (OCTET_STRING, IP_ADDRESS, OPAQUE)
+
+
+def oid(dotted: str) -> Tuple[int, ...]:
+    """'1.3.6.1' -> (1, 3, 6, 1)"""
+    return tuple(int(arc) for arc in dotted.strip('.').split('.'))
+
+
+# IF-MIB
+IF_NAME = oid('1.3.6.1.2.1.31.1.1.1.1')
+# BRIDGE-MIB
+DOT1D_BASE_PORT_IF_INDEX = oid('1.3.6.1.2.1.17.1.4.1.2')
+DOT1D_TP_FDB_PORT = oid('1.3.6.1.2.1.17.4.3.1.2')
+DOT1D_TP_FDB_STATUS = oid('1.3.6.1.2.1.17.4.3.1.3')
+# Q-BRIDGE-MIB
+DOT1Q_TP_FDB_PORT = oid('1.3.6.1.2.1.17.7.1.2.2.1.2')
+DOT1Q_TP_FDB_STATUS = oid('1.3.6.1.2.1.17.7.1.2.2.1.3')
+DOT1Q_VLAN_FDB_ID = oid('1.3.6.1.2.1.17.7.1.4.2.1.3')
+# IP-MIB
+IP_NET_TO_PHYSICAL_PHYS_ADDRESS = oid('1.3.6.1.2.1.4.35.1.4')
+IP_NET_TO_MEDIA_PHYS_ADDRESS = oid('1.3.6.1.2.1.4.22.1.2')
+# CISCO-VTP-MIB (VLANs for community string indexing)
+VTP_VLAN_STATE = oid('1.3.6.1.4.1.9.9.46.1.3.1.1.2')
+
+# dot1dTpFdbStatus / dot1qTpFdbStatus
+FDB_INVALID = 2
+FDB_LEARNED = 3
+FDB_SELF = 4
+FDB_MGMT = 5
+
+
+# --- BER encoding ------------------------------------------------------------
+
+def _tlv(tag: int, payload: bytes) -> bytes:
+    length = len(payload)
+    if length < 0x80:
+        return bytes((tag, length)) + payload
+    size = (length.bit_length() + 7) // 8
+    return bytes((tag, 0x80 | size)) + length.to_bytes(size, 'big') + payload
+
+
+def _encode_integer(value: int, tag: int = INTEGER) -> bytes:
+    return _tlv(tag, value.to_bytes(max(1, (value.bit_length() + 8) // 8), 'big', signed=True))
+
+
+def _encode_oid(value: Tuple[int, ...]) -> bytes:
+    body = bytearray((value[0] * 40 + value[1],))
+    for arc in value[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        body += bytes(reversed(chunk))
+    return _tlv(OBJECT_IDENTIFIER, bytes(body))
+
+
+def encode_value(tag: int, value) -> bytes:
+    """Encode one varbind value of the given tag"""
+    if tag == INTEGER or tag in _UNSIGNED:
+        return _encode_integer(value, tag)
+    if tag in _STRINGS:
+        return _tlv(tag, value)
+    if tag == OBJECT_IDENTIFIER:
+        return _encode_oid(value)
+    return _tlv(tag, b'')  # NULL and the exception values
+
+
+def encode_message(community: bytes, pdu_type: int, request_id: int, field1: int, field2: int,
+                   varbinds: Iterable[Tuple[Tuple[int, ...], int, object]]) -> bytes:
+    """Encode an SNMPv2c message
+    
+    Args:
+        field1, field2: error-status/error-index, or non-repeaters/max-repetitions for GETBULK
+        varbinds: (oid, tag, value) triples
+    """
+    varbind_list = b''.join(_tlv(SEQUENCE, _encode_oid(name) + encode_value(tag, value))
+                            for name, tag, value in varbinds)
+    pdu = _tlv(pdu_type, _encode_integer(request_id) + _encode_integer(field1) + _encode_integer(field2)
+               + _tlv(SEQUENCE, varbind_list))
+    return _tlv(SEQUENCE, _encode_integer(SNMP_V2C) + _tlv(OCTET_STRING, community) + pdu)
+
+
+# --- BER decoding ------------------------------------------------------------
+
+def _read_tlv(data: bytes, offset: int) -> Tuple[int, int, int]:
+    """Returns (tag, start of the value, end of the value)"""
+    tag = data[offset]
+    length = data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[offset:offset + size], 'big')
+        offset += size
+    end = offset + length
+    if end > len(data):
+        raise ValueError("Truncated BER value")
+    return tag, offset, end
+
+
+def _decode_oid(data: bytes) -> Tuple[int, ...]:
+    first = data[0]
+    arcs = [min(first // 40, 2), first - 40 * min(first // 40, 2)]
+    arc = 0
+    for byte in data[1:]:
+        arc = (arc << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            arcs.append(arc)
+            arc = 0
+    return tuple(arcs)
+
+
+def _decode_value(tag: int, data: bytes):
+    if tag == INTEGER:
+        return int.from_bytes(data, 'big', signed=True)
+    if tag in _UNSIGNED:
+        return int.from_bytes(data, 'big')
+    if tag in _STRINGS:
+        return data
+    if tag == OBJECT_IDENTIFIER:
+        return _decode_oid(data)
+    return None
+
+
+def decode_message(data: bytes) -> Dict:
+    """Decode an SNMPv1/v2c message
+    
+    Returns:
+        {'version', 'community', 'pdu_type', 'request_id', 'field1', 'field2',
+         'varbinds': [(oid, tag, value)]}; SNMPv1 traps have 'enterprise',
+        'agent_address' and the generic/specific trap numbers as field1/field2
+    
+    Raises:
+        ValueError/IndexError on malformed data
+    """
+    tag, offset, end = _read_tlv(data, 0)
+    if tag != SEQUENCE:
+        raise ValueError("Not an SNMP message")
+    
+    fields = []
+    for _ in range(2):
+        tag, start, offset = _read_tlv(data, offset)
+        fields.append(data[start:offset])
+    pdu_type, offset, _ = _read_tlv(data, offset)
+    extra = {}
+    if pdu_type == TRAP_V1:
+        values = []
+        for _ in range(5):
+            tag, start, offset = _read_tlv(data, offset)
+            values.append(_decode_value(tag, data[start:offset]))
+        extra = {'enterprise': values[0], 'agent_address': '.'.join(map(str, values[1]))}
+        fields += [None, values[2], values[3]]
+    else:
+        for _ in range(3):
+            tag, start, offset = _read_tlv(data, offset)
+            fields.append(int.from_bytes(data[start:offset], 'big', signed=True))
+    
+    varbinds = []
+    tag, offset, varbinds_end = _read_tlv(data, offset)
+    while offset < varbinds_end:
+        _, start, offset = _read_tlv(data, offset)
+        _, name_start, name_end = _read_tlv(data, start)
+        tag, value_start, value_end = _read_tlv(data, name_end)
+        varbinds.append((_decode_oid(data[name_start:name_end]), tag, _decode_value(tag, data[value_start:value_end])))
+    
+    return dict(extra, **{
+        'version': int.from_bytes(fields[0], 'big'),
+        'community': fields[1],
+        'pdu_type': pdu_type,
+        'request_id': fields[2],
+        'field1': fields[3],
+        'field2': fields[4],
+        'varbinds': varbinds
+    })
+
+
+def format_mac(octets: bytes) -> str:
+    """b'\\x00\\x1a...' -> 00:1A:..."""
+    return intern(octets.hex(':').upper())
+
+
+# --- Collector ---------------------------------------------------------------
+
+class SnmpCollector:
+    """Reads MAC and ARP tables over SNMPv2c
+    
+    get_mac_address_table(), iter_mac_address_table(), get_arp_table() and
+    iter_arp_table() return the same entries as their SwitchConnector
+    counterparts, so the detector can use either per switch.
+    
+    MAC tables come from Q-BRIDGE-MIB (dot1qTpFdbTable, one walk for all
+    VLANs). Switches without it (Cisco IOS) are read from BRIDGE-MIB once
+    per VLAN with community string indexing ('community@vlan'), with the
+    VLANs taken from CISCO-VTP-MIB. ARP comes from ipNetToPhysicalTable,
+    or the older ipNetToMediaTable.
+    """
+    
+    def __init__(self, host: str, community: str = "public", port: int = 161, timeout: float = 2.0,
+                 retries: int = 2, max_repetitions: int = 25):
+        """
+        Args:
+            host: Switch IP address
+            community: SNMPv2c read community
+            port: Agent UDP port
+            timeout: Seconds to wait for each response
+            retries: Resends after a timeout
+            max_repetitions: Rows per GETBULK request (halved when the agent answers tooBig)
+        """
+        self.host = host
+        self.community = community
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.max_repetitions = max(1, max_repetitions)
+        self.connection = None
+        self.requests = 0
+        self._request_id = int(time.time()) & 0xFFFF
+    
+    def connect(self) -> bool:
+        """Open the UDP socket (SNMP itself is connectionless)"""
+        try:
+            family, socktype, proto, _, address = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_DGRAM)[0]
+            self.connection = socket.socket(family, socktype, proto)
+            self.connection.connect(address)
+            return True
+        except Exception as e:
+            print(f"Failed to open SNMP socket to {self.host}: {e}")
+            self.connection = None
+            return False
+    
+    def disconnect(self):
+        """Close the UDP socket"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+    
+    def __enter__(self):
+        """Context manager entry"""
+        self.connect()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.disconnect()
+    
+    def _get_bulk(self, oids: List[Tuple[int, ...]], community: str = None) -> List[Tuple]:
+        """Send one GETBULK for the given columns and return the response varbinds
+        
+        Raises:
+            TimeoutError if the agent does not answer, ConnectionError on an SNMP error
+        """
+        if not self.connection and not self.connect():
+            raise ConnectionError(f"Could not open SNMP socket to {self.host}")
+        
+        community = (community or self.community).encode()
+        repetitions = self.max_repetitions
+        attempts = 0
+        while True:
+            self._request_id = (self._request_id + 1) & 0x7FFFFFFF
+            request_id = self._request_id
+            self.connection.send(encode_message(community, GET_BULK, request_id, 0, repetitions,
+                                                [(name, NULL, None) for name in oids]))
+            self.requests += 1
+            
+            response = self._receive(request_id)
+            if response is None:
+                attempts += 1
+                if attempts > self.retries:
+                    raise TimeoutError(f"No SNMP response from {self.host} after {attempts} attempt(s)")
+                continue
+            
+            error = response['field1']
+            if error == TOO_BIG and repetitions > 1:
+                repetitions = self.max_repetitions = max(1, repetitions // 2)
+                continue
+            if error:
+                raise ConnectionError(f"SNMP error from {self.host}: {ERROR_NAMES.get(error, error)}")
+            return response['varbinds']
+    
+    def _receive(self, request_id: int) -> Optional[Dict]:
+        """Wait for the response to one request; late answers to earlier requests are dropped"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.connection.settimeout(remaining)
+            try:
+                data = self.connection.recv(65535)
+            except socket.timeout:
+                return None
+            try:
+                response = decode_message(data)
+            except (ValueError, IndexError):
+                continue
+            if response['pdu_type'] == RESPONSE and response['request_id'] == request_id:
+                return response
+    
+    def walk(self, columns: List[Tuple[int, ...]], community: str = None) -> Iterator[Tuple[Tuple[int, ...], List]]:
+        """Walk table columns side by side with GETBULK
+        
+        Yields:
+            (index, [value per column]) in index order; a column without a
+            value for that index gives None
+        """
+        count = len(columns)
+        cursors = list(columns)
+        active = [True] * count
+        pending = [{} for _ in columns]
+        
+        while any(active):
+            requested = [i for i in range(count) if active[i]]
+            varbinds = self._get_bulk([cursors[i] for i in requested], community)
+            
+            # An empty response ends the walk
+            finished = set() if varbinds else set(requested)
+            for position, (name, tag, value) in enumerate(varbinds):
+                column = requested[position % len(requested)]
+                if column in finished:
+                    continue
+                prefix = columns[column]
+                if tag == END_OF_MIB_VIEW or name[:len(prefix)] != prefix or name <= cursors[column]:
+                    finished.add(column)
+                    continue
+                cursors[column] = name
+                if tag not in (NO_SUCH_OBJECT, NO_SUCH_INSTANCE):
+                    pending[column][name[len(prefix):]] = value
+            for column in finished:
+                active[column] = False
+            
+            # Rows up to the slowest unfinished column are complete
+            frontier = min((cursors[i][len(columns[i]):] for i in range(count) if active[i]), default=None)
+            ready = sorted({index for values in pending for index in values
+                            if frontier is None or index <= frontier})
+            for index in ready:
+                yield index, [values.pop(index, None) for values in pending]
+    
+    def _walk_column(self, column: Tuple[int, ...], community: str = None) -> Dict[Tuple[int, ...], object]:
+        return {index: values[0] for index, values in self.walk([column], community)}
+    
+    def _interface_names(self) -> Dict[int, str]:
+        """ifIndex -> canonical port name"""
+        return {index[0]: canonical_port(name.decode(errors='replace'))
+                for index, name in self._walk_column(IF_NAME).items() if name}
+    
+    def _fdb_entries(self, rows, vlan_of, bridge_ports: Dict[int, int], if_names: Dict[int, str]) -> Iterator[Dict]:
+        """Turn (index, [port, status]) forwarding table rows into MAC table entries"""
+        for index, (bridge_port, status) in rows:
+            vlan, mac = vlan_of(index), bytes(index[-6:])
+            if status in (FDB_INVALID, FDB_SELF) or mac[0] & 1 or not bridge_port:
+                continue  # the switch's own MACs, multicast and entries on no port
+            if_index = bridge_ports.get(bridge_port)
+            port = if_names.get(if_index) if if_index is not None else None
+            if port is None:
+                continue
+            yield {
+                'vlan': vlan,
+                'mac_address': format_mac(mac),
+                'type': 'DYNAMIC' if status == FDB_LEARNED or status is None else 'STATIC',
+                'port': port
+            }
+    
+    def iter_mac_address_table(self) -> Iterator[Dict]:
+        """Yield MAC address table entries as the walk progresses
+        
+        Unlike get_mac_address_table(), errors are raised to the caller.
+        """
+        if_names = self._interface_names()
+        bridge_ports = {index[0]: if_index for index, if_index in self._walk_column(DOT1D_BASE_PORT_IF_INDEX).items()}
+        # Filtering database -> VLAN; switches with one FDB per VLAN use the VLAN ID as FDB ID
+        vlan_by_fdb = {fdb: index[-1] for index, fdb in self._walk_column(DOT1Q_VLAN_FDB_ID).items()}
+        
+        found = False
+        rows = self.walk([DOT1Q_TP_FDB_PORT, DOT1Q_TP_FDB_STATUS])
+        for entry in self._fdb_entries(rows, lambda index: vlan_by_fdb.get(index[0], index[0]), bridge_ports, if_names):
+            found = True
+            yield entry
+        if found:
+            return
+        
+        # No Q-BRIDGE-MIB: one BRIDGE-MIB instance per VLAN (Cisco community string indexing)
+        vlans = [index[-1] for index, state in self._walk_column(VTP_VLAN_STATE).items()
+                 if state == 1 and not 1002 <= index[-1] <= 1005]
+        for vlan in vlans or [None]:
+            community = f'{self.community}@{vlan}' if vlan is not None else None
+            if vlan is not None:
+                bridge_ports = {index[0]: if_index for index, if_index
+                                in self._walk_column(DOT1D_BASE_PORT_IF_INDEX, community).items()}
+            rows = self.walk([DOT1D_TP_FDB_PORT, DOT1D_TP_FDB_STATUS], community)
+            yield from self._fdb_entries(rows, lambda index: vlan or 1, bridge_ports, if_names)
+    
+    def get_mac_address_table(self) -> List[Dict]:
+        """Get MAC address table from switch"""
+        try:
+            return list(self.iter_mac_address_table())
+        except Exception as e:
+            print(f"Error getting MAC table over SNMP from {self.host}: {e}")
+            return []
+    
+    def get_mac_address_entries(self, mac_address: str = None, port: str = None) -> List[Dict]:
+        """Get the MAC table entries of one MAC or one port (filtered from a full walk)
+        
+        Unlike get_mac_address_table(), errors are raised to the caller.
+        """
+        port = canonical_port(port) if port else None
+        return [entry for entry in self.iter_mac_address_table()
+                if (not mac_address or entry['mac_address'] == mac_address)
+                and (not port or entry['port'] == port)]
+    
+    def get_mac_address_count(self) -> Optional[Dict]:
+        """MAC table counters are not read over SNMP (the full walk is cheap)"""
+        return None
+    
+    def iter_arp_table(self) -> Iterator[Dict]:
+        """Yield ARP table entries as the walk progresses
+        
+        Unlike get_arp_table(), errors are raised to the caller.
+        """
+        if_names = self._interface_names()
+        
+        found = False
+        # Index: ifIndex, address type (1 = IPv4), address length, address
+        for index, (mac,) in self.walk([IP_NET_TO_PHYSICAL_PHYS_ADDRESS]):
+            if len(index) != 7 or index[1] != 1 or len(mac or b'') != 6 or not any(mac):
+                continue
+            found = True
+            yield {
+                'ip_address': '.'.join(map(str, index[3:])),
+                'mac_address': format_mac(mac),
+                'interface': if_names.get(index[0], str(index[0]))
+            }
+        if found:
+            return
+        
+        # Index: ifIndex, IPv4 address
+        for index, (mac,) in self.walk([IP_NET_TO_MEDIA_PHYS_ADDRESS]):
+            if len(index) != 5 or len(mac or b'') != 6 or not any(mac):
+                continue
+            yield {
+                'ip_address': '.'.join(map(str, index[1:])),
+                'mac_address': format_mac(mac),
+                'interface': if_names.get(index[0], str(index[0]))
+            }
+    
+    def get_arp_table(self) -> List[Dict]:
+        """Get ARP table from switch"""
+        try:
+            return list(self.iter_arp_table())
+        except Exception as e:
+            print(f"Error getting ARP table over SNMP from {self.host}: {e}")
+            return []
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Local SNMP agent for testing and benchmarking SnmpCollector
+
+SnmpAgent answers SNMPv2c GET, GETNEXT and GETBULK from an in-memory MIB
+view on a local UDP port. synthetic_view() builds the BRIDGE-MIB,
+Q-BRIDGE-MIB and IP-MIB view of a synthetic switch
+(switch_transport.SyntheticConnection), so SNMP and SSH collection can be
+compared on the same tables. The view can also be written as an snmpsim
+.snmprec file to serve it with snmpsim instead:
+
+    python snmp_simulator.py <directory> [mac_entries]
+    snmpsim-command-responder --data-dir=<directory> --agent-udpv4-endpoint=127.0.0.1:1161
+"""
+import bisect
+import os
+import socket
+import sys
+import threading
+from typing import Dict, Optional, Tuple
+
+from snmp_collector import (
+    decode_message, encode_message, END_OF_MIB_VIEW, GET, GET_BULK, GET_NEXT, NO_SUCH_OBJECT, RESPONSE,
+    TOO_BIG, INTEGER, OCTET_STRING, OBJECT_IDENTIFIER, IP_ADDRESS, GAUGE32, OPAQUE, IF_NAME,
+    DOT1D_BASE_PORT_IF_INDEX, DOT1Q_TP_FDB_PORT, DOT1Q_TP_FDB_STATUS, DOT1Q_VLAN_FDB_ID,
+    IP_NET_TO_PHYSICAL_PHYS_ADDRESS, FDB_LEARNED, FDB_MGMT
+)
+from switch_parsers import CISCO_IOS
+
+
+class MibView:
+    """Sorted (oid -> (tag, value)) table with GETNEXT lookups"""
+    
+    def __init__(self, objects: Dict[Tuple[int, ...], Tuple[int, object]]):
+        self.oids = sorted(objects)
+        self.values = [objects[name] for name in self.oids]
+    
+    def get(self, name: Tuple[int, ...]) -> Tuple[int, object]:
+        position = bisect.bisect_left(self.oids, name)
+        if position < len(self.oids) and self.oids[position] == name:
+            return self.values[position]
+        return NO_SUCH_OBJECT, None
+    
+    def next(self, name: Tuple[int, ...]) -> Tuple[Tuple[int, ...], int, object]:
+        position = bisect.bisect_right(self.oids, name)
+        if position >= len(self.oids):
+            return name, END_OF_MIB_VIEW, None
+        return (self.oids[position],) + self.values[position]
+    
+    def __len__(self):
+        return len(self.oids)
+
+
+class SnmpAgent:
+    """SNMPv2c agent on a local UDP port, serving one MIB view per community
+    
+    Requests for an unknown community are dropped, as a real agent does.
+    GETBULK responses larger than max_message_size are cut short; other
+    requests get tooBig.
+    """
+    
+    def __init__(self, views: Dict[str, MibView], host: str = "127.0.0.1", port: int = 0,
+                 max_message_size: int = 65000):
+        """
+        Args:
+            views: community -> MIB view
+            host: Address to listen on
+            port: UDP port (0 = pick a free one, see self.port)
+            max_message_size: Largest response sent
+        """
+        self.views = views
+        self.max_message_size = max_message_size
+        self.requests = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((host, port))
+        self.host, self.port = self._socket.getsockname()
+        self._thread = None
+    
+    def start(self):
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self._serve, name='snmp-agent', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Close the socket and stop serving"""
+        self._socket.close()
+        if self._thread:
+            self._thread.join(timeout=2)
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+    
+    def _serve(self):
+        while True:
+            try:
+                data, address = self._socket.recvfrom(65535)
+            except OSError:
+                return
+            try:
+                response = self.handle(data)
+            except (ValueError, IndexError):
+                continue
+            if response:
+                self._socket.sendto(response, address)
+    
+    def handle(self, data: bytes) -> Optional[bytes]:
+        """Answer one request message (None = drop it)"""
+        request = decode_message(data)
+        view = self.views.get(request['community'].decode(errors='replace'))
+        if view is None:
+            return None
+        self.requests += 1
+        
+        pdu_type, names = request['pdu_type'], [name for name, _, _ in request['varbinds']]
+        if pdu_type == GET:
+            varbinds = [(name,) + view.get(name) for name in names]
+        elif pdu_type == GET_NEXT:
+            varbinds = [view.next(name) for name in names]
+        elif pdu_type == GET_BULK:
+            non_repeaters = min(len(names), max(0, request['field1']))
+            varbinds = [view.next(name) for name in names[:non_repeaters]]
+            cursors = names[non_repeaters:]
+            for _ in range(max(0, request['field2']) if cursors else 0):
+                row = [view.next(name) for name in cursors]
+                varbinds.extend(row)
+                cursors = [name for name, _, _ in row]
+                if all(tag == END_OF_MIB_VIEW for _, tag, _ in row):
+                    break
+        else:
+            return None
+        
+        community, request_id = request['community'], request['request_id']
+        response = encode_message(community, RESPONSE, request_id, 0, 0, varbinds)
+        # GETBULK answers are cut to fit; anything else that does not fit is tooBig
+        while len(response) > self.max_message_size and pdu_type == GET_BULK and len(varbinds) > len(names):
+            varbinds = varbinds[:max(len(names), len(varbinds) // 2 // len(names) * len(names))]
+            response = encode_message(community, RESPONSE, request_id, 0, 0, varbinds)
+        if len(response) > self.max_message_size:
+            response = encode_message(community, RESPONSE, request_id, TOO_BIG, 0, request['varbinds'])
+        return response
+
+
+def synthetic_view(connection) -> MibView:
+    """BRIDGE-MIB, Q-BRIDGE-MIB and IP-MIB view of a synthetic switch's current tables
+    
+    Built from the switch's own CLI output, so an SNMP walk returns exactly
+    what SSH collection parses. Ports get ifIndex/bridge port 1.., VLAN
+    interfaces ifIndex 5000 + VLAN.
+    
+    Args:
+        connection: switch_transport.SyntheticConnection
+    """
+    objects = {}
+    if_indexes = {}
+    
+    def interface(name: str) -> int:
+        if name not in if_indexes:
+            vlan = name[2:] if name.startswith('Vl') else None
+            if_index = 5000 + int(vlan) if vlan and vlan.isdigit() else len(if_indexes) + 1
+            if_indexes[name] = if_index
+            objects[IF_NAME + (if_index,)] = (OCTET_STRING, name.encode())
+            if vlan is None:
+                objects[DOT1D_BASE_PORT_IF_INDEX + (if_index,)] = (INTEGER, if_index)
+        return if_indexes[name]
+    
+    for entry in CISCO_IOS.parse_interface_status(connection.send_command(CISCO_IOS.interface_status_command)):
+        interface(entry['port'])
+    
+    for entry in CISCO_IOS.parse_mac_table(connection.send_command(CISCO_IOS.mac_table_command)):
+        index = (entry['vlan'],) + tuple(bytes.fromhex(entry['mac_address'].replace(':', '')))
+        objects[DOT1Q_TP_FDB_PORT + index] = (INTEGER, interface(entry['port']))
+        objects[DOT1Q_TP_FDB_STATUS + index] = (INTEGER, FDB_LEARNED if entry['type'] == 'DYNAMIC' else FDB_MGMT)
+        objects[DOT1Q_VLAN_FDB_ID + (0, entry['vlan'])] = (GAUGE32, entry['vlan'])
+    
+    for entry in CISCO_IOS.parse_arp_table(connection.send_command(CISCO_IOS.arp_command)):
+        index = (interface(entry['interface']), 1, 4) + tuple(int(octet) for octet in entry['ip_address'].split('.'))
+        objects[IP_NET_TO_PHYSICAL_PHYS_ADDRESS + index] = (OCTET_STRING, bytes.fromhex(entry['mac_address'].replace(':', '')))
+    
+    return MibView(objects)
+
+
+def write_snmprec(view: MibView, path: str):
+    """Write a view as an snmpsim .snmprec file (the file name is the community)"""
+    with open(path, 'w') as handle:
+        for name, (tag, value) in zip(view.oids, view.values):
+            dotted = '.'.join(map(str, name))
+            if tag in (OCTET_STRING, OPAQUE):
+                handle.write(f'{dotted}|{tag}x|{value.hex()}\n')
+            elif tag in (IP_ADDRESS, OBJECT_IDENTIFIER):
+                handle.write(f'{dotted}|{tag}|{".".join(map(str, value))}\n')
+            else:
+                handle.write(f'{dotted}|{tag}|{value}\n')
+
+
+if __name__ == "__main__":
+    from switch_transport import SyntheticConnection
+    
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    directory = sys.argv[1]
+    os.makedirs(directory, exist_ok=True)
+    switch = SyntheticConnection('10.255.0.1', mac_entries=int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
+    view = synthetic_view(switch)
+    write_snmprec(view, os.path.join(directory, 'public.snmprec'))
+    print(f"Wrote {len(view)} objects to {os.path.join(directory, 'public.snmprec')} (community 'public')")
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Local SSH server emulating Cisco IOS switches, for testing and benchmarking AsyncSwitchConnector
+
+SshSwitchServer serves one simulated switch (switch_transport.SimulatedConnection)
+per listen address over an interactive SSH shell with the IOS prompt,
+enable mode, terminal settings and config mode, so AsyncSwitchConnector
+and netmiko can be run against a fleet without hardware. Command latency
+is awaited, not slept, so one server process can stand in for hundreds of
+slow switches.
+
+    python ssh_simulator.py <switches> [port] [mac_entries] [latency_seconds] [uplink_mac_entries]
+
+listens on 127.0.0.1, 127.0.0.2, ... (one synthetic switch per address,
+250 per /24) with username, password and enable secret 'admin'. With
+uplink_mac_entries, each switch also has two trunk uplinks with CDP/LLDP
+neighbors carrying that many upstream MACs. Requires asyncssh.
+"""
+import asyncio
+import sys
+from typing import Dict
+
+import asyncssh
+
+from switch_transport import INVALID_INPUT, SyntheticConnection
+
+CONFIG_BANNER = 'Enter configuration commands, one per line.  End with CNTL/Z.'
+
+
+class _PasswordAuth(asyncssh.SSHServer):
+    def __init__(self, username: str, password: str):
+        self.username = username
+        self.password = password
+    
+    def begin_auth(self, username: str) -> bool:
+        return True
+    
+    def password_auth_supported(self) -> bool:
+        return True
+    
+    def validate_password(self, username: str, password: str) -> bool:
+        return username == self.username and password == self.password
+
+
+class SshSwitchServer:
+    """SSH server with one simulated IOS switch per listen address"""
+    
+    def __init__(self, switches: Dict[str, object], port: int = 0, username: str = 'admin',
+                 password: str = 'admin', enable_secret: str = 'admin'):
+        """
+        Args:
+            switches: listen address -> SimulatedConnection serving its commands
+            port: TCP port on every address (0 = pick a free one, see self.port)
+            username/password: Accepted login
+            enable_secret: Enable password (empty = sessions start in privileged mode)
+        """
+        self.switches = switches
+        self.port = port
+        self.username = username
+        self.password = password
+        self.enable_secret = enable_secret
+        self.sessions = 0
+        self.commands = 0
+        self._listeners = []
+    
+    async def start(self):
+        """Listen on every switch address"""
+        host_key = asyncssh.generate_private_key('ssh-ed25519')
+        for host in self.switches:
+            listener = await asyncssh.listen(
+                host, self.port, server_host_keys=[host_key],
+                server_factory=lambda: _PasswordAuth(self.username, self.password),
+                process_factory=lambda process, host=host: self._shell(host, process),
+                # Echo each line when it is read, as IOS does, so pipelined
+                # input interleaves with the prompts
+                line_editor=False
+            )
+            self.port = listener.get_port()
+            self._listeners.append(listener)
+        return self
+    
+    async def stop(self):
+        for listener in self._listeners:
+            listener.close()
+            await listener.wait_closed()
+        self._listeners = []
+    
+    async def _shell(self, host: str, process):
+        connection = self.switches[host]
+        hostname = connection.prompt.rstrip('#>')
+        privileged = not self.enable_secret
+        mode = None  # 'config' or 'config-if' in config mode
+        pending = []
+        self.sessions += 1
+        
+        def prompt() -> str:
+            if mode:
+                return f'{hostname}({mode})#'
+            return hostname + ('#' if privileged else '>')
+        
+        process.stdout.write(f'\r\n{prompt()}')
+        try:
+            while True:
+                try:
+                    line = await process.stdin.readline()
+                except (asyncssh.BreakReceived, asyncssh.SignalReceived, asyncssh.TerminalSizeChanged):
+                    continue
+                if not line:
+                    break
+                process.stdout.write(line.rstrip('\r\n') + '\r\n')
+                command = line.strip()
+                output = ''
+                self.commands += 1
+                
+                if mode:
+                    # Applied on leaving config mode; valid IOS config lines print nothing
+                    if command == 'end' or (command == 'exit' and mode == 'config'):
+                        connection.send_config_set(pending)
+                        mode, pending = None, []
+                    elif command == 'exit':
+                        mode = 'config'
+                    elif command:
+                        pending.append(command)
+                        if command.startswith('interface '):
+                            mode = 'config-if'
+                elif not command or command.startswith('terminal '):
+                    pass
+                elif command in ('exit', 'logout', 'quit'):
+                    break
+                elif command == 'enable':
+                    if not privileged:
+                        process.stdout.write('Password: ')
+                        secret = (await process.stdin.readline()).strip()
+                        process.stdout.write('\r\n')
+                        privileged = secret == self.enable_secret
+                        output = '' if privileged else '% Access denied'
+                elif not privileged and not command.startswith('show '):
+                    output = f'{command}{INVALID_INPUT}'
+                elif command in ('configure terminal', 'conf t'):
+                    mode = 'config'
+                    output = CONFIG_BANNER
+                elif command in ('write memory', 'copy running-config startup-config'):
+                    output = connection.save_config()
+                else:
+                    output, latency = connection.command_output(command)
+                    if latency > 0:
+                        await asyncio.sleep(latency)
+                
+                if output:
+                    process.stdout.write(output.strip('\n').replace('\n', '\r\n') + '\r\n')
+                process.stdout.write(prompt())
+        except (asyncssh.ConnectionLost, BrokenPipeError):
+            pass
+        finally:
+            process.exit(0)
+
+
+def synthetic_hosts(switches: int):
+    """Listen addresses of a synthetic fleet: 127.0.0.1-250, 127.0.1.1-250, ..."""
+    return [f'127.0.{i // 250}.{1 + i % 250}' for i in range(switches)]
+
+
+async def serve_synthetic(switches: int, port: int = 0, mac_entries: int = 1000, latency: float = 0.0,
+                          uplink_mac_entries: int = 0):
+    """Serve synthetic switches on 127.0.0.1.. until cancelled"""
+    hosts = synthetic_hosts(switches)
+    server = SshSwitchServer({host: SyntheticConnection(host, mac_entries=mac_entries, latency=latency,
+                                                        uplink_mac_entries=uplink_mac_entries)
+                              for host in hosts}, port=port)
+    await server.start()
+    print(f"Listening on {hosts[0]}-{hosts[-1]} port {server.port} "
+          f"({len(hosts)} switches, {mac_entries} MACs each, user/password/enable 'admin')", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    try:
+        asyncio.run(serve_synthetic(
+            int(sys.argv[1]),
+            int(sys.argv[2]) if len(sys.argv) > 2 else 0,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 1000,
+            float(sys.argv[4]) if len(sys.argv) > 4 else 0.0,
+            int(sys.argv[5]) if len(sys.argv) > 5 else 0
+        ))
+    except KeyboardInterrupt:
+        pass
@@ -1,36 +1,45 @@
 """
 Switch connection and management for Cisco switches
+
+Show commands and output parsing are picked per device_type from the
+switch_parsers platform registry (Cisco IOS/IOS-XE, NX-OS, Arista EOS,
+Juniper Junos).
 """
 from netmiko import ConnectHandler
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional
 import re
+import time
+
+from switch_parsers import canonical_port, get_platform
 
 
 class SwitchConnector:
     """Manages connection to Cisco switch and retrieves device information"""
     
-    def __init__(self, host, username, password, device_type="cisco_ios", port=22, secret=""):
+    def __init__(self, host, username, password, device_type="cisco_ios", port=22, secret="", transport=None,
+                 connect_timeout: float = 10):
         self.host = host
         self.username = username
         self.password = password
         self.device_type = device_type
+        self.platform = get_platform(device_type)
         self.port = port
         self.secret = secret
+        self.connect_timeout = connect_timeout
         self.connection = None
+        # Why the last connect() failed (None after a successful one)
+        self.last_error = None
+        # Optional transport(connector) -> connection replacing the SSH session
+        # (record/replay/synthetic, see switch_transport)
+        self.transport = transport
+        # Optional callback(host) that defers saving config changes (e.g.
+        # ConfigSaveCoalescer.mark_dirty); without it changes are saved at once
+        self.mark_dirty = None
     
     def connect(self) -> bool:
         """Establish SSH connection to switch"""
         try:
-            self.connection = ConnectHandler(
-                device_type=self.device_type,
-                host=self.host,
-                username=self.username,
-                password=self.password,
-                port=self.port,
-                secret=self.secret if self.secret else "",
-                timeout=10,
-                session_timeout=30
-            )
+            self.connection = self.transport(self) if self.transport else self.open_ssh()
             
             # Enter enable mode if we have a secret
             if self.secret:
@@ -40,17 +49,58 @@ class SwitchConnector:
                 except:
                     print(f"Warning: Could not enter enable mode on {self.host}")
             
+            self.last_error = None
             return True
         except Exception as e:
+            self.last_error = str(e) or type(e).__name__
             print(f"Failed to connect to switch: {e}")
             return False
     
+    def open_ssh(self):
+        """Open a netmiko SSH session to the switch"""
+        return ConnectHandler(
+            device_type=self.device_type,
+            host=self.host,
+            username=self.username,
+            password=self.password,
+            port=self.port,
+            secret=self.secret if self.secret else "",
+            conn_timeout=self.connect_timeout,
+            timeout=10,
+            session_timeout=30
+        )
+    
     def disconnect(self):
         """Close SSH connection"""
         if self.connection:
-            self.connection.disconnect()
+            try:
+                self.connection.disconnect()
+            except Exception as e:
+                print(f"Error disconnecting from {self.host}: {e}")
             self.connection = None
     
+    def save_config(self) -> bool:
+        """Write the running-config to startup-config"""
+        if not self.connection:
+            if not self.connect():
+                return False
+        
+        try:
+            self.connection.save_config()
+            return True
+        except Exception as e:
+            print(f"Error saving configuration on {self.host}: {e}")
+            return False
+    
+    def is_alive(self) -> bool:
+        """Check that the SSH session still answers (also serves as a keepalive)"""
+        if not self.connection:
+            return False
+        try:
+            return bool(self.connection.is_alive())
+        except Exception:
+            return False
+    
     def get_mac_address_table(self) -> List[Dict]:
         """Get MAC address table from switch"""
         if not self.connection:
@@ -58,37 +108,167 @@ class SwitchConnector:
                 return []
         
         try:
-            output = self.connection.send_command("show mac address-table")
+            output = self.connection.send_command(self.platform.mac_table_command)
             return self._parse_mac_table(output)
         except Exception as e:
             print(f"Error getting MAC table: {e}")
             return []
     
-    def _parse_mac_table(self, output: str) -> List[Dict]:
-        """Parse MAC address table output"""
-        devices = []
+    def iter_mac_address_table(self) -> Iterator[Dict]:
+        """Yield MAC address table entries as the output is read from the switch
         
-        # Pattern for Cisco MAC address table
-        # Example: 1    aabb.cc00.1000    DYNAMIC     Et0/1
-        pattern = r'(\d+)\s+([0-9a-f.]+)\s+(\w+)\s+([\w/]+)'
+        Unlike get_mac_address_table(), errors are raised to the caller.
+        """
+        if not self.connection:
+            if not self.connect():
+                raise ConnectionError(f"Could not connect to {self.host}")
         
-        for line in output.split('\n'):
-            match = re.search(pattern, line, re.IGNORECASE)
-            if match:
-                vlan, mac, entry_type, port = match.groups()
+        platform = self.platform
+        yield from platform.iter_mac_table(self._iter_command_lines(platform.mac_table_command))
+    
+    def get_mac_address_count(self) -> Optional[Dict]:
+        """Get the MAC table counters per VLAN ('show mac address-table count')
+        
+        Returns:
+            {vlan: {counter: value}}, or None if the platform has no
+            counters or the command failed
+        """
+        platform = self.platform
+        if not platform.mac_count_command:
+            return None
+        
+        if not self.connection:
+            if not self.connect():
+                return None
+        
+        try:
+            output = self.connection.send_command(platform.mac_count_command)
+            return platform.parse_mac_count(output) or None
+        except Exception as e:
+            print(f"Error getting MAC table counters: {e}")
+            return None
+    
+    def get_mac_address_table_for_vlans(self, vlans) -> Optional[List[Dict]]:
+        """Get the MAC table entries of some VLANs only
+        
+        Unlike get_mac_address_table(), errors are raised to the caller.
+        
+        Returns:
+            The entries, or None if the platform can't list one VLAN
+            (SwitchTableCache.plan() is told so and never asks)
+        """
+        platform = self.platform
+        if not platform.mac_table_vlan_command:
+            return None
+        
+        if not self.connection:
+            if not self.connect():
+                raise ConnectionError(f"Could not connect to {self.host}")
+        
+        entries = []
+        for vlan in vlans:
+            output = self.connection.send_command(platform.mac_table_vlan_command.format(vlan=vlan))
+            entries.extend(platform.parse_mac_table(output))
+        return entries
+    
+    def get_mac_address_entries(self, mac_address: str = None, port: str = None) -> List[Dict]:
+        """Get the MAC table entries of one MAC or one port
+        
+        Uses the platform's targeted show command, or filters the full table
+        on platforms without one. Unlike get_mac_address_table(), errors are
+        raised to the caller.
+        """
+        if not self.connection:
+            if not self.connect():
+                raise ConnectionError(f"Could not connect to {self.host}")
+        
+        output = self.connection.send_command(self._mac_entries_command(mac_address, port))
+        return self._filter_mac_entries(self.platform.parse_mac_table(output), mac_address, port)
+    
+    def _mac_entries_command(self, mac_address: str = None, port: str = None) -> str:
+        """Show command listing one MAC's or one port's entries (the full table if the platform has none)"""
+        platform = self.platform
+        if mac_address and platform.mac_table_address_command:
+            digits = mac_address.replace(':', '').lower()
+            dotted = f'{digits[0:4]}.{digits[4:8]}.{digits[8:12]}'
+            return platform.mac_table_address_command.format(mac=dotted)
+        if port and not mac_address and platform.mac_table_interface_command:
+            return platform.mac_table_interface_command.format(port=port)
+        return platform.mac_table_command
+    
+    def _filter_mac_entries(self, entries: List[Dict], mac_address: str = None, port: str = None) -> List[Dict]:
+        """Keep the entries of one MAC or one port"""
+        port = canonical_port(port) if port else None
+        return [entry for entry in entries
+                if (not mac_address or entry['mac_address'] == mac_address)
+                and (not port or entry['port'] == port)]
+    
+    def _iter_command_lines(self, command: str, read_timeout: float = 60) -> Iterator[str]:
+        """Run a command and yield its output lines as they arrive on the channel
+        
+        Lines are yielded as soon as they are complete, so parsing overlaps
+        with the transfer and the full output is never held in memory. Stops
+        at the device prompt; read_timeout is the longest silence tolerated.
+        If the consumer stops early, the rest of the output is drained so the
+        session can be reused (or the session is dropped if that fails).
+        """
+        prompt = self.connection.find_prompt().strip()
+        self.connection.write_channel(command + self.connection.RETURN)
+        
+        buffer = ''
+        echo_skipped = False
+        finished = False
+        deadline = time.monotonic() + read_timeout
+        try:
+            while True:
+                chunk = self.connection.read_channel()
+                if not chunk:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"No output from {self.host} for {read_timeout}s running '{command}'")
+                    time.sleep(0.01)
+                    continue
                 
-                # Normalize MAC address format
-                mac = mac.replace('.', '').upper()
-                mac = ':'.join([mac[i:i+2] for i in range(0, 12, 2)])
+                deadline = time.monotonic() + read_timeout
+                lines = (buffer + chunk).split('\n')
+                buffer = lines.pop()
+                for line in lines:
+                    if not echo_skipped:
+                        echo_skipped = True
+                        if command in line:
+                            continue
+                    yield line.rstrip('\r')
                 
-                devices.append({
-                    'vlan': int(vlan),
-                    'mac_address': mac,
-                    'type': entry_type,
-                    'port': port
-                })
+                if buffer.strip() == prompt:
+                    finished = True
+                    return
+        finally:
+            if not finished:
+                self._drain_to_prompt(prompt, read_timeout)
+    
+    def _drain_to_prompt(self, prompt: str, read_timeout: float):
+        """Discard channel output up to the prompt, or drop the session"""
+        if not self.connection:
+            return
         
-        return devices
+        buffer = ''
+        deadline = time.monotonic() + read_timeout
+        try:
+            while time.monotonic() < deadline:
+                chunk = self.connection.read_channel()
+                if chunk:
+                    buffer = (buffer + chunk)[-len(prompt) - 16:]
+                    if buffer.rstrip().endswith(prompt):
+                        return
+                else:
+                    time.sleep(0.01)
+        except Exception:
+            pass
+        # Output state is unknown - don't hand this session to anyone else
+        self.disconnect()
+    
+    def _parse_mac_table(self, output: str) -> List[Dict]:
+        """Parse MAC address table output"""
+        return self.platform.parse_mac_table(output)
     
     def get_arp_table(self) -> List[Dict]:
         """Get ARP table from switch"""
@@ -97,81 +277,45 @@ class SwitchConnector:
                 return []
         
         try:
-            output = self.connection.send_command("show arp")
+            output = self.connection.send_command(self.platform.arp_command)
             return self._parse_arp_table(output)
         except Exception as e:
             print(f"Error getting ARP table: {e}")
             return []
     
-    def _parse_arp_table(self, output: str) -> List[Dict]:
-        """Parse ARP table output"""
-        entries = []
-        
-        # Pattern for Cisco ARP table
-        # Example: Internet  192.168.1.10         0   aabb.cc00.1000  ARPA   Vlan1
-        pattern = r'Internet\s+(\d+\.\d+\.\d+\.\d+)\s+\d+\s+([0-9a-f.]+)\s+\w+\s+([\w/]+)'
+    def iter_arp_table(self) -> Iterator[Dict]:
+        """Yield ARP table entries as the output is read from the switch
         
-        for line in output.split('\n'):
-            match = re.search(pattern, line, re.IGNORECASE)
-            if match:
-                ip, mac, interface = match.groups()
-                
-                # Normalize MAC address format
-                mac = mac.replace('.', '').upper()
-                mac = ':'.join([mac[i:i+2] for i in range(0, 12, 2)])
-                
-                entries.append({
-                    'ip_address': ip,
-                    'mac_address': mac,
-                    'interface': interface
-                })
+        Unlike get_arp_table(), errors are raised to the caller.
+        """
+        if not self.connection:
+            if not self.connect():
+                raise ConnectionError(f"Could not connect to {self.host}")
         
-        return entries
+        platform = self.platform
+        yield from platform.iter_arp_table(self._iter_command_lines(platform.arp_command))
+    
+    def _parse_arp_table(self, output: str) -> List[Dict]:
+        """Parse ARP table output"""
+        return self.platform.parse_arp_table(output)
     
     def shutdown_port(self, port_name: str) -> bool:
         """Shutdown a specific switch port"""
-        if not self.connection:
-            if not self.connect():
-                return False
-        
-        try:
-            commands = [
-                f'interface {port_name}',
-                'shutdown',
-                'exit'
-            ]
-            
-            output = self.connection.send_config_set(commands)
-            self.connection.save_config()
-            
+        result = self.apply_port_states([{'port': port_name, 'action': 'shutdown'}])[port_name]
+        if result['success']:
             print(f"Port {port_name} has been shutdown")
-            return True
-        except Exception as e:
-            print(f"Error shutting down port {port_name}: {e}")
-            return False
+        else:
+            print(f"Error shutting down port {port_name}: {result['error']}")
+        return result['success']
     
     def change_port_vlan(self, port_name: str, vlan_id: int) -> bool:
         """Change port to a different VLAN"""
-        if not self.connection:
-            if not self.connect():
-                return False
-        
-        try:
-            commands = [
-                f'interface {port_name}',
-                'switchport mode access',
-                f'switchport access vlan {vlan_id}',
-                'exit'
-            ]
-            
-            output = self.connection.send_config_set(commands)
-            self.connection.save_config()
-            
+        result = self.apply_port_states([{'port': port_name, 'action': 'vlan', 'vlan': vlan_id}])[port_name]
+        if result['success']:
             print(f"Port {port_name} moved to VLAN {vlan_id}")
-            return True
-        except Exception as e:
-            print(f"Error changing port {port_name} to VLAN {vlan_id}: {e}")
-            return False
+        else:
+            print(f"Error changing port {port_name} to VLAN {vlan_id}: {result['error']}")
+        return result['success']
     
     def get_port_vlan(self, port_name: str) -> Optional[int]:
         """Get the current VLAN of a port"""
@@ -181,68 +325,162 @@ class SwitchConnector:
         
         try:
             output = self.connection.send_command(f"show interface {port_name} switchport")
-            
-            # Parse VLAN from output
-            for line in output.split('\n'):
-                if 'Access Mode VLAN' in line or 'Operational Mode VLAN' in line:
-                    parts = line.split(':')
-                    if len(parts) > 1:
-                        vlan_info = parts[1].strip().split()[0]
-                        try:
-                            return int(vlan_info)
-                        except:
-                            continue
-            
-            return None
+            return self._parse_port_vlan(output)
         except Exception as e:
             print(f"Error getting VLAN for port {port_name}: {e}")
             return None
     
+    def _parse_port_vlan(self, output: str) -> Optional[int]:
+        """Parse the access VLAN from 'show interface <port> switchport'"""
+        for line in output.split('\n'):
+            if 'Access Mode VLAN' in line or 'Operational Mode VLAN' in line:
+                parts = line.split(':')
+                if len(parts) > 1:
+                    vlan_info = parts[1].strip().split()[0]
+                    try:
+                        return int(vlan_info)
+                    except:
+                        continue
+        
+        return None
+    
     def quarantine_port_vlan(self, port_name: str, quarantine_vlan: int) -> bool:
         """Move port to quarantine VLAN (keeps port enabled, just isolates to different VLAN)"""
-        if not self.connection:
-            if not self.connect():
-                return False
-        
-        try:
-            commands = [
-                f'interface {port_name}',
-                'switchport mode access',
-                f'switchport access vlan {quarantine_vlan}',
-                'no shutdown',  # Ensure port stays up
-                'exit'
-            ]
-            
-            output = self.connection.send_config_set(commands)
-            self.connection.save_config()
-            
+        result = self.apply_port_states([{'port': port_name, 'action': 'quarantine', 'vlan': quarantine_vlan}])[port_name]
+        if result['success']:
             print(f"Port {port_name} quarantined to VLAN {quarantine_vlan}")
-            return True
-        except Exception as e:
-            print(f"Error quarantining port {port_name} to VLAN {quarantine_vlan}: {e}")
-            return False
+        else:
+            print(f"Error quarantining port {port_name} to VLAN {quarantine_vlan}: {result['error']}")
+        return result['success']
     
     def enable_port(self, port_name: str) -> bool:
         """Enable a specific switch port"""
+        result = self.apply_port_states([{'port': port_name, 'action': 'enable'}])[port_name]
+        if result['success']:
+            print(f"Port {port_name} has been enabled")
+        else:
+            print(f"Error enabling port {port_name}: {result['error']}")
+        return result['success']
+    
+    def plan_port_states(self, changes: List[Dict]) -> Dict[str, Dict]:
+        """Merge intended port states into one target state per port
+        
+        Each change is a dict with 'port', 'action' and, for 'quarantine' and
+        'vlan', the access 'vlan':
+            quarantine - move to the VLAN and keep the port up
+            vlan       - move to the VLAN
+            shutdown   - shut the port down
+            enable     - bring the port up
+        Later changes to the same port override earlier ones field by field,
+        so five quarantine requests for one port become one.
+        
+        Returns:
+            Dict mapping port -> {'vlan': int or None, 'shutdown': bool or None, 'requests': int}
+        """
+        plan = {}
+        for change in changes:
+            action = change.get('action')
+            if action not in ('quarantine', 'vlan', 'shutdown', 'enable'):
+                raise ValueError(f"Unknown port action: {action}")
+            
+            state = plan.setdefault(change['port'], {'vlan': None, 'shutdown': None, 'requests': 0})
+            state['requests'] += 1
+            if action in ('quarantine', 'vlan'):
+                state['vlan'] = int(change['vlan'])
+            if action in ('quarantine', 'enable'):
+                state['shutdown'] = False
+            elif action == 'shutdown':
+                state['shutdown'] = True
+        return plan
+    
+    def _render_port_config(self, plan: Dict[str, Dict]) -> List[str]:
+        """Render a port plan as one list of config-mode commands"""
+        commands = []
+        for port, state in plan.items():
+            commands.append(f'interface {port}')
+            if state['vlan'] is not None:
+                commands.append('switchport mode access')
+                commands.append(f"switchport access vlan {state['vlan']}")
+            if state['shutdown'] is True:
+                commands.append('shutdown')
+            elif state['shutdown'] is False:
+                commands.append('no shutdown')
+            commands.append('exit')
+        return commands
+    
+    def _port_errors_from_output(self, output: str, ports) -> Dict[str, str]:
+        """Attribute error lines in echoed config output to their interface
+        
+        Only lines matching the platform's config_error_line count, so
+        informational '%' messages don't fail a port. Errors before the
+        first interface line are reported under None.
+        """
+        ports = set(ports)
+        errors = {}
+        current = None
+        for line in output.splitlines():
+            stripped = line.strip()
+            match = re.search(r'#\s*interface\s+(\S+)\s*$', stripped)
+            if match:
+                current = match.group(1) if match.group(1) in ports else None
+            elif self.platform.config_error_line.match(stripped):
+                # A '^' marker is followed by its message, which is the better error text
+                if errors.get(current, '^') == '^':
+                    errors[current] = stripped
+        return errors
+    
+    def _port_results_from_output(self, results: Dict[str, Dict], output: str):
+        """Mark each port of apply_port_states() results as succeeded or failed from the config output"""
+        errors = self._port_errors_from_output(output or '', results)
+        for port, result in results.items():
+            # An error outside any interface block (e.g. entering config mode) fails every port
+            result['error'] = errors.get(port) or errors.get(None)
+            result['success'] = result['error'] is None
+    
+    def apply_port_states(self, changes: List[Dict], save: bool = True) -> Dict[str, Dict]:
+        """Push many intended port states in a single config-mode session
+        
+        Changes are merged with plan_port_states() and sent with one
+        send_config_set, so quarantining 200 ports costs one SSH exchange
+        instead of 200. With save, the config is saved once afterwards, or
+        handed to mark_dirty when a save coalescer is attached.
+        
+        Returns:
+            Dict mapping port -> {'success': bool, 'error': str or None,
+            'vlan': int or None, 'shutdown': bool or None, 'requests': int}
+        """
+        plan = self.plan_port_states(changes)
+        results = {port: dict(state, success=False, error=None) for port, state in plan.items()}
+        if not plan:
+            return results
+        
+        if not self.platform.port_config:
+            for result in results.values():
+                result['error'] = f"Port configuration is not supported on {self.platform.name}"
+            return results
+        
         if not self.connection:
             if not self.connect():
-                return False
+                for result in results.values():
+                    result['error'] = f"Could not connect to {self.host}"
+                return results
         
         try:
-            commands = [
-                f'interface {port_name}',
-                'no shutdown',
-                'exit'
-            ]
-            
-            output = self.connection.send_config_set(commands)
-            self.connection.save_config()
-            
-            print(f"Port {port_name} has been enabled")
-            return True
+            output = self.connection.send_config_set(self._render_port_config(plan))
         except Exception as e:
-            print(f"Error enabling port {port_name}: {e}")
-            return False
+            for result in results.values():
+                result['error'] = str(e)
+            return results
+        
+        self._port_results_from_output(results, output)
+        
+        if save and any(result['success'] for result in results.values()):
+            if self.mark_dirty:
+                self.mark_dirty(self.host)
+            else:
+                self.save_config()
+        
+        return results
     
     def get_interface_status(self, port_name: str = None) -> List[Dict]:
         """Get status of interfaces"""
@@ -257,66 +495,25 @@ class SwitchConnector:
                 return self._parse_single_interface_status(output, port_name)
             else:
                 # Get all ports status
-                output = self.connection.send_command("show interfaces status")
+                output = self.connection.send_command(self.platform.interface_status_command)
                 return self._parse_interface_status(output)
         except Exception as e:
             print(f"Error getting interface status: {e}")
             return []
     
     def _parse_interface_status(self, output: str) -> List[Dict]:
-        """Parse interface status output from 'show interfaces status'"""
-        interfaces = []
-        
+        """Parse interface status output (Cisco IOS: 'show interfaces status')"""
         # Typical format:
         # Port      Name               Status       Vlan       Duplex  Speed Type
         # Gi0/0     to-router          connected    1          a-full  a-1000 RJ45
         # Gi0/1                        notconnect   1            auto    auto RJ45
         # Gi0/2                        disabled     1            auto    auto RJ45
-        
-        lines = output.split('\n')
-        
-        for line in lines:
-            # Look for interface lines (Ethernet, GigabitEthernet, FastEthernet)
-            # Enhanced pattern to catch all interface types
-            interface_patterns = [
-                'Et0/', 'Et1/', 'Et2/', 'Et3/', 'Et4/', 'Et5/', 'Et6/', 'Et7/',
-                'Gi0/', 'Gi1/', 'Gi2/', 'Gi3/', 'Gi4/', 'Gi5/', 'Gi6/', 'Gi7/',
-                'Fa0/', 'Fa1/', 'Fa2/', 'Fa3/', 'Fa4/', 'Fa5/', 'Fa6/', 'Fa7/',
-                'Te0/', 'Te1/', 'Te2/', 'Te3/', 'Te4/', 'Te5/', 'Te6/', 'Te7/',
-                'Po0', 'Po1', 'Po2', 'Po3', 'Po4', 'Po5', 'Po6', 'Po7'
-            ]
-            
-            if any(pattern in line for pattern in interface_patterns):
-                parts = line.split()
-                
-                if len(parts) >= 3:
-                    # Extract port name
-                    port = parts[0]
-                    
-                    # Find status and VLAN (status is typically connected/notconnect/disabled)
-                    status = 'unknown'
-                    vlan = 'unknown'
-                    
-                    for i, part in enumerate(parts):
-                        if part.lower() in ['connected', 'notconnect', 'disabled', 'notconnected']:
-                            status = part.lower()
-                            # VLAN is usually the next field after status
-                            if i + 1 < len(parts):
-                                vlan = parts[i + 1]
-                            break
-                    
-                    interfaces.append({
-                        'port': port,
-                        'status': status,
-                        'vlan': vlan
-                    })
-        
-        return interfaces
+        return self.platform.parse_interface_status(output)
     
     def _parse_single_interface_status(self, output: str, port_name: str) -> List[Dict]:
         """Parse single interface detailed status"""
         status_info = {
-            'port': port_name,
+            'port': canonical_port(port_name),
             'admin_status': 'unknown',
             'operational_status': 'unknown',
             'description': ''
@@ -344,30 +541,33 @@ class SwitchConnector:
         try:
             # Get interface details
             output = self.connection.send_command(f"show interface {port_name}")
-            
-            details = {
-                'port': port_name,
-                'admin_status': 'unknown',
-                'operational_status': 'unknown',
-                'speed': 'unknown',
-                'duplex': 'unknown',
-                'description': ''
-            }
-            
-            for line in output.split('\n'):
-                if 'administratively down' in line.lower():
-                    details['admin_status'] = 'shutdown'
-                elif 'is up' in line.lower() and 'line protocol' in line.lower():
-                    details['admin_status'] = 'enabled'
-                    details['operational_status'] = 'up'
-                elif 'is down' in line.lower() and 'line protocol' in line.lower():
-                    details['operational_status'] = 'down'
-            
-            return details
+            return self._parse_port_details(output, port_name)
         except Exception as e:
             print(f"Error getting port details: {e}")
             return None
     
+    def _parse_port_details(self, output: str, port_name: str) -> Dict:
+        """Parse 'show interface <port>' into status details"""
+        details = {
+            'port': canonical_port(port_name),
+            'admin_status': 'unknown',
+            'operational_status': 'unknown',
+            'speed': 'unknown',
+            'duplex': 'unknown',
+            'description': ''
+        }
+        
+        for line in output.split('\n'):
+            if 'administratively down' in line.lower():
+                details['admin_status'] = 'shutdown'
+            elif 'is up' in line.lower() and 'line protocol' in line.lower():
+                details['admin_status'] = 'enabled'
+                details['operational_status'] = 'up'
+            elif 'is down' in line.lower() and 'line protocol' in line.lower():
+                details['operational_status'] = 'down'
+        
+        return details
+    
     def get_device_info(self) -> Optional[Dict]:
         """Get switch device information"""
         if not self.connection:
@@ -390,6 +590,56 @@ class SwitchConnector:
             print(f"Error getting device info: {e}")
             return None
     
+    def get_infrastructure_ports(self, trunks: bool = True) -> Optional[Dict[str, str]]:
+        """Find the ports that lead to other network devices
+        
+        A port is infrastructure when its CDP or LLDP neighbor is a switch or
+        router (see switch_parsers.parse_cdp_neighbors) or, with trunks, when
+        it is trunking. MACs learned on these ports belong to other switches.
+        
+        Returns:
+            {port: reason}, e.g. {'Te1/1/1': 'cdp core-1', 'Po1': 'trunk'}
+            ({} if the platform has no neighbor or trunk commands);
+            None if the switch could not be asked
+        """
+        if not self.connection:
+            if not self.connect():
+                return None
+        
+        try:
+            outputs = {command: self.connection.send_command(command)
+                       for command in self._infrastructure_commands(trunks)}
+            return self._infrastructure_ports_from_output(outputs)
+        except Exception as e:
+            print(f"Error getting neighbors and trunks from {self.host}: {e}")
+            return None
+    
+    def _infrastructure_commands(self, trunks: bool = True) -> List[str]:
+        """Neighbor and trunk commands this platform supports"""
+        commands = [self.platform.cdp_neighbors_command, self.platform.lldp_neighbors_command]
+        if trunks:
+            commands.append(self.platform.trunk_ports_command)
+        return [command for command in commands if command]
+    
+    def _infrastructure_ports_from_output(self, outputs: Dict[str, str]) -> Dict[str, str]:
+        """Combine neighbor and trunk command output into {port: reason}
+        
+        A switch without CDP or LLDP running answers with an error message,
+        which parses to no neighbors.
+        """
+        platform = self.platform
+        ports = {}
+        for command, parse in ((platform.cdp_neighbors_command, platform.parse_cdp_neighbors),
+                               (platform.lldp_neighbors_command, platform.parse_lldp_neighbors)):
+            if command in outputs:
+                for neighbor in parse(outputs[command]):
+                    if neighbor['infrastructure']:
+                        ports.setdefault(neighbor['port'], f"{neighbor['protocol']} {neighbor['neighbor']}")
+        if platform.trunk_ports_command in outputs:
+            for port in platform.parse_trunk_ports(outputs[platform.trunk_ports_command]):
+                ports.setdefault(port, 'trunk')
+        return ports
+    
     def _extract_hostname(self, output: str) -> str:
         """Extract hostname from config"""
         match = re.search(r'hostname\s+(\S+)', output)
@@ -413,3 +663,47 @@ class SwitchConnector:
         """Context manager exit"""
         self.disconnect()
 
+
+class SwitchSessionSet:
+    """Lazily created SwitchConnector sessions keyed by switch host
+    
+    Used when one operation may touch several switches: a session is only
+    created for a host the first time it is needed, and all sessions are
+    closed together on exit.
+    """
+    
+    def __init__(self, factory, release=None):
+        """
+        factory(host) must return a SwitchConnector. Sessions are disconnected
+        on close, or handed to release(switch) instead when given (e.g. to
+        return them to a SwitchSessionPool).
+        """
+        self.factory = factory
+        self.release = release
+        self.sessions = {}
+    
+    def get(self, host: str) -> SwitchConnector:
+        """Get the session for a host, creating it on first use"""
+        if host not in self.sessions:
+            self.sessions[host] = self.factory(host)
+        return self.sessions[host]
+    
+    def close_all(self):
+        """Disconnect (or release) every session that was opened"""
+        for switch in self.sessions.values():
+            try:
+                if self.release:
+                    self.release(switch)
+                else:
+                    switch.disconnect()
+            except Exception as e:
+                print(f"Error disconnecting from {switch.host}: {e}")
+        self.sessions = {}
+    
+    def __enter__(self):
+        """Context manager entry"""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close_all()
\ No newline at end of file
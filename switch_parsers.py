@@ -0,0 +1,593 @@
+"""
+Parsers for switch command output (MAC address, ARP, interface, neighbor and trunk tables)
+
+Cisco IOS/IOS-XE parsers are the module-level functions; parsers for other
+platforms and the show commands for each netmiko device_type live in the
+PLATFORMS registry at the bottom (see get_platform()).
+"""
+import re
+from sys import intern
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+
+# Anchored at line start so headers, separators and "All"/CPU lines fail on
+# their first characters instead of being scanned end to end
+# Example: 1    aabb.cc00.1000    DYNAMIC     Et0/1
+MAC_TABLE_LINE = re.compile(
+    r'^\s*(\d+)\s+([0-9a-fA-F]{4}\.[0-9a-fA-F]{4}\.[0-9a-fA-F]{4})\s+(\w+)\s+(\S+)',
+    re.MULTILINE
+)
+
+# Example: Internet  192.168.1.10         0   aabb.cc00.1000  ARPA   Vlan1
+ARP_TABLE_LINE = re.compile(
+    r'^\s*Internet\s+(\d+\.\d+\.\d+\.\d+)\s+\d+\s+([0-9a-fA-F]{4}\.[0-9a-fA-F]{4}\.[0-9a-fA-F]{4})\s+\w+\s+(\S+)',
+    re.MULTILINE
+)
+
+# Second hex digit of a multicast/broadcast MAC (I/G bit of the first octet set)
+_GROUP_BIT_DIGITS = frozenset('13579bdfBDF')
+
+# Example: Gi1/0/1   uplink to core   connected    trunk      a-full a-1000 10/100/1000BaseTX
+# Only [ \t] separates columns: \s would let a row with an empty Type column
+# (port-channels) run into the next row.
+_INTERFACE_STATUS = (r'connected|notconnect|notconnected|notconnec|disabled|err-disabled|errDisabl|'
+                     r'inactive|suspended|monitoring|sfpAbsent|xcvrAbsent|xcvrAbsen|noOperMem|linkFlapE|down|up')
+_INTERFACE_VLAN = r'\d+|trunk|routed|unassigned|f-\S+'
+INTERFACE_STATUS_LINE = re.compile(
+    rf'^(?P<port>[A-Za-z][\w-]*\d[\w/.:]*)[ \t]+(?P<name>.*?)[ \t]*(?<!\S)(?P<status>{_INTERFACE_STATUS})[ \t]+'
+    rf'(?P<vlan>{_INTERFACE_VLAN})[ \t]+(?P<duplex>\S+)[ \t]+(?P<speed>\S+)[ \t]*(?P<type>.*)$',
+    re.MULTILINE
+)
+# The name column is free text, so the status is really the last status
+# keyword followed by a VLAN-like token. The lazy name above stops at the
+# first one ('connected 5 thing'); rows where another one follows are
+# matched again with a greedy name.
+_INTERFACE_LATER_STATUS = re.compile(rf'[ \t](?:{_INTERFACE_STATUS})[ \t]+(?:{_INTERFACE_VLAN})[ \t]')
+_INTERFACE_STATUS_LINE_GREEDY = re.compile(
+    rf'(?P<port>[A-Za-z][\w-]*\d[\w/.:]*)[ \t]+(?:(?P<name>.*\S)[ \t]+)?(?P<status>{_INTERFACE_STATUS})[ \t]+'
+    rf'(?P<vlan>{_INTERFACE_VLAN})[ \t]+(?P<duplex>\S+)[ \t]+(?P<speed>\S+)[ \t]*(?P<type>.*)$',
+    re.MULTILINE
+)
+
+# Truncated NX-OS status column values -> full IOS-style status
+_STATUS_ALIASES = {
+    'notconnec': 'notconnect',
+    'errdisabl': 'err-disabled',
+    'xcvrabsen': 'xcvrabsent',
+    'linkflape': 'linkflaperrdisabled',
+}
+
+# 'show mac address-table count' (IOS/EOS per VLAN, NX-OS for all VLANs)
+_MAC_COUNT_BLOCK = re.compile(r'^\s*Mac Entries for (?:Vlan\s*(\d+)|(all) vlans)', re.IGNORECASE)
+_MAC_COUNT_LINE = re.compile(r'^\s*([A-Za-z][\w ()/-]*?(?:Count|Addresses(?: in Use)?))\s*:\s*(\d+)\s*$', re.IGNORECASE)
+
+_PORT_NAME = re.compile(r'^\s*([A-Za-z][A-Za-z-]*?)\s*(\d[\w/.:]*)\s*$')
+
+# 'show cdp neighbors' row; the device ID is on a line of its own when it is too long for its column
+# Example: dist-2           Gig 1/0/48        135               S I  WS-C2960X Gig 1/0/52
+CDP_NEIGHBOR_LINE = re.compile(
+    r'^(?P<device>\S+)?\s+(?P<port>[A-Za-z][A-Za-z-]*\s?\d[\w/.:]*)\s+(?P<holdtime>\d+)\s+(?P<rest>.*?)\s*$'
+)
+CDP_DEVICE_LINE = re.compile(r'^(\S+)\s*$')
+
+# 'show lldp neighbors' row
+# Example: core-1.example.com  Te1/1/2        120        B,R             Te1/0/2
+LLDP_NEIGHBOR_LINE = re.compile(
+    r'^(?P<device>\S.*?)\s+(?P<port>[A-Za-z][A-Za-z-]*\d[\w/.:]*)\s+(?P<holdtime>\d+)\s+'
+    r'(?:(?P<capabilities>[BCRSTWPO](?:,?[BCRSTWPO])*)\s+)?(?P<remote_port>\S+)\s*$',
+    re.MULTILINE
+)
+
+# 'show interfaces trunk' (first section) row
+# Example: Gi1/0/48    on               802.1q         trunking      1
+TRUNK_PORT_LINE = re.compile(r'^(?P<port>[A-Za-z][\w-]*\d[\w/.:]*)\s+.*?\btrunking\b', re.MULTILINE)
+
+# Config-mode output lines that mean a command was rejected. IOS also prints
+# informational '%' lines on success (e.g. "% Access VLAN does not exist.
+# Creating vlan 999"), so only these markers count; a '^' line points at
+# the rejected token
+CONFIG_ERROR_LINE = re.compile(
+    r'^(?:%\s*(?:Invalid input|Invalid command|Incomplete command|Ambiguous command|Error|Unrecognized command)'
+    r'|Command rejected|\^$)',
+    re.IGNORECASE
+)
+# NX-OS reports some failures as "ERROR: ..." without a '%'
+NXOS_CONFIG_ERROR_LINE = re.compile(CONFIG_ERROR_LINE.pattern + r'|^ERROR:', re.IGNORECASE)
+
+# Long and short interface prefixes (lower case) -> canonical short prefix
+_PORT_PREFIXES = {
+    'ethernet': 'Et', 'eth': 'Et', 'et': 'Et',
+    'fastethernet': 'Fa', 'fas': 'Fa', 'fa': 'Fa',
+    'gigabitethernet': 'Gi', 'gige': 'Gi', 'gig': 'Gi', 'gi': 'Gi',
+    'twogigabitethernet': 'Tw', 'two': 'Tw', 'tw': 'Tw',
+    'fivegigabitethernet': 'Fi', 'fiv': 'Fi', 'fi': 'Fi',
+    'tengigabitethernet': 'Te', 'tengige': 'Te', 'ten': 'Te', 'te': 'Te',
+    'twentyfivegige': 'Twe', 'twentyfivegigabitethernet': 'Twe', 'twe': 'Twe',
+    'fortygigabitethernet': 'Fo', 'fortygige': 'Fo', 'for': 'Fo', 'fo': 'Fo',
+    'hundredgige': 'Hu', 'hundredgigabitethernet': 'Hu', 'hun': 'Hu', 'hu': 'Hu',
+    'port-channel': 'Po', 'portchannel': 'Po', 'po': 'Po',
+    'vlan': 'Vl', 'vl': 'Vl',
+    'loopback': 'Lo', 'lo': 'Lo',
+}
+
+_MAC_CACHE = {}
+_MAC_CACHE_LIMIT = 131072
+_PORT_CACHE = {}
+_PORT_CACHE_LIMIT = 65536
+
+
+def normalize_mac(mac: str) -> str:
+    """Normalize a MAC address to AA:BB:CC:DD:EE:FF
+    
+    Accepts Cisco dotted (aabb.cc00.1000), colon/dash separated and bare
+    forms. Results are cached, so the same MAC seen on every scan costs one
+    dict lookup and shares a single string.
+    """
+    normalized = _MAC_CACHE.get(mac)
+    if normalized is not None:
+        return normalized
+    
+    if len(mac) == 14:
+        # aabb.cc00.1000
+        h = mac.upper()
+        normalized = f'{h[0:2]}:{h[2:4]}:{h[5:7]}:{h[7:9]}:{h[10:12]}:{h[12:14]}'
+    elif len(mac) == 17:
+        # aa:bb:cc:dd:ee:ff or aa-bb-cc-dd-ee-ff
+        normalized = mac.upper().replace('-', ':')
+    else:
+        h = mac.replace('.', '').replace(':', '').replace('-', '').upper()
+        normalized = ':'.join([h[i:i + 2] for i in range(0, 12, 2)])
+    
+    if len(_MAC_CACHE) >= _MAC_CACHE_LIMIT:
+        _MAC_CACHE.clear()
+    _MAC_CACHE[mac] = normalized
+    return normalized
+
+
+def canonical_port(name: str) -> str:
+    """Map any spelling of an interface name to one canonical, interned key
+    
+    GigabitEthernet1/0/48, gi1/0/48 and Gi1/0/48 all become 'Gi1/0/48', so
+    ports from the MAC table, ARP table, interface status and the
+    port_status table can be joined with plain dict lookups. Names with an
+    unknown prefix (e.g. Junos ge-0/0/1) are returned unchanged.
+    """
+    canonical = _PORT_CACHE.get(name)
+    if canonical is not None:
+        return canonical
+    
+    match = _PORT_NAME.match(name)
+    prefix = _PORT_PREFIXES.get(match.group(1).lower()) if match else None
+    canonical = intern(prefix + match.group(2) if prefix else name.strip())
+    
+    if len(_PORT_CACHE) >= _PORT_CACHE_LIMIT:
+        _PORT_CACHE.clear()
+    _PORT_CACHE[name] = canonical
+    return canonical
+
+
+def parse_mac_table(output: str) -> List[Dict]:
+    """Parse 'show mac address-table' output in a single pass
+    
+    Multicast entries are skipped; they are never end devices. Entry types
+    repeat across thousands of entries, so they are interned; ports are
+    mapped to their canonical (also interned) name.
+    """
+    devices = []
+    append = devices.append
+    for match in MAC_TABLE_LINE.finditer(output):
+        vlan, mac, entry_type, port = match.groups()
+        if mac[1] in _GROUP_BIT_DIGITS:
+            continue
+        append({
+            'vlan': int(vlan),
+            'mac_address': normalize_mac(mac),
+            'type': intern(entry_type),
+            'port': canonical_port(port)
+        })
+    return devices
+
+
+def iter_mac_table(lines: Iterable[str]) -> Iterator[Dict]:
+    """Streaming variant of parse_mac_table: yield entries line by line"""
+    match_line = MAC_TABLE_LINE.match
+    for line in lines:
+        match = match_line(line)
+        if match is None:
+            continue
+        vlan, mac, entry_type, port = match.groups()
+        if mac[1] in _GROUP_BIT_DIGITS:
+            continue
+        yield {
+            'vlan': int(vlan),
+            'mac_address': normalize_mac(mac),
+            'type': intern(entry_type),
+            'port': canonical_port(port)
+        }
+
+
+def iter_arp_table(lines: Iterable[str]) -> Iterator[Dict]:
+    """Streaming variant of parse_arp_table: yield entries line by line"""
+    match_line = ARP_TABLE_LINE.match
+    for line in lines:
+        match = match_line(line)
+        if match is None:
+            continue
+        ip, mac, interface = match.groups()
+        yield {
+            'ip_address': ip,
+            'mac_address': normalize_mac(mac),
+            'interface': canonical_port(interface)
+        }
+
+
+def parse_arp_table(output: str) -> List[Dict]:
+    """Parse 'show arp' output in a single pass"""
+    entries = []
+    append = entries.append
+    for match in ARP_TABLE_LINE.finditer(output):
+        ip, mac, interface = match.groups()
+        append({
+            'ip_address': ip,
+            'mac_address': normalize_mac(mac),
+            'interface': canonical_port(interface)
+        })
+    return entries
+
+
+def parse_interface_status(output: str) -> List[Dict]:
+    """Parse 'show interfaces status' output in a single pass"""
+    interfaces = []
+    append = interfaces.append
+    later_status = _INTERFACE_LATER_STATUS.search
+    for match in INTERFACE_STATUS_LINE.finditer(output):
+        if later_status(output, match.end('status'), match.end()):
+            match = _INTERFACE_STATUS_LINE_GREEDY.match(output, match.start())
+        port, name, status, vlan, duplex, speed, port_type = match.groups()
+        status = status.lower()
+        append({
+            'port': canonical_port(port),
+            'name': name or '',
+            'status': intern(_STATUS_ALIASES.get(status, status)),
+            'vlan': intern(vlan),
+            'duplex': intern(duplex),
+            'speed': intern(speed),
+            'type': intern(port_type.rstrip())
+        })
+    return interfaces
+
+
+def parse_mac_count(output: str) -> Dict:
+    """Parse 'show mac address-table count' into per-VLAN counters
+    
+    Returns:
+        Dict mapping VLAN (int, or 'all' when the platform only reports
+        totals) -> {counter label: value}, e.g.
+        {10: {'Dynamic Address Count': 42, 'Total Mac Addresses': 43}}
+    """
+    counts = {}
+    current = None
+    for line in output.splitlines():
+        match = _MAC_COUNT_BLOCK.match(line)
+        if match:
+            vlan, everything = match.groups()
+            current = counts.setdefault(int(vlan) if vlan else everything.lower(), {})
+            continue
+        
+        match = _MAC_COUNT_LINE.match(line)
+        if match and current is not None:
+            label, value = match.groups()
+            current[' '.join(label.split())] = int(value)
+    return counts
+
+
+def _remote_port(tokens: List[str]) -> str:
+    """Port ID at the end of a neighbor row ('Gig 1/0/52', 'Eth1/49', 'Port 1')"""
+    if len(tokens) >= 2 and tokens[-1][:1].isdigit() and tokens[-2].isalpha():
+        return tokens[-2] + ' ' + tokens[-1]
+    return tokens[-1] if tokens else ''
+
+
+def parse_cdp_neighbors(output: str) -> List[Dict]:
+    """Parse 'show cdp neighbors' output (IOS and NX-OS layout)
+    
+    The neighbor is infrastructure when it calls itself a router or switch
+    (capability R or S) and not a phone, host or access point (P, V, H, T):
+    MACs behind a phone's PC port must still be scanned.
+    """
+    neighbors = []
+    device = None
+    for line in output.splitlines():
+        match = CDP_NEIGHBOR_LINE.match(line)
+        if match is None:
+            match = CDP_DEVICE_LINE.match(line)
+            device = match.group(1) if match and not line.endswith(':') else None
+            continue
+        
+        tokens = match.group('rest').split()
+        capabilities = []
+        while tokens and len(tokens[0]) == 1:
+            capabilities.append(tokens.pop(0))
+        neighbors.append({
+            'port': canonical_port(match.group('port')),
+            'neighbor': match.group('device') or device or '',
+            'protocol': 'cdp',
+            'capabilities': ''.join(capabilities),
+            'remote_port': _remote_port(tokens),
+            # Lower-case codes are different capabilities (r repeater, s STP dispute on NX-OS)
+            'infrastructure': bool({'R', 'S'} & set(capabilities)) and not {'P', 'V', 'H', 'T'} & set(capabilities)
+        })
+        device = None
+    return neighbors
+
+
+def parse_lldp_neighbors(output: str) -> List[Dict]:
+    """Parse 'show lldp neighbors' output (IOS and NX-OS layout)
+    
+    The neighbor is infrastructure when it advertises routing or bridging
+    (R or B) and is not a phone, access point or station (T, W, S).
+    """
+    neighbors = []
+    for match in LLDP_NEIGHBOR_LINE.finditer(output):
+        capabilities = (match.group('capabilities') or '').replace(',', '')
+        neighbors.append({
+            'port': canonical_port(match.group('port')),
+            'neighbor': match.group('device'),
+            'protocol': 'lldp',
+            'capabilities': capabilities,
+            'remote_port': match.group('remote_port'),
+            'infrastructure': bool({'R', 'B'} & set(capabilities)) and not {'T', 'W', 'S'} & set(capabilities)
+        })
+    return neighbors
+
+
+def parse_trunk_ports(output: str) -> List[str]:
+    """Parse the ports in trunking state from 'show interfaces trunk' (IOS, NX-OS and EOS)"""
+    ports = []
+    for match in TRUNK_PORT_LINE.finditer(output):
+        port = canonical_port(match.group('port'))
+        if port not in ports:
+            ports.append(port)
+    return ports
+
+
+# --- Other platforms ---------------------------------------------------------
+
+_DOTTED_MAC = r'[0-9a-fA-F]{4}\.[0-9a-fA-F]{4}\.[0-9a-fA-F]{4}'
+_COLON_MAC = r'[0-9a-fA-F]{2}(?::[0-9a-fA-F]{2}){5}'
+_IPV4 = r'\d+\.\d+\.\d+\.\d+'
+
+# NX-OS: "*   10     0050.5689.1a2b   dynamic  0         F      F    Eth1/1"
+NXOS_MAC_TABLE_LINE = re.compile(
+    rf'^[*+GOCR~ ]*?\s*(\d+)\s+({_DOTTED_MAC})\s+(\w+)\s+\S+\s+\S+\s+\S+\s+(\S+)', re.MULTILINE
+)
+# NX-OS: "10.1.1.10       00:05:12  0050.5689.1a2b  Vlan10          +"
+NXOS_ARP_TABLE_LINE = re.compile(rf'^({_IPV4})\s+\S+\s+({_DOTTED_MAC})\s+(\S+)', re.MULTILINE)
+
+# EOS: "10.1.1.10         0:00:12  001c.7300.0001  Vlan10, Ethernet1"
+EOS_ARP_TABLE_LINE = re.compile(rf'^({_IPV4})\s+\S+\s+({_DOTTED_MAC})\s+([^\s,]+)', re.MULTILINE)
+
+# Junos (ELS and legacy): "   v10   00:50:56:89:1a:2b   D   -   ge-0/0/2.0   0   0"
+JUNOS_MAC_TABLE_LINE = re.compile(rf'^\s*(\S+)\s+({_COLON_MAC})\s+(\S+)\s+\S+\s+(\S+)', re.MULTILINE)
+# Junos: "00:1c:73:00:00:01 10.1.1.10       irb.10                   none"
+JUNOS_ARP_TABLE_LINE = re.compile(rf'^({_COLON_MAC})\s+({_IPV4})\s+(\S+)', re.MULTILINE)
+# Junos 'show interfaces terse': "ge-0/0/1                up    down"
+# (physical ports and LAGs only - units like ge-0/0/1.0 and irb/me0 are skipped)
+JUNOS_INTERFACE_LINE = re.compile(r'^((?:fe|ge|xe|et|mge)-\d+/\d+/\d+|ae\d+)\s+(up|down)\s+(up|down)\b', re.MULTILINE)
+
+
+def _table_parsers(pattern, build: Callable):
+    """Make (parse, iterate) functions from a line pattern and a row builder
+    
+    build(groups) returns the entry dict, or None to skip the line.
+    """
+    def parse(output: str) -> List[Dict]:
+        entries = []
+        append = entries.append
+        for match in pattern.finditer(output):
+            entry = build(match.groups())
+            if entry is not None:
+                append(entry)
+        return entries
+    
+    def iterate(lines: Iterable[str]) -> Iterator[Dict]:
+        match_line = pattern.match
+        for line in lines:
+            match = match_line(line)
+            if match is not None:
+                entry = build(match.groups())
+                if entry is not None:
+                    yield entry
+    
+    return parse, iterate
+
+
+def _mac_entry(vlan: str, mac: str, entry_type: str, port: str) -> Optional[Dict]:
+    """MAC table row in the common format (None for multicast)"""
+    if mac[1] in _GROUP_BIT_DIGITS:
+        return None
+    return {
+        'vlan': int(vlan) if vlan.isdigit() else intern(vlan),
+        'mac_address': normalize_mac(mac),
+        'type': intern(entry_type.upper()),
+        'port': canonical_port(port)
+    }
+
+
+def _arp_entry(ip: str, mac: str, interface: str) -> Dict:
+    """ARP table row in the common format"""
+    return {
+        'ip_address': ip,
+        'mac_address': normalize_mac(mac),
+        'interface': canonical_port(interface)
+    }
+
+
+def _junos_mac_entry(groups) -> Optional[Dict]:
+    """Junos rows carry the VLAN name and a logical unit (ge-0/0/1.0)"""
+    vlan, mac, flags, interface = groups
+    if not interface[0].isalpha():
+        return None
+    entry_type = 'DYNAMIC' if 'D' in flags or flags == 'Learn' else 'STATIC'
+    return _mac_entry(vlan, mac, entry_type, interface.split('.')[0])
+
+
+def _junos_interface_entry(groups) -> Dict:
+    """Map Junos admin/link state to the IOS-style status values"""
+    port, admin, link = groups
+    if admin == 'down':
+        status = 'disabled'
+    else:
+        status = 'connected' if link == 'up' else 'notconnect'
+    return {
+        'port': canonical_port(port),
+        'name': '',
+        'status': status,
+        'vlan': 'unknown',
+        'duplex': 'unknown',
+        'speed': 'unknown',
+        'type': ''
+    }
+
+
+parse_nxos_mac_table, iter_nxos_mac_table = _table_parsers(NXOS_MAC_TABLE_LINE, lambda g: _mac_entry(*g))
+parse_nxos_arp_table, iter_nxos_arp_table = _table_parsers(NXOS_ARP_TABLE_LINE, lambda g: _arp_entry(*g))
+parse_eos_arp_table, iter_eos_arp_table = _table_parsers(EOS_ARP_TABLE_LINE, lambda g: _arp_entry(*g))
+parse_junos_mac_table, iter_junos_mac_table = _table_parsers(JUNOS_MAC_TABLE_LINE, _junos_mac_entry)
+parse_junos_arp_table, iter_junos_arp_table = _table_parsers(JUNOS_ARP_TABLE_LINE, lambda g: _arp_entry(g[1], g[0], g[2]))
+parse_junos_interfaces = _table_parsers(JUNOS_INTERFACE_LINE, _junos_interface_entry)[0]
+
+
+class PlatformParsers:
+    """Show commands and parsers for one switch platform"""
+    
+    def __init__(self, name: str, mac_table_command: str, arp_command: str, interface_status_command: str,
+                 parse_mac_table: Callable, iter_mac_table: Callable,
+                 parse_arp_table: Callable, iter_arp_table: Callable,
+                 parse_interface_status: Callable, port_config: bool = True,
+                 mac_count_command: Optional[str] = None, parse_mac_count: Optional[Callable] = None,
+                 mac_table_vlan_command: Optional[str] = None, mac_table_address_command: Optional[str] = None,
+                 mac_table_interface_command: Optional[str] = None,
+                 session_commands: Tuple[str, ...] = ('terminal length 0', 'terminal width 511'),
+                 save_command: Optional[str] = 'write memory',
+                 cdp_neighbors_command: Optional[str] = None, lldp_neighbors_command: Optional[str] = None,
+                 trunk_ports_command: Optional[str] = None,
+                 parse_cdp_neighbors: Callable = parse_cdp_neighbors,
+                 parse_lldp_neighbors: Callable = parse_lldp_neighbors,
+                 parse_trunk_ports: Callable = parse_trunk_ports,
+                 config_error_line: Pattern = CONFIG_ERROR_LINE):
+        """
+        Args:
+            name: Platform name for logs and stats
+            *_command: Show commands for the MAC, ARP and interface tables
+            parse_*: parse(output) -> List[Dict] in the common entry format
+            iter_*: iterate(lines) -> Iterator[Dict], streaming variants
+            port_config: Whether the IOS-style interface config used by
+                SwitchConnector.apply_port_states() works on this platform
+            mac_count_command/parse_mac_count: Cheap MAC table counters
+                (parse -> {vlan: {label: value}}), None if unsupported
+            mac_table_vlan_command: MAC table of one VLAN, with a {vlan}
+                placeholder (same output format as mac_table_command)
+            mac_table_address_command/mac_table_interface_command: MAC
+                table entries of one MAC ({mac}, Cisco dotted form) or one
+                port ({port}), same output format as mac_table_command
+            session_commands: Run once per CLI session to turn off paging
+                (netmiko does this itself; used by AsyncSwitchConnector)
+            save_command: Saves the running config (None if unsupported)
+            cdp_neighbors_command/lldp_neighbors_command/trunk_ports_command:
+                Neighbor and trunk tables used to find uplinks (None if
+                unsupported); parse_*_neighbors -> List[Dict] with 'port'
+                and 'infrastructure', parse_trunk_ports -> List[str]
+            config_error_line: Matches a (stripped) config-mode output line
+                that reports a rejected command
+        """
+        self.name = name
+        self.mac_table_command = mac_table_command
+        self.arp_command = arp_command
+        self.interface_status_command = interface_status_command
+        self.parse_mac_table = parse_mac_table
+        self.iter_mac_table = iter_mac_table
+        self.parse_arp_table = parse_arp_table
+        self.iter_arp_table = iter_arp_table
+        self.parse_interface_status = parse_interface_status
+        self.port_config = port_config
+        self.mac_count_command = mac_count_command
+        self.parse_mac_count = parse_mac_count
+        self.mac_table_vlan_command = mac_table_vlan_command
+        self.mac_table_address_command = mac_table_address_command
+        self.mac_table_interface_command = mac_table_interface_command
+        self.session_commands = session_commands
+        self.save_command = save_command
+        self.cdp_neighbors_command = cdp_neighbors_command
+        self.lldp_neighbors_command = lldp_neighbors_command
+        self.trunk_ports_command = trunk_ports_command
+        self.parse_cdp_neighbors = parse_cdp_neighbors
+        self.parse_lldp_neighbors = parse_lldp_neighbors
+        self.parse_trunk_ports = parse_trunk_ports
+        self.config_error_line = config_error_line
+
+
+CISCO_IOS = PlatformParsers(
+    'Cisco IOS/IOS-XE', 'show mac address-table', 'show arp', 'show interfaces status',
+    parse_mac_table, iter_mac_table, parse_arp_table, iter_arp_table, parse_interface_status,
+    mac_count_command='show mac address-table count', parse_mac_count=parse_mac_count,
+    mac_table_vlan_command='show mac address-table vlan {vlan}',
+    mac_table_address_command='show mac address-table address {mac}',
+    mac_table_interface_command='show mac address-table interface {port}',
+    cdp_neighbors_command='show cdp neighbors', lldp_neighbors_command='show lldp neighbors',
+    trunk_ports_command='show interfaces trunk'
+)
+CISCO_NXOS = PlatformParsers(
+    'Cisco NX-OS', 'show mac address-table', 'show ip arp', 'show interface status',
+    parse_nxos_mac_table, iter_nxos_mac_table, parse_nxos_arp_table, iter_nxos_arp_table, parse_interface_status,
+    mac_count_command='show mac address-table count', parse_mac_count=parse_mac_count,
+    mac_table_vlan_command='show mac address-table vlan {vlan}',
+    mac_table_address_command='show mac address-table address {mac}',
+    mac_table_interface_command='show mac address-table interface {port}',
+    save_command='copy running-config startup-config',
+    cdp_neighbors_command='show cdp neighbors', lldp_neighbors_command='show lldp neighbors',
+    trunk_ports_command='show interface trunk', config_error_line=NXOS_CONFIG_ERROR_LINE
+)
+ARISTA_EOS = PlatformParsers(
+    'Arista EOS', 'show mac address-table', 'show ip arp', 'show interfaces status',
+    # EOS prints the MAC and interface tables in the IOS layout
+    parse_mac_table, iter_mac_table, parse_eos_arp_table, iter_eos_arp_table, parse_interface_status,
+    mac_count_command='show mac address-table count', parse_mac_count=parse_mac_count,
+    mac_table_vlan_command='show mac address-table vlan {vlan}',
+    mac_table_address_command='show mac address-table address {mac}',
+    mac_table_interface_command='show mac address-table interface {port}',
+    session_commands=('terminal length 0', 'terminal width 32767'),
+    # EOS lists LLDP neighbors without capabilities, so only trunks are known
+    trunk_ports_command='show interfaces trunk'
+)
+JUNIPER_JUNOS = PlatformParsers(
+    'Juniper Junos', 'show ethernet-switching table', 'show arp no-resolve', 'show interfaces terse',
+    parse_junos_mac_table, iter_junos_mac_table, parse_junos_arp_table, iter_junos_arp_table,
+    parse_junos_interfaces, port_config=False,
+    session_commands=('set cli screen-length 0', 'set cli screen-width 0'), save_command=None
+)
+
+# netmiko device_type -> platform
+PLATFORMS = {
+    'cisco_ios': CISCO_IOS,
+    'cisco_ios_telnet': CISCO_IOS,
+    'cisco_xe': CISCO_IOS,
+    'cisco_nxos': CISCO_NXOS,
+    'arista_eos': ARISTA_EOS,
+    'juniper_junos': JUNIPER_JUNOS,
+    'juniper': JUNIPER_JUNOS,
+}
+
+
+def get_platform(device_type: str) -> PlatformParsers:
+    """Get the parsers for a netmiko device_type (Cisco IOS if unknown)"""
+    platform = PLATFORMS.get(device_type)
+    if platform is None:
+        print(f"No parsers registered for device type '{device_type}' - using Cisco IOS parsers")
+        return CISCO_IOS
+    return platform
+
+
+def register_platform(device_type: str, platform: PlatformParsers):
+    """Register (or replace) the parsers for a netmiko device_type"""
+    PLATFORMS[device_type] = platform
@@ -0,0 +1,498 @@
+"""
+Switch transports: record, replay and synthetic stand-ins for the SSH session
+
+SwitchConnector talks to a netmiko connection. A transport replaces how that
+connection is opened, so the rest of the detector runs unchanged:
+
+    ssh        - netmiko ConnectHandler (default)
+    record     - live SSH session whose command output and latency are
+                 written to <directory>/<host>.json
+    replay     - serves a recording back, instantly or with recorded timing
+    synthetic  - generates Cisco IOS MAC/ARP/interface tables of any size
+
+This makes scans reproducible without a switch, e.g. for benchmark_detector.py.
+"""
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from switch_parsers import canonical_port
+
+INVALID_INPUT = "\n% Invalid input detected at '^' marker.\n"
+
+
+class SimulatedConnection:
+    """The subset of a netmiko connection SwitchConnector uses, served locally
+    
+    Subclasses implement _output(command) -> (output, latency_seconds).
+    send_command() sleeps for the latency; the streaming calls
+    (write_channel/read_channel) release the output in chunks once the
+    latency has passed, ending with the prompt like a real channel.
+    """
+    
+    RETURN = '\n'
+    
+    def __init__(self, prompt: str, chunk_size: int = 4096):
+        self.prompt = prompt
+        self.chunk_size = chunk_size
+        self.closed = False
+        self.config_sets = []
+        self.saves = 0
+        self._channel = ''
+        self._channel_ready = 0.0
+        self._lock = threading.Lock()
+    
+    def _output(self, command: str):
+        """Return (output, latency_seconds) for a command"""
+        raise NotImplementedError
+    
+    def _check_open(self):
+        """Fail like a dropped SSH session once disconnected"""
+        if self.closed:
+            raise OSError("Socket is closed")
+    
+    def enable(self):
+        self._check_open()
+    
+    def find_prompt(self) -> str:
+        self._check_open()
+        return self.prompt
+    
+    def is_alive(self) -> bool:
+        return not self.closed
+    
+    def disconnect(self):
+        self.closed = True
+    
+    def command_output(self, command: str):
+        """(output, latency_seconds) of a command without waiting, for asynchronous servers"""
+        self._check_open()
+        return self._output(command.strip())
+    
+    def send_command(self, command: str, *args, **kwargs) -> str:
+        """Run a command, taking as long as the command's latency"""
+        self._check_open()
+        output, latency = self._output(command.strip())
+        if latency > 0:
+            time.sleep(latency)
+        return output
+    
+    def write_channel(self, data: str):
+        """Queue the echo, output and prompt of each command for read_channel()"""
+        self._check_open()
+        with self._lock:
+            for command in data.split(self.RETURN):
+                command = command.strip()
+                if not command:
+                    continue
+                output, latency = self._output(command)
+                self._channel += f"{command}\n{output.strip(chr(10))}\n{self.prompt}"
+                self._channel_ready = max(self._channel_ready, time.monotonic() + latency)
+    
+    def read_channel(self) -> str:
+        """Return the next chunk of queued output ('' until its latency has passed)"""
+        self._check_open()
+        with self._lock:
+            if not self._channel or time.monotonic() < self._channel_ready:
+                return ''
+            chunk, self._channel = self._channel[:self.chunk_size], self._channel[self.chunk_size:]
+            return chunk
+    
+    def send_config_set(self, commands: List[str], *args, **kwargs) -> str:
+        """Echo the commands as a switch in config mode would"""
+        self._check_open()
+        self.config_sets.append(list(commands))
+        hostname = self.prompt.rstrip('#>')
+        lines = ['configure terminal', 'Enter configuration commands, one per line.  End with CNTL/Z.']
+        mode = 'config'
+        for command in commands:
+            lines.append(f'{hostname}({mode})#{command}')
+            if command.startswith('interface '):
+                mode = 'config-if'
+        lines.append(f'{hostname}({mode})#end')
+        lines.append(self.prompt)
+        return '\n'.join(lines)
+    
+    def save_config(self, *args, **kwargs) -> str:
+        self._check_open()
+        self.saves += 1
+        return 'Building configuration...\n[OK]'
+
+
+class SyntheticConnection(SimulatedConnection):
+    """A made-up Cisco IOS switch with a MAC table of the requested size
+    
+    MAC addresses are derived from the host name, so every switch in a
+    synthetic fleet learns different MACs and repeated runs see the same
+    tables. With churn, that fraction of the table is replaced by new MACs
+    on every MAC table read (new rogues for the detector to find). With
+    uplink_mac_entries, that many upstream MACs are also learned on two
+    trunk uplinks (Te1/1/1 with a CDP switch neighbor, Te1/1/2 with an LLDP
+    one), as on an aggregation switch; Gi1/0/1 always has an IP phone as
+    its CDP neighbor. Output is always in Cisco IOS format, whatever the
+    connector's device_type.
+    """
+    
+    UPLINKS = ('Te1/1/1', 'Te1/1/2')
+    UPLINK_MAC_BASE = 0x800000  # Upstream MACs are numbered from here, clear of the access MACs
+    
+    def __init__(self, host: str, mac_entries: int = 1000, ports: int = 48, vlans: int = 10,
+                 arp_ratio: float = 1.0, churn: float = 0.0, latency: float = 0.0,
+                 lines_per_second: Optional[float] = None, uplink_mac_entries: int = 0):
+        """
+        Args:
+            host: Switch host (seeds the generated MACs and the hostname)
+            mac_entries: MAC table size
+            ports: Access ports the MACs are spread over (Gi1/0/1..)
+            vlans: VLANs the MACs are spread over (10, 20, ..)
+            arp_ratio: Fraction of MACs with an ARP entry
+            churn: Fraction of the MAC table replaced on every read
+            latency: Fixed delay per command, in seconds
+            lines_per_second: Output rate on top of latency (None = instant)
+            uplink_mac_entries: MACs learned on the uplinks (0 = no uplinks)
+        """
+        self.host = host
+        self.hostname = 'sim-' + re.sub(r'[^\w-]', '-', host)
+        super().__init__(f'{self.hostname}#')
+        self.mac_entries = mac_entries
+        self.ports = max(1, ports)
+        self.vlans = max(1, vlans)
+        self.arp_ratio = arp_ratio
+        self.churn = churn
+        self.latency = latency
+        self.lines_per_second = lines_per_second
+        self.uplink_mac_entries = uplink_mac_entries
+        self.mac_reads = 0
+        self._address_index = (None, {})
+        
+        seed = zlib.crc32(host.encode())
+        self._prefix = f'02{seed & 0xFF:02x}.{(seed >> 8) & 0xFF:02x}'
+        self._subnet = 18 + (seed >> 16) % 2  # 198.18.0.0/15 (benchmarking range)
+        self._commands = {
+            'show mac address-table': self._mac_table,
+            'show mac address-table count': self._mac_count,
+            'show arp': self._arp_table,
+            'show interfaces status': self._interface_status,
+            'show version': self._version,
+            'show running-config | include hostname': lambda: f'hostname {self.hostname}',
+            'show cdp neighbors': self._cdp_neighbors,
+            'show lldp neighbors': self._lldp_neighbors,
+            'show interfaces trunk': self._trunks,
+        }
+    
+    def _output(self, command: str):
+        render = self._commands.get(command)
+        lookup = re.fullmatch(r'show mac address-table (vlan|address|interface) (\S+)', command)
+        if render:
+            output = render()
+        elif lookup:
+            output = self._mac_table(**{lookup.group(1): lookup.group(2)})
+        else:
+            output = f'{command}{INVALID_INPUT}'
+        delay = self.latency
+        if self.lines_per_second:
+            delay += output.count('\n') / self.lines_per_second
+        return output, delay
+    
+    def _mac(self, i: int) -> str:
+        return f'{self._prefix}{(i >> 16) & 0xFF:02x}.{(i >> 8) & 0xFF:02x}{i & 0xFF:02x}'
+    
+    def _current_macs(self) -> List[int]:
+        """MAC indexes in the table now; churned slots get fresh MACs per MAC table read"""
+        churned = int(self.mac_entries * self.churn)
+        offset = self.mac_reads * self.mac_entries
+        return [i + offset if i < churned else i for i in range(self.mac_entries)]
+    
+    def _vlan(self, slot: int) -> int:
+        return 10 * (1 + slot % self.vlans)
+    
+    def _address_slots(self) -> Dict[str, int]:
+        """MAC -> slot of the current table, for address lookups (rebuilt after churn)
+        
+        Upstream MACs have negative slots: -1 is the first one.
+        """
+        if self._address_index[0] != self.mac_reads:
+            slots = {self._mac(i): slot for slot, i in enumerate(self._current_macs())}
+            for j in range(self.uplink_mac_entries):
+                slots[self._mac(self.UPLINK_MAC_BASE + j)] = -1 - j
+            self._address_index = (self.mac_reads, slots)
+        return self._address_index[1]
+    
+    def _uplink_rows(self, slots=None):
+        """(vlan, mac, port) of the upstream MACs (all, or the given indexes)"""
+        for j in range(self.uplink_mac_entries) if slots is None else slots:
+            yield self._vlan(j), self._mac(self.UPLINK_MAC_BASE + j), self.UPLINKS[j % len(self.UPLINKS)]
+    
+    def _mac_table(self, vlan: Optional[str] = None, address: Optional[str] = None,
+                   interface: Optional[str] = None) -> str:
+        if vlan is address is interface is None:
+            self.mac_reads += 1
+        lines = ['          Mac Address Table', '-------------------------------------------', '',
+                 'Vlan    Mac Address       Type        Ports', '----    -----------       --------    -----']
+        total = 0
+        macs = self._current_macs()
+        slots = range(len(macs))
+        uplink_slots = None
+        if address is not None:
+            slot = self._address_slots().get(address.lower())
+            slots = [] if slot is None or slot < 0 else [slot]
+            uplink_slots = [-1 - slot] if slot is not None and slot < 0 else []
+        rows = ((self._vlan(slot), self._mac(macs[slot]), f'Gi1/0/{1 + slot % self.ports}') for slot in slots)
+        for row_vlan, mac, port in itertools.chain(rows, self._uplink_rows(uplink_slots)):
+            if ((vlan is not None and str(row_vlan) != vlan)
+                    or (interface is not None and canonical_port(interface) != port)):
+                continue
+            lines.append(f'{row_vlan:>4}    {mac}    DYNAMIC     {port}')
+            total += 1
+        lines.append(f'Total Mac Addresses for this criterion: {total}')
+        return '\n'.join(lines)
+    
+    def _mac_count(self) -> str:
+        """Per-VLAN counters; churn replaces MACs one for one, so they stay equal"""
+        per_vlan = {}
+        for slot in itertools.chain(range(self.mac_entries), range(self.uplink_mac_entries)):
+            per_vlan[self._vlan(slot)] = per_vlan.get(self._vlan(slot), 0) + 1
+        lines = []
+        for vlan, count in sorted(per_vlan.items()):
+            lines += [f'Mac Entries for Vlan {vlan}:', '---------------------------',
+                      f'Dynamic Address Count  : {count}', 'Static  Address Count  : 0',
+                      f'Total Mac Addresses    : {count}', '']
+        lines.append(f'Total Mac Address Space Available: {max(0, 8192 - self.mac_entries - self.uplink_mac_entries)}')
+        return '\n'.join(lines)
+    
+    def _arp_table(self) -> str:
+        lines = ['Protocol  Address          Age (min)  Hardware Addr   Type   Interface']
+        for slot, i in enumerate(self._current_macs()[:int(self.mac_entries * self.arp_ratio)]):
+            ip = f'198.{self._subnet}.{(slot >> 8) & 0xFF}.{slot & 0xFF}'
+            lines.append(f'Internet  {ip:<16}{slot % 240:>5}   {self._mac(i)}  ARPA   Vlan{self._vlan(slot)}')
+        return '\n'.join(lines)
+    
+    def _interface_status(self) -> str:
+        lines = ['', 'Port      Name               Status       Vlan       Duplex  Speed Type']
+        for port in range(1, self.ports + 1):
+            lines.append(f'Gi1/0/{port:<4}{"":<19}{"connected":<13}{self._vlan(port - 1):<11}'
+                         f'a-full a-1000 10/100/1000BaseTX')
+        for port in self.UPLINKS if self.uplink_mac_entries else ():
+            lines.append(f'{port:<10}{"uplink":<19}{"connected":<13}{"trunk":<11}full    10G SFP-10GBase-SR')
+        return '\n'.join(lines)
+    
+    def _cdp_neighbors(self) -> str:
+        lines = ['Capability Codes: R - Router, T - Trans Bridge, B - Source Route Bridge',
+                 '                  S - Switch, H - Host, I - IGMP, r - Repeater, P - Phone,',
+                 '                  D - Remote, C - CVTA, M - Two-port Mac Relay', '',
+                 'Device ID        Local Intrfce     Holdtme    Capability  Platform  Port ID']
+        if self.uplink_mac_entries:
+            lines += [f'core-{self.hostname}.example.net',
+                      '                 Ten 1/1/1         152             R S I  WS-C3850- Ten 1/0/1']
+        lines.append('SEP0002CAFE0001  Gig 1/0/1         170              H P M  IP Phone  Port 1')
+        return '\n'.join(lines + ['', f'Total cdp entries displayed : {len(lines) - 5 - bool(self.uplink_mac_entries)}'])
+    
+    def _lldp_neighbors(self) -> str:
+        lines = ['Capability codes:', '    (R) Router, (B) Bridge, (T) Telephone, (C) DOCSIS Cable Device',
+                 '    (W) WLAN Access Point, (P) Repeater, (S) Station, (O) Other', '',
+                 'Device ID           Local Intf     Hold-time  Capability      Port ID']
+        if self.uplink_mac_entries:
+            lines.append('core-2              Te1/1/2        120        B,R             Te1/0/2')
+        return '\n'.join(lines + ['', f'Total entries displayed: {len(lines) - 5}'])
+    
+    def _trunks(self) -> str:
+        lines = ['', 'Port        Mode             Encapsulation  Status        Native vlan']
+        uplinks = self.UPLINKS if self.uplink_mac_entries else ()
+        lines += [f'{port:<12}on               802.1q         trunking      1' for port in uplinks]
+        lines += ['', 'Port        Vlans allowed on trunk']
+        lines += [f'{port:<12}1-4094' for port in uplinks]
+        return '\n'.join(lines)
+    
+    def _version(self) -> str:
+        return (f'Cisco IOS Software, Synthetic Software (SIM-UNIVERSALK9-M), Version 15.2(4)E10\n'
+                f'{self.hostname} uptime is 1 week, 2 days\n'
+                f'cisco WS-C2960X-48TS-L (APM86XXX) processor with 524288K bytes of memory.\n'
+                f'Model number                    : WS-C2960X-48TS-L')
+
+
+def recording_path(directory: str, host: str) -> str:
+    """File a host's recording is stored in"""
+    return os.path.join(directory, re.sub(r'[^\w.-]', '_', host) + '.json')
+
+
+class SessionRecording:
+    """Recorded command outputs for one switch, shared by its sessions"""
+    
+    _instances = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, path: str, max_samples: int = 10):
+        self.path = path
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.data = {'prompt': None, 'commands': {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.data = json.load(f)
+    
+    @classmethod
+    def open(cls, path: str) -> 'SessionRecording':
+        """Get the recording for a path (one instance per file)"""
+        with cls._instances_lock:
+            recording = cls._instances.get(path)
+            if recording is None:
+                recording = cls._instances[path] = cls(path)
+            return recording
+    
+    def add(self, command: str, output: str, latency: float):
+        """Store one command run (keeps the last max_samples per command)"""
+        with self.lock:
+            samples = self.data['commands'].setdefault(command, [])
+            samples.append({'output': output, 'latency': round(latency, 4)})
+            del samples[:-self.max_samples]
+            self._write()
+    
+    def set_prompt(self, prompt: str):
+        with self.lock:
+            if self.data.get('prompt') != prompt:
+                self.data['prompt'] = prompt
+                self._write()
+    
+    def _write(self):
+        """Write atomically so a crash never leaves half a recording"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.data, f, indent=1)
+        os.replace(temp_path, self.path)
+
+
+class RecordingConnection:
+    """Wraps a live netmiko connection and records what it returns"""
+    
+    def __init__(self, connection, recording: SessionRecording):
+        self._connection = connection
+        self._recording = recording
+        self._streaming = None  # [command, started, chunks] while a streamed command runs
+        self._prompt = None
+    
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+    
+    def find_prompt(self, *args, **kwargs) -> str:
+        prompt = self._connection.find_prompt(*args, **kwargs)
+        self._prompt = prompt.strip()
+        self._recording.set_prompt(self._prompt)
+        return prompt
+    
+    def send_command(self, command: str, *args, **kwargs) -> str:
+        started = time.monotonic()
+        output = self._connection.send_command(command, *args, **kwargs)
+        self._recording.add(command.strip(), output, time.monotonic() - started)
+        return output
+    
+    def write_channel(self, data: str):
+        self._streaming = [data.strip(), time.monotonic(), []]
+        return self._connection.write_channel(data)
+    
+    def read_channel(self) -> str:
+        chunk = self._connection.read_channel()
+        if chunk and self._streaming:
+            command, started, chunks = self._streaming
+            chunks.append(chunk)
+            text = ''.join(chunks)
+            if self._prompt and text.rstrip().endswith(self._prompt):
+                # Drop the echoed command and the trailing prompt
+                lines = text.rstrip()[:-len(self._prompt)].split('\n')
+                if lines and command in lines[0]:
+                    lines = lines[1:]
+                output = '\n'.join(line.rstrip('\r') for line in lines).strip('\n')
+                self._recording.add(command, output, time.monotonic() - started)
+                self._streaming = None
+        return chunk
+
+
+class ReplayConnection(SimulatedConnection):
+    """Serves a recording back as if it were the switch
+    
+    Each command cycles through its recorded samples in order, so a
+    recording of several scans replays the same sequence every run.
+    Commands that were never recorded get the IOS invalid-input error.
+    """
+    
+    def __init__(self, recording: Dict, realtime: bool = False, speed: float = 1.0):
+        """
+        Args:
+            recording: Loaded recording ({'prompt': str, 'commands': {...}})
+            realtime: Reproduce the recorded latency of every command
+            speed: Playback speed factor when realtime (2.0 = twice as fast)
+        """
+        super().__init__(recording.get('prompt') or 'Switch#')
+        self.commands = recording.get('commands', {})
+        self.realtime = realtime
+        self.speed = speed if speed > 0 else 1.0
+        self._next_sample = {}
+    
+    def _output(self, command: str):
+        samples = self.commands.get(command)
+        if not samples:
+            return f'{command}{INVALID_INPUT}', 0.0
+        index = self._next_sample.get(command, 0)
+        self._next_sample[command] = index + 1
+        sample = samples[index % len(samples)]
+        return sample['output'], sample['latency'] / self.speed if self.realtime else 0.0
+
+
+def make_transport(mode: str, directory: str = 'recordings', realtime: bool = False,
+                   synthetic: Optional[Dict] = None) -> Optional[Callable]:
+    """Build the transport for SwitchConnector(transport=...)
+    
+    Args:
+        mode: 'ssh', 'record', 'replay' or 'synthetic'
+        directory: Where recordings are written (record) or read (replay)
+        realtime: Replay with the recorded command latencies
+        synthetic: Keyword arguments for SyntheticConnection
+    
+    Returns:
+        transport(connector) -> connection, or None for plain SSH
+    """
+    mode = (mode or 'ssh').lower()
+    if mode == 'ssh':
+        return None
+    
+    if mode == 'record':
+        def transport(connector):
+            recording = SessionRecording.open(recording_path(directory, connector.host))
+            return RecordingConnection(connector.open_ssh(), recording)
+    elif mode == 'replay':
+        def transport(connector):
+            path = recording_path(directory, connector.host)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No recording for {connector.host} at {path}")
+            with open(path) as f:
+                return ReplayConnection(json.load(f), realtime=realtime)
+    elif mode == 'synthetic':
+        options = dict(synthetic or {})
+        
+        def transport(connector):
+            return SyntheticConnection(connector.host, **options)
+    else:
+        raise ValueError(f"Unknown switch transport '{mode}' (expected ssh, record, replay or synthetic)")
+    
+    return transport
+
+
+def transport_from_config(config) -> Optional[Callable]:
+    """Build the transport selected by the SWITCH_TRANSPORT settings"""
+    return make_transport(
+        getattr(config, 'SWITCH_TRANSPORT', 'ssh'),
+        directory=getattr(config, 'SWITCH_RECORDINGS_DIR', 'recordings'),
+        realtime=getattr(config, 'SWITCH_REPLAY_REALTIME', False),
+        synthetic={
+            'mac_entries': getattr(config, 'SWITCH_SYNTHETIC_MAC_ENTRIES', 1000),
+            'ports': getattr(config, 'SWITCH_SYNTHETIC_PORTS', 48),
+            'churn': getattr(config, 'SWITCH_SYNTHETIC_CHURN', 0.0),
+            'latency': getattr(config, 'SWITCH_SYNTHETIC_LATENCY_SECONDS', 0.0),
+            'uplink_mac_entries': getattr(config, 'SWITCH_SYNTHETIC_UPLINK_MAC_ENTRIES', 0),
+        }
+    )
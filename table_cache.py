@@ -0,0 +1,141 @@
+"""
+Per-switch MAC table cache driven by cheap MAC table counters
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class SwitchTableCache:
+    """Decides per switch whether its MAC table has to be pulled again
+    
+    Before each scan the collector reads the switch's MAC table counters
+    ('show mac address-table count'). If they match the counters of the
+    last pull, the cached MAC table is reused. If only a few VLANs
+    differ and the platform can list a single VLAN, only those VLANs are
+    fetched; otherwise the whole table is.
+    
+    Counters only see how many MACs each VLAN has, so between full pulls
+    the cached table misses changes that keep those numbers equal: a MAC
+    moving to another port in the same VLAN (no ROGUE_PORT_CHANGED), or a
+    new MAC replacing one that aged out (no new rogue). Every
+    full_refresh_every-th scan of a switch pulls everything regardless,
+    which bounds that blind spot to full_refresh_every - 1 scans; MAC
+    notification traps (NotificationListener) cover it in between.
+    """
+    
+    FULL = 'full'
+    VLANS = 'vlans'
+    CACHED = 'cached'
+    
+    def __init__(self, full_refresh_every: int = 3, max_vlan_fetches: int = 4):
+        """
+        Args:
+            full_refresh_every: Pull the full table at least every N scans
+            max_vlan_fetches: Pull the full table when more VLANs changed
+        """
+        self.full_refresh_every = max(1, full_refresh_every)
+        self.max_vlan_fetches = max_vlan_fetches
+        
+        self._lock = threading.Lock()
+        # host -> {'counts': {...}, 'by_vlan': {vlan: [entries]}, 'scans_since_full': int}
+        self._switches = {}
+        
+        self.full_fetches = 0
+        self.vlan_fetches = 0
+        self.vlans_fetched = 0
+        self.cached_scans = 0
+    
+    def plan(self, host: str, counts: Optional[Dict], per_vlan: bool = True) -> Tuple[str, List]:
+        """Decide how to collect a switch's MAC table this scan
+        
+        Args:
+            host: Switch host
+            counts: Current counters from get_mac_address_count() (None = unknown)
+            per_vlan: Whether the switch can list the MAC table of one VLAN
+        
+        Returns:
+            (FULL, []), (CACHED, []) or (VLANS, changed VLANs); VLANs that
+            disappeared from the counters are included and fetch nothing
+        """
+        with self._lock:
+            state = self._switches.get(host)
+            if counts is None or state is None or state['scans_since_full'] + 1 >= self.full_refresh_every:
+                return self.FULL, []
+            
+            previous = state['counts']
+            if counts == previous:
+                return self.CACHED, []
+            
+            # NX-OS only counts all VLANs together
+            if not per_vlan or 'all' in counts or 'all' in previous:
+                return self.FULL, []
+            
+            changed = sorted(vlan for vlan in set(counts) | set(previous) if counts.get(vlan) != previous.get(vlan))
+            if sum(1 for vlan in changed if vlan in counts) > self.max_vlan_fetches:
+                return self.FULL, []
+            return self.VLANS, changed
+    
+    def store_full(self, host: str, counts: Dict, mac_table: List[Dict]) -> List[Dict]:
+        """Remember a fully pulled MAC table; returns it in VLAN order"""
+        by_vlan = {}
+        for entry in mac_table:
+            by_vlan.setdefault(entry['vlan'], []).append(entry)
+        
+        with self._lock:
+            self._switches[host] = {'counts': counts, 'by_vlan': by_vlan, 'scans_since_full': 0}
+            self.full_fetches += 1
+            return self._mac_table(by_vlan)
+    
+    def store_vlans(self, host: str, counts: Dict, vlans: List, entries: List[Dict]) -> List[Dict]:
+        """Replace the cached entries of some VLANs; returns the merged MAC table"""
+        fetched = {}
+        for entry in entries:
+            fetched.setdefault(entry['vlan'], []).append(entry)
+        
+        with self._lock:
+            state = self._switches[host]
+            by_vlan = dict(state['by_vlan'])
+            for vlan in vlans:
+                by_vlan.pop(vlan, None)
+                if vlan in fetched:
+                    by_vlan[vlan] = fetched[vlan]
+            state.update(counts=counts, by_vlan=by_vlan, scans_since_full=state['scans_since_full'] + 1)
+            self.vlan_fetches += 1
+            self.vlans_fetched += len(vlans)
+            return self._mac_table(by_vlan)
+    
+    def cached_table(self, host: str) -> List[Dict]:
+        """Get the cached MAC table of an unchanged switch"""
+        with self._lock:
+            state = self._switches[host]
+            state['scans_since_full'] += 1
+            self.cached_scans += 1
+            return self._mac_table(state['by_vlan'])
+    
+    def _mac_table(self, by_vlan: Dict) -> List[Dict]:
+        """Flatten entries in VLAN order, as the switch lists them"""
+        # Numeric VLANs first, then named ones, each group sorted
+        return [entry for vlan in sorted(by_vlan, key=lambda vlan: (type(vlan).__name__, vlan))
+                for entry in by_vlan[vlan]]
+    
+    def invalidate(self, host: str = None):
+        """Force a full pull next scan (one switch, or all of them)"""
+        with self._lock:
+            if host:
+                self._switches.pop(host, None)
+            else:
+                self._switches.clear()
+    
+    def get_stats(self) -> Dict:
+        """Get how often scans pulled the full table, some VLANs, or nothing"""
+        with self._lock:
+            scans = self.full_fetches + self.vlan_fetches + self.cached_scans
+            return {
+                'switches_cached': len(self._switches),
+                'full_refresh_every': self.full_refresh_every,
+                'full_fetches': self.full_fetches,
+                'vlan_fetches': self.vlan_fetches,
+                'vlans_fetched': self.vlans_fetched,
+                'cached_scans': self.cached_scans,
+                'skip_rate': round(self.cached_scans / scans, 3) if scans else None
+            }
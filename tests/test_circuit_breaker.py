@@ -0,0 +1,78 @@
+"""
+Per-switch circuit breakers (circuit_breaker)
+"""
+import time
+import unittest
+
+from circuit_breaker import CircuitOpenError, SwitchCircuitBreakers
+
+
+class BreakerTests(unittest.TestCase):
+    
+    def setUp(self):
+        self.breakers = SwitchCircuitBreakers(failure_threshold=2, reset_timeout=0.05, max_reset_timeout=0.2)
+    
+    def state(self, host='sw1'):
+        return self.breakers.get_stats()['switches'][host]['state']
+    
+    def trip(self, host='sw1'):
+        for _ in range(self.breakers.failure_threshold):
+            self.assertFalse(self.breakers.check(host))
+            self.breakers.record_failure(host, 'timed out')
+    
+    def test_closed_until_threshold(self):
+        self.assertFalse(self.breakers.check('sw1'))
+        self.breakers.record_failure('sw1', 'timed out')
+        self.assertEqual(self.state(), SwitchCircuitBreakers.CLOSED)
+        self.assertFalse(self.breakers.check('sw1'))
+        self.breakers.record_failure('sw1', 'timed out')
+        self.assertEqual(self.state(), SwitchCircuitBreakers.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breakers.check('sw1')
+    
+    def test_open_half_open_closed_recovery(self):
+        self.trip()
+        time.sleep(0.06)
+        self.assertTrue(self.breakers.check('sw1'))  # This caller is the trial
+        self.assertEqual(self.state(), SwitchCircuitBreakers.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breakers.check('sw1')  # Anyone else waits for the trial
+        self.breakers.record_success('sw1')
+        self.assertEqual(self.state(), SwitchCircuitBreakers.CLOSED)
+        self.assertFalse(self.breakers.check('sw1'))
+        self.assertEqual(self.breakers.get_stats()['times_closed'], 1)
+    
+    def test_failed_trial_reopens_for_longer(self):
+        self.trip()
+        time.sleep(0.06)
+        self.assertTrue(self.breakers.check('sw1'))
+        self.breakers.record_failure('sw1', 'still down')
+        self.assertEqual(self.state(), SwitchCircuitBreakers.OPEN)
+        time.sleep(0.06)
+        with self.assertRaises(CircuitOpenError):
+            self.breakers.check('sw1')  # Now waits 0.1s
+        time.sleep(0.05)
+        self.assertTrue(self.breakers.check('sw1'))
+    
+    def test_abandoned_trial_expires(self):
+        self.trip()
+        time.sleep(0.06)
+        self.assertTrue(self.breakers.check('sw1'))
+        with self.assertRaises(CircuitOpenError):
+            self.breakers.check('sw1')
+        time.sleep(0.06)  # The trial never reported back: the next caller gets a new one
+        self.assertTrue(self.breakers.check('sw1'))
+        self.assertEqual(self.state(), SwitchCircuitBreakers.HALF_OPEN)
+    
+    def test_switches_are_independent(self):
+        self.trip('sw1')
+        self.assertFalse(self.breakers.check('sw2'))
+    
+    def test_reset(self):
+        self.trip()
+        self.breakers.reset('sw1')
+        self.assertFalse(self.breakers.check('sw1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
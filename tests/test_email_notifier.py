@@ -0,0 +1,110 @@
+"""
+Email delivery requeue on failure (email_notifier)
+"""
+import smtplib
+import time
+import unittest
+
+from email_notifier import EmailDeliveryWorker
+
+
+class FakeServer:
+    """An SMTP session that fails the next `failures[to]` sends to a recipient"""
+    
+    def __init__(self, failures: dict, sent: list):
+        self.failures = failures
+        self.sent = sent
+    
+    def send_message(self, msg):
+        if self.failures.get(msg['To'], 0) > 0:
+            self.failures[msg['To']] -= 1
+            raise smtplib.SMTPException('451 try again later')
+        self.sent.append((msg['To'], time.monotonic()))
+    
+    def quit(self):
+        pass
+
+
+class FakeNotifier:
+    
+    def __init__(self):
+        self.failures = {}
+        self.sent = []
+    
+    def _open_smtp_session(self):
+        return FakeServer(self.failures, self.sent)
+    
+    def recipients(self):
+        return [to for to, _ in self.sent]
+
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class RequeueTests(unittest.TestCase):
+
+    def setUp(self):
+        self.notifier = FakeNotifier()
+        self.workers = []
+    
+    def tearDown(self):
+        for worker in self.workers:
+            worker.stop()
+    
+    def worker(self, **kwargs) -> EmailDeliveryWorker:
+        worker = EmailDeliveryWorker(self.notifier, idle_timeout=5, **kwargs)
+        self.workers.append(worker)
+        return worker
+    
+    def test_failed_message_does_not_hold_up_the_queue(self):
+        worker = self.worker(retry_backoff=0.5)
+        self.notifier.failures['a@example.com'] = 1
+        started = time.monotonic()
+        worker.submit({'To': 'a@example.com'})
+        worker.submit({'To': 'b@example.com'})
+        
+        self.assertTrue(wait_until(lambda: self.notifier.recipients() == ['b@example.com']))
+        self.assertLess(self.notifier.sent[0][1] - started, 0.4)
+        self.assertEqual(worker.get_stats()['retry_pending'], 1)
+        self.assertEqual(worker.get_stats()['retries'], 1)
+    
+    def test_failed_message_is_retried_after_backoff(self):
+        worker = self.worker(retry_backoff=0.2)
+        self.notifier.failures['a@example.com'] = 1
+        started = time.monotonic()
+        worker.submit({'To': 'a@example.com'})
+        
+        self.assertTrue(wait_until(lambda: self.notifier.recipients() == ['a@example.com']))
+        self.assertGreaterEqual(self.notifier.sent[0][1] - started, 0.2)
+        stats = worker.get_stats()
+        self.assertEqual((stats['sent'], stats['failed'], stats['retry_pending']), (1, 0, 0))
+    
+    def test_stop_gives_pending_retries_a_last_attempt(self):
+        worker = self.worker(retry_backoff=60)
+        self.notifier.failures['a@example.com'] = 1
+        worker.submit({'To': 'a@example.com'})
+        self.assertTrue(wait_until(lambda: worker.get_stats()['retry_pending'] == 1))
+        
+        self.assertTrue(worker.stop())
+        self.assertEqual(self.notifier.recipients(), ['a@example.com'])
+        self.assertEqual(worker.get_stats()['retry_pending'], 0)
+    
+    def test_gives_up_after_max_retries(self):
+        worker = self.worker(retry_backoff=0.01, max_retries=3)
+        self.notifier.failures['a@example.com'] = 10
+        worker.submit({'To': 'a@example.com'})
+        
+        self.assertTrue(wait_until(lambda: worker.get_stats()['failed'] == 1))
+        stats = worker.get_stats()
+        self.assertEqual((stats['sent'], stats['retries'], stats['retry_pending']), (0, 3, 0))
+        self.assertEqual(self.notifier.failures['a@example.com'], 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
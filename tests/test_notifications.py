@@ -0,0 +1,38 @@
+"""
+Notification listener lifecycle (notifications)
+"""
+import unittest
+
+from notifications import NotificationListener
+
+
+class ListenerLifecycleTests(unittest.TestCase):
+    
+    def listener(self):
+        return NotificationListener(lambda event: None, address='127.0.0.1', trap_port=0, syslog_port=0)
+    
+    def test_stop_without_start(self):
+        # The listener is off by default; the detector still stops it on shutdown
+        listener = self.listener()
+        listener.stop()
+        self.assertFalse(listener.is_running())
+    
+    def test_stop_twice(self):
+        listener = self.listener()
+        self.assertTrue(listener.start())
+        self.assertTrue(listener.is_running())
+        listener.stop()
+        listener.stop()
+        self.assertFalse(listener.is_running())
+    
+    def test_restart_after_stop(self):
+        listener = self.listener()
+        self.assertTrue(listener.start())
+        listener.stop()
+        self.assertTrue(listener.start())
+        self.assertTrue(listener.is_running())
+        listener.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Session pools under an open circuit (session_pool, async_switch_connector)
+"""
+import asyncio
+import threading
+import time
+import unittest
+
+from async_switch_connector import AsyncSwitchPool
+from circuit_breaker import CircuitOpenError, SwitchCircuitBreakers
+from session_pool import SwitchSessionPool
+
+
+class FakeSwitch:
+    """A switch that connects while `up` is set"""
+    
+    def __init__(self, host: str, up: threading.Event):
+        self.host = host
+        self.up = up
+        self.connected = False
+        self.connection = None
+        self.last_error = None
+    
+    def connect(self) -> bool:
+        self.connected = self.up.is_set()
+        self.connection = object() if self.connected else None
+        self.last_error = None if self.connected else 'timed out'
+        return self.connected
+    
+    def disconnect(self):
+        self.connected = False
+        self.connection = None
+    
+    def is_alive(self) -> bool:
+        return self.connected
+
+
+class FakeAsyncSwitch(FakeSwitch):
+    
+    async def connect(self) -> bool:
+        return FakeSwitch.connect(self)
+    
+    async def disconnect(self):
+        self.connected = False
+        self.connection = None
+
+
+class SessionPoolTests(unittest.TestCase):
+    
+    def setUp(self):
+        self.up = threading.Event()
+        self.breakers = SwitchCircuitBreakers(failure_threshold=2, reset_timeout=0.05)
+        self.pool = SwitchSessionPool(lambda host: FakeSwitch(host, self.up), max_sessions_per_switch=1,
+                                      checkout_timeout=5, breakers=self.breakers)
+    
+    def tearDown(self):
+        self.pool.close_all()
+    
+    def state(self):
+        return self.breakers.get_stats()['switches']['sw1']['state']
+    
+    def trip(self):
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                self.pool.checkout('sw1')
+        self.assertEqual(self.state(), SwitchCircuitBreakers.OPEN)
+    
+    def test_open_circuit_fails_fast_without_waiting_for_a_slot(self):
+        self.up.set()
+        held = self.pool.checkout('sw1')  # Takes the only slot
+        self.breakers.reset_timeout = 60  # Stays open for the whole test
+        self.breakers.record_failure('sw1', 'down')
+        self.breakers.record_failure('sw1', 'down')
+        started = time.monotonic()
+        with self.assertRaises(CircuitOpenError):
+            self.pool.checkout('sw1')
+        self.assertLess(time.monotonic() - started, 1)
+        self.pool.checkin(held)
+    
+    def test_recovers_through_half_open_trial(self):
+        self.trip()
+        with self.assertRaises(CircuitOpenError):
+            self.pool.checkout('sw1')
+        
+        self.up.set()  # Repaired
+        time.sleep(0.06)
+        switch = self.pool.checkout('sw1')
+        self.assertTrue(switch.connected)
+        self.assertEqual(self.state(), SwitchCircuitBreakers.CLOSED)
+        self.pool.checkin(switch)
+        with self.pool.session('sw1') as switch:
+            self.assertTrue(switch.connected)
+    
+    def test_failed_trial_reopens(self):
+        self.trip()
+        time.sleep(0.06)
+        with self.assertRaises(ConnectionError) as raised:
+            self.pool.checkout('sw1')
+        self.assertNotIsInstance(raised.exception, CircuitOpenError)  # The trial really connected
+        self.assertEqual(self.state(), SwitchCircuitBreakers.OPEN)
+
+
+class AsyncSwitchPoolTests(unittest.TestCase):
+    
+    def setUp(self):
+        self.up = threading.Event()
+        self.breakers = SwitchCircuitBreakers(failure_threshold=2, reset_timeout=0.05)
+        self.pool = AsyncSwitchPool(lambda host: FakeAsyncSwitch(host, self.up), max_concurrency=1,
+                                    breakers=self.breakers)
+    
+    def tearDown(self):
+        self.pool.close_all()
+    
+    async def use(self, host: str) -> bool:
+        async with self.pool.session(host) as switch:
+            return switch.connected
+    
+    def test_recovers_through_half_open_trial(self):
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                self.pool.run(self.use('sw1'), timeout=5)
+        with self.assertRaises(CircuitOpenError):
+            self.pool.run(self.use('sw1'), timeout=5)
+        
+        self.up.set()
+        time.sleep(0.06)
+        self.assertTrue(self.pool.run(self.use('sw1'), timeout=5))
+        self.assertEqual(self.breakers.get_stats()['switches']['sw1']['state'], SwitchCircuitBreakers.CLOSED)
+    
+    def test_open_circuit_fails_fast_without_waiting_for_the_semaphore(self):
+        self.up.set()
+        self.breakers.reset_timeout = 60
+        self.breakers.record_failure('sw2', 'down')
+        self.breakers.record_failure('sw2', 'down')
+        
+        async def scenario():
+            async def hold():
+                async with self.pool.session('sw1'):
+                    await asyncio.sleep(1)
+            holder = asyncio.ensure_future(hold())
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            try:
+                await self.use('sw2')
+            except CircuitOpenError:
+                return time.monotonic() - started
+            finally:
+                holder.cancel()
+        
+        self.assertLess(self.pool.run(scenario(), timeout=5), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
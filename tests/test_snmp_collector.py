@@ -0,0 +1,101 @@
+"""
+BER encoding and decoding of SNMP messages (snmp_collector)
+"""
+import unittest
+
+from snmp_collector import (
+    _encode_integer, _encode_oid, _tlv, decode_message, encode_message, oid,
+    COUNTER32, COUNTER64, END_OF_MIB_VIEW, GAUGE32, GET, GET_BULK, INTEGER, IP_ADDRESS,
+    NO_SUCH_INSTANCE, NULL, OBJECT_IDENTIFIER, OCTET_STRING, RESPONSE, SEQUENCE, SNMP_V1,
+    SNMP_V2C, TIMETICKS, TRAP_V1, TRAP_V2
+)
+
+
+class BerRoundTripTests(unittest.TestCase):
+    """decode_message(encode_message(...)) gives back what was encoded"""
+    
+    def round_trip(self, pdu_type, varbinds, request_id=1234, field1=0, field2=0, community=b'public'):
+        message = decode_message(encode_message(community, pdu_type, request_id, field1, field2, varbinds))
+        self.assertEqual(message['version'], SNMP_V2C)
+        self.assertEqual(message['community'], community)
+        self.assertEqual(message['pdu_type'], pdu_type)
+        self.assertEqual(message['request_id'], request_id)
+        self.assertEqual((message['field1'], message['field2']), (field1, field2))
+        return message['varbinds']
+    
+    def test_known_get_request_bytes(self):
+        # GET sysDescr.0, community "public" (the usual textbook capture)
+        expected = bytes.fromhex('302602010104067075626c6963a019020101020100020100300e300c'
+                                 '06082b060102010101000500')
+        self.assertEqual(encode_message(b'public', GET, 1, 0, 0, [(oid('1.3.6.1.2.1.1.1.0'), NULL, None)]),
+                         expected)
+        self.assertEqual(decode_message(expected)['varbinds'], [((1, 3, 6, 1, 2, 1, 1, 1, 0), NULL, None)])
+    
+    def test_value_types(self):
+        varbinds = [
+            (oid('1.3.6.1.2.1.2.2.1.1.1'), INTEGER, 0),
+            (oid('1.3.6.1.2.1.2.2.1.1.2'), INTEGER, -1),
+            (oid('1.3.6.1.2.1.2.2.1.1.3'), INTEGER, 2 ** 31 - 1),
+            (oid('1.3.6.1.2.1.2.2.1.1.4'), INTEGER, -2 ** 31),
+            (oid('1.3.6.1.2.1.2.2.1.10.1'), COUNTER32, 2 ** 32 - 1),
+            (oid('1.3.6.1.2.1.2.2.1.5.1'), GAUGE32, 128),
+            (oid('1.3.6.1.2.1.1.3.0'), TIMETICKS, 255),
+            (oid('1.3.6.1.2.1.31.1.1.1.6.1'), COUNTER64, 2 ** 64 - 1),
+            (oid('1.3.6.1.2.1.4.20.1.1.10.0.0.1'), IP_ADDRESS, bytes([10, 0, 0, 1])),
+            (oid('1.3.6.1.2.1.17.4.3.1.1.0.80.86.137.26.43'), OCTET_STRING, bytes.fromhex('005056891a2b')),
+            (oid('1.3.6.1.2.1.1.2.0'), OBJECT_IDENTIFIER, oid('1.3.6.1.4.1.9.1.2494')),
+        ]
+        self.assertEqual(self.round_trip(RESPONSE, varbinds), varbinds)
+    
+    def test_exception_values_decode_to_none(self):
+        varbinds = [(oid('1.3.6.1.2.1.1.1.0'), NULL, None),
+                    (oid('1.3.6.1.2.1.1.9.0'), NO_SUCH_INSTANCE, None),
+                    (oid('1.3.6.1.2.1.99'), END_OF_MIB_VIEW, None)]
+        self.assertEqual(self.round_trip(RESPONSE, varbinds), varbinds)
+    
+    def test_large_oid_arcs(self):
+        name = (1, 3, 6, 1, 4, 1, 127, 128, 16383, 16384, 2 ** 32 - 1)
+        self.assertEqual(self.round_trip(GET, [(name, NULL, None)]), [(name, NULL, None)])
+    
+    def test_long_form_lengths(self):
+        # Values and messages over 127 and 255 bytes need multi-byte lengths
+        varbinds = [(oid(f'1.3.6.1.2.1.1.5.{i}'), OCTET_STRING, bytes(range(256)) * (i + 1)) for i in range(3)]
+        self.assertEqual(self.round_trip(RESPONSE, varbinds, community=b'x' * 200), varbinds)
+    
+    def test_get_bulk_fields(self):
+        varbinds = [(oid('1.3.6.1.2.1.17.4.3.1.2'), NULL, None)]
+        self.assertEqual(self.round_trip(GET_BULK, varbinds, request_id=2 ** 31 - 1, field1=0, field2=50),
+                         varbinds)
+    
+    def test_v2c_trap(self):
+        varbinds = [(oid('1.3.6.1.2.1.1.3.0'), TIMETICKS, 12345),
+                    (oid('1.3.6.1.6.3.1.1.4.1.0'), OBJECT_IDENTIFIER, oid('1.3.6.1.6.3.1.1.5.4'))]
+        self.assertEqual(self.round_trip(TRAP_V2, varbinds, community=b'traps'), varbinds)
+    
+    def test_v1_trap(self):
+        varbind = _tlv(SEQUENCE, _encode_oid(oid('1.3.6.1.2.1.2.2.1.1.3')) + _encode_integer(3))
+        pdu = _tlv(TRAP_V1, _encode_oid(oid('1.3.6.1.4.1.9')) + _tlv(IP_ADDRESS, bytes([192, 0, 2, 7]))
+                   + _encode_integer(3) + _encode_integer(0) + _encode_integer(4200, TIMETICKS)
+                   + _tlv(SEQUENCE, varbind))
+        message = decode_message(_tlv(SEQUENCE, _encode_integer(SNMP_V1) + _tlv(OCTET_STRING, b'public') + pdu))
+        self.assertEqual(message['version'], SNMP_V1)
+        self.assertEqual(message['pdu_type'], TRAP_V1)
+        self.assertEqual(message['enterprise'], (1, 3, 6, 1, 4, 1, 9))
+        self.assertEqual(message['agent_address'], '192.0.2.7')
+        self.assertEqual((message['field1'], message['field2']), (3, 0))
+        self.assertEqual(message['varbinds'], [((1, 3, 6, 1, 2, 1, 2, 2, 1, 1, 3), INTEGER, 3)])
+    
+    def test_malformed_messages_raise(self):
+        data = encode_message(b'public', GET, 1, 0, 0, [(oid('1.3.6.1.2.1.1.1.0'), NULL, None)])
+        for bad in (data[:-3], data[:10], b'\x02\x01\x01'):
+            with self.subTest(bad=bad):
+                with self.assertRaises((ValueError, IndexError)):
+                    decode_message(bad)
+    
+    def test_oid_parsing(self):
+        self.assertEqual(oid('1.3.6.1'), (1, 3, 6, 1))
+        self.assertEqual(oid('.1.3.6.1.'), (1, 3, 6, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
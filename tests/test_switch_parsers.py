@@ -0,0 +1,24 @@
+"""
+Platform parsers against recorded output (fixtures/parsers/<device_type>/)
+"""
+import unittest
+
+from benchmark_parsers import FIXTURE_TABLES, fixture_platforms, load_fixture
+from switch_parsers import PLATFORMS
+
+
+class FixtureTests(unittest.TestCase):
+    """Each capture must parse to exactly the entries in the JSON next to it"""
+    
+    def test_every_fixture_matches_expected_output(self):
+        self.assertTrue(fixture_platforms())
+        for device_type in fixture_platforms():
+            for table, parser_name in FIXTURE_TABLES:
+                with self.subTest(device_type=device_type, table=table):
+                    output, expected = load_fixture(device_type, table)
+                    self.assertTrue(expected)
+                    self.assertEqual(getattr(PLATFORMS[device_type], parser_name)(output), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
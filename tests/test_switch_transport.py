@@ -0,0 +1,108 @@
+"""
+Recording a switch session and replaying it (switch_transport)
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from switch_transport import (
+    INVALID_INPUT, RecordingConnection, ReplayConnection, SessionRecording, SyntheticConnection,
+    make_transport, recording_path
+)
+
+
+def read_streamed(connection, command: str) -> str:
+    """Run a command over write_channel/read_channel until the prompt comes back"""
+    prompt = connection.find_prompt().strip()
+    connection.write_channel(command + '\n')
+    text = ''
+    for _ in range(10000):
+        text += connection.read_channel()
+        if text.endswith(prompt):
+            return text
+    raise AssertionError(f"No prompt after {command}")
+
+
+class FakeConnector:
+    def __init__(self, host: str):
+        self.host = host
+
+
+class RecordReplayTests(unittest.TestCase):
+    """What a recorded session returned is what its replay returns"""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        self.host = '192.0.2.10'
+        self.path = recording_path(self.directory, self.host)
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def record(self, switch, commands, streamed=()):
+        """Record send_command and streamed runs from a switch; returns what the switch returned"""
+        connection = RecordingConnection(switch, SessionRecording(self.path))
+        prompt = connection.find_prompt()
+        outputs = [(command, connection.send_command(command)) for command in commands]
+        outputs += [(command, read_streamed(connection, command)) for command in streamed]
+        return prompt, outputs
+    
+    def test_send_command_round_trip(self):
+        switch = SyntheticConnection(self.host, mac_entries=50)
+        commands = ['show mac address-table', 'show arp', 'show interfaces status', 'show version']
+        prompt, recorded = self.record(switch, commands)
+        
+        with open(self.path) as f:
+            replay = ReplayConnection(json.load(f))
+        self.assertEqual(replay.find_prompt(), prompt)
+        for command, output in recorded:
+            self.assertEqual(replay.send_command(command), output)
+    
+    def test_streamed_round_trip(self):
+        switch = SyntheticConnection(self.host, mac_entries=200)
+        switch.chunk_size = 97  # Output arrives over many reads
+        prompt, recorded = self.record(switch, [], streamed=['show mac address-table'])
+        
+        with open(self.path) as f:
+            recording = json.load(f)
+        self.assertEqual(recording['prompt'], prompt)
+        self.assertEqual(recording['commands']['show mac address-table'][0]['output'],
+                         switch.send_command('show mac address-table'))
+        
+        replay = ReplayConnection(recording)
+        self.assertEqual(read_streamed(replay, 'show mac address-table'), recorded[0][1])
+    
+    def test_samples_replay_in_order_and_cycle(self):
+        switch = SyntheticConnection(self.host, mac_entries=20, churn=0.5)
+        _, recorded = self.record(switch, ['show mac address-table'] * 3)
+        outputs = [output for _, output in recorded]
+        self.assertEqual(len(set(outputs)), 3)
+        
+        replay = make_transport('replay', self.directory)(FakeConnector(self.host))
+        self.assertIsInstance(replay, ReplayConnection)
+        self.assertEqual([replay.send_command('show mac address-table') for _ in range(4)],
+                         outputs + outputs[:1])
+    
+    def test_recording_keeps_last_samples(self):
+        recording = SessionRecording(self.path, max_samples=2)
+        for i in range(5):
+            recording.add('show arp', f'output {i}', 0.01)
+        with open(self.path) as f:
+            samples = json.load(f)['commands']['show arp']
+        self.assertEqual([sample['output'] for sample in samples], ['output 3', 'output 4'])
+    
+    def test_unrecorded_command_is_invalid_input(self):
+        self.record(SyntheticConnection(self.host, mac_entries=5), ['show arp'])
+        replay = make_transport('replay', self.directory)(FakeConnector(self.host))
+        self.assertEqual(replay.send_command('show lldp neighbors'), f'show lldp neighbors{INVALID_INPUT}')
+    
+    def test_missing_recording(self):
+        self.assertFalse(os.path.exists(self.path))
+        with self.assertRaises(FileNotFoundError):
+            make_transport('replay', self.directory)(FakeConnector(self.host))
+
+
+if __name__ == '__main__':
+    unittest.main()